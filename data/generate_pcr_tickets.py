@@ -183,9 +183,8 @@ def major_version(version_str):
     """Extract major version from version string."""
     return version_str.split('.')[0]
 
-def generate_pcr_tickets():
+def generate_pcr_tickets(output_file='/Users/foohm/github/cuttlefish3/JIRA_OPEN_DATA_LARGESET_RELEASE_TICKETS_SYNTHETIC.csv'):
     """Generate all 2,860 PCR tickets."""
-    output_file = '/Users/foohm/github/cuttlefish3/JIRA_OPEN_DATA_LARGESET_RELEASE_TICKETS_SYNTHETIC.csv'
     
     # CSV header matching original format
     header = ['id', 'created', 'description', 'key', 'priority', 'project', 'project_name', 
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Semantic answer cache in front of the multi-agent workflow.
+
+During an incident many people ask the same question in different words
+("prod down ClassCastException", "ClassCastException in production"), and
+each one pays for routing, retrieval and a GPT-4o answer. SemanticAnswerCache
+stores finished responses by query embedding and returns a stored one when a
+new query's cosine similarity reaches the threshold and its request flags
+(user_can_wait / production_incident) match, so repeats are answered in
+milliseconds.
+
+Entries expire after a TTL and are all dropped when the collection is
+re-indexed: the uploaders stamp a new index version into the collection
+metadata (collection_profiles.mark_indexed), and the cache re-reads
+`version()` at most every ANSWER_CACHE_VERSION_CHECK seconds.
+"""
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Minimum cosine similarity between query embeddings to reuse an answer
+ANSWER_CACHE_THRESHOLD = float(os.environ.get('ANSWER_CACHE_THRESHOLD', 0.92))
+ANSWER_CACHE_SIZE = int(os.environ.get('ANSWER_CACHE_SIZE', 512))
+# Seconds an answer stays valid (0 disables expiry)
+ANSWER_CACHE_TTL = float(os.environ.get('ANSWER_CACHE_TTL', 900))
+# Seconds between index version checks
+ANSWER_CACHE_VERSION_CHECK = float(os.environ.get('ANSWER_CACHE_VERSION_CHECK', 30))
+
+
+class CachedAnswer:
+    """A stored response and how closely it matched the new query."""
+
+    def __init__(self, query, response, similarity, age):
+        self.query = query
+        self.response = response
+        self.similarity = similarity
+        self.age = age
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe LRU of responses, looked up by cosine similarity of query embeddings.
+
+    Args:
+        version (callable, optional): Returns the current index version; a change clears the cache
+        threshold (float): Minimum cosine similarity for a hit
+    """
+
+    def __init__(self, version=None, threshold=ANSWER_CACHE_THRESHOLD, maxsize=ANSWER_CACHE_SIZE,
+                 ttl=ANSWER_CACHE_TTL, version_interval=ANSWER_CACHE_VERSION_CHECK, clock=time.monotonic):
+        self.version = version
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version_interval = version_interval
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # flags -> {entry id: (query, unit vector, response, stored_at)}
+        self._groups = {}
+        # entry id -> flags, least recently used first
+        self._order = OrderedDict()
+        # flags -> (entry ids, stacked unit vectors), rebuilt after the group changes
+        self._matrices = {}
+        self._next_id = 0
+        self._index_version = None
+        self._version_checked_at = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self):
+        """Clear everything if the index version moved. Caller holds the lock."""
+        if self.version is None:
+            return
+        now = self.clock()
+        if self._version_checked_at is not None and now - self._version_checked_at < self.version_interval:
+            return
+        self._version_checked_at = now
+        try:
+            current = self.version()
+        except Exception as e:
+            # Keep serving; the next check retries
+            print(f"⚠️  Answer cache could not read the index version: {e}")
+            return
+        if self._index_version is not None and current != self._index_version and len(self):
+            self.invalidations += 1
+            self._clear()
+        self._index_version = current
+
+    def _matrix(self, flags):
+        if flags not in self._matrices:
+            entries = self._groups.get(flags) or {}
+            ids = list(entries)
+            vectors = np.stack([entries[i][1] for i in ids]) if ids else None
+            self._matrices[flags] = (ids, vectors)
+        return self._matrices[flags]
+
+    def _drop(self, entry_id):
+        flags = self._order.pop(entry_id)
+        del self._groups[flags][entry_id]
+        self._matrices.pop(flags, None)
+
+    def _clear(self):
+        self._groups.clear()
+        self._order.clear()
+        self._matrices.clear()
+
+    def lookup(self, query_vector, flags):
+        """Best stored answer for `flags` within the threshold, as a CachedAnswer (a copy), or None."""
+        unit = self._unit(query_vector)
+        with self._lock:
+            self._check_version()
+            ids, vectors = self._matrix(flags)
+            if vectors is not None:
+                similarities = vectors @ unit
+                for best in np.argsort(-similarities):
+                    if similarities[best] < self.threshold:
+                        break
+                    entry_id = ids[best]
+                    query, _, response, stored_at = self._groups[flags][entry_id]
+                    age = self.clock() - stored_at
+                    if self.ttl and age > self.ttl:
+                        self._drop(entry_id)
+                        continue
+                    self._order.move_to_end(entry_id)
+                    self.hits += 1
+                    return CachedAnswer(query, copy.deepcopy(response), float(similarities[best]), age)
+            self.misses += 1
+        return None
+
+    def store(self, query, query_vector, flags, response):
+        """Remember `response` for `query` under `flags`, evicting the least recently used entry if full."""
+        unit = self._unit(query_vector)
+        with self._lock:
+            self._check_version()
+            self._groups.setdefault(flags, {})[self._next_id] = (query, unit, copy.deepcopy(response), self.clock())
+            self._order[self._next_id] = flags
+            self._next_id += 1
+            self._matrices.pop(flags, None)
+            while len(self._order) > self.maxsize:
+                self._drop(next(iter(self._order)))
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def __len__(self):
+        return len(self._order)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': len(self),
+            'invalidations': self.invalidations,
+            'threshold': self.threshold,
+        }
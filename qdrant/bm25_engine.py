@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Vectorized Okapi BM25 scoring, a drop-in for rank_bm25.BM25Okapi.
+
+rank_bm25 scores a query by walking every document's term-frequency dict in
+Python, once per query term, so each query costs O(documents x query terms)
+interpreted work. BM25Engine computes every (document, term) BM25 weight once
+at build time - IDF (with rank_bm25's epsilon floor for common terms) times
+the saturated, length-normalized term frequency - and stores them in a
+term-major scipy CSR matrix. A query is then a sparse 1 x terms vector of
+query-term counts, its scores one sparse-matrix product that only touches the
+postings of the query terms, and the top k an `argpartition` over the
+documents that matched.
+
+Scores equal BM25Okapi.get_scores (to float32 precision), and the engine
+implements get_scores / get_top_n, so it can replace the vectorizer of a
+LangChain BM25Retriever:
+
+    BM25Retriever(vectorizer=BM25Engine.from_corpus(tokenized), docs=docs, k=10)
+"""
+
+from array import array
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+# rank_bm25.BM25Okapi defaults
+K1 = 1.5
+B = 0.75
+EPSILON = 0.25
+
+
+def term_weights(tfs, doc_lengths, avgdl, k1=K1, b=B):
+    """BM25 term-frequency component tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)), elementwise."""
+    tfs = np.asarray(tfs, dtype=np.float32)
+    return tfs * (k1 + 1) / (tfs + k1 * (1 - b + b * np.asarray(doc_lengths, dtype=np.float32) / avgdl))
+
+
+def okapi_idf(doc_freqs, doc_count, epsilon=EPSILON):
+    """
+    rank_bm25's BM25Okapi IDF: log((N - df + 0.5) / (df + 0.5)), with negative
+    values (terms in more than half the documents) raised to epsilon x the mean IDF.
+    """
+    doc_freqs = np.asarray(doc_freqs, dtype=np.float64)
+    idf = np.log(doc_count - doc_freqs + 0.5) - np.log(doc_freqs + 0.5)
+    if len(idf):
+        idf[idf < 0] = epsilon * idf.mean()
+    return idf
+
+
+class BM25Engine:
+    """
+    BM25Okapi over a precomputed term x document weight matrix.
+
+    Args:
+        term_frequencies: scipy.sparse documents x terms matrix of raw counts
+        vocabulary (dict): term -> column of `term_frequencies`
+    """
+
+    def __init__(self, term_frequencies, vocabulary, k1=K1, b=B, epsilon=EPSILON):
+        self.vocabulary = vocabulary
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        counts = sparse.csr_matrix(term_frequencies, dtype=np.float32)
+        counts.sum_duplicates()
+        self.corpus_size, term_count = counts.shape
+        self.doc_len = np.asarray(counts.sum(axis=1), dtype=np.float64).ravel()
+        self.avgdl = self.doc_len.mean() if self.corpus_size else 0.0
+        self.idf = okapi_idf(np.bincount(counts.indices, minlength=term_count), self.corpus_size, epsilon)
+
+        # Weight of every nonzero (document, term) pair, then transposed to term-major
+        rows = np.repeat(np.arange(self.corpus_size), np.diff(counts.indptr))
+        data = (self.idf[counts.indices] * term_weights(counts.data, self.doc_len[rows], self.avgdl, k1, b))
+        weights = sparse.csr_matrix((data.astype(np.float32), counts.indices, counts.indptr), shape=counts.shape)
+        self.weights = weights.T.tocsr()
+
+    @classmethod
+    def from_corpus(cls, corpus, tokenizer=None, **params):
+        """Build from a list of token lists (or texts plus `tokenizer`), like BM25Okapi(corpus)."""
+        vocabulary = {}
+        columns, counts, indptr = array('q'), array('q'), array('q', [0])
+        for document in corpus:
+            frequencies = Counter(tokenizer(document) if tokenizer else document)
+            columns.extend(vocabulary.setdefault(term, len(vocabulary)) for term in frequencies)
+            counts.extend(frequencies.values())
+            indptr.append(len(columns))
+        matrix = sparse.csr_matrix(
+            (np.frombuffer(counts, dtype=np.int64), np.frombuffer(columns, dtype=np.int64),
+             np.frombuffer(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(vocabulary))
+        )
+        return cls(matrix, vocabulary, **params)
+
+    def query_vector(self, query):
+        """Sparse 1 x terms vector of query-term counts; terms outside the vocabulary are dropped."""
+        counts = Counter(self.vocabulary[term] for term in query if term in self.vocabulary)
+        columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        return sparse.csr_matrix((values, columns, [0, len(columns)]), shape=(1, len(self.vocabulary)))
+
+    def _matches(self, query):
+        """(document indices, scores) of every document sharing a term with `query`."""
+        result = (self.query_vector(query) @ self.weights).tocsr()
+        return result.indices, result.data
+
+    def get_scores(self, query):
+        """BM25 score of every document for a tokenized query (BM25Okapi.get_scores)."""
+        scores = np.zeros(self.corpus_size, dtype=np.float64)
+        indices, values = self._matches(query)
+        scores[indices] = values
+        return scores
+
+    def top_k(self, query, k=10):
+        """
+        Best `k` matching documents, highest score first (ties by document index).
+
+        Returns:
+            tuple: (document indices, scores) arrays; documents without any query term are never returned
+        """
+        indices, values = self._matches(query)
+        if len(indices) > k:
+            keep = np.argpartition(-values, k - 1)[:k]
+            indices, values = indices[keep], values[keep]
+        order = np.lexsort((indices, -values))
+        return indices[order], values[order]
+
+    def get_top_n(self, query, documents, n=5):
+        """`documents` (aligned with the corpus) of the top `n` matches (BM25Okapi.get_top_n)."""
+        indices, _ = self.top_k(query, n)
+        return [documents[i] for i in indices]
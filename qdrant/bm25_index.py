@@ -0,0 +1,605 @@
+#!/usr/bin/env python3
+"""
+Persistent BM25 inverted index over the whole JIRA corpus.
+
+BM25Agent used to build an in-memory BM25Retriever from the 100 hits of one
+vector search, so keyword search only ever saw a small sample of the tickets
+and was rebuilt on every start. This index is built once from the CSV export
+(or by scrolling a whole-ticket Qdrant collection), stored as flat NumPy
+arrays that are memory-mapped on load, and updated incrementally.
+
+Layout of an index directory (default `.<collection>.bm25/` next to this file):
+
+    manifest.json             segments (with their current deleted-flags file), BM25
+                              parameters, `updated` high-water mark
+    seg-00000/
+        terms.bin             sorted vocabulary, UTF-8, concatenated
+        term_offsets.npy      int64 [terms + 1]: byte range of each term in terms.bin
+        postings_offsets.npy  int64 [terms + 1]: postings range of each term
+        postings_docs.npy     int32: document numbers, ascending within a term
+        postings_tfs.npy      uint16: term frequency of each posting
+        doc_lengths.npy       int32 [docs]: tokens per document
+        ticket_ids.npy        int64 [docs]: JIRA id of each document
+        docs.jsonl            stored fields of each document (DOC_FIELDS)
+        doc_offsets.npy       int64 [docs + 1]: byte range of each document in docs.jsonl
+        deleted.npy           bool [docs]: superseded or removed documents (as built)
+        deleted-<gen>.npy     the same flags as of update generation <gen>
+
+Committed files are never rewritten: an update writes the changed tickets to
+a new segment and the new deleted flags of older segments to new
+`deleted-<gen>.npy` files, then commits both with a single atomic replace of
+manifest.json. A crash before that leaves the previous index as it was. Once
+there are more than BM25_MAX_SEGMENTS segments they are merged into one.
+
+Scoring goes through bm25_engine.BM25Engine (the same Okapi IDF, epsilon
+floor and CSR weights as the sample fallback): on the first search the live
+documents of all segments are gathered into one engine, which is rebuilt
+after an update. Statistics are therefore corpus-wide over live documents,
+and an updated index ranks exactly like a fresh build of the same tickets.
+"""
+
+import argparse
+import copy
+import json
+import mmap
+import os
+import re
+import shutil
+from array import array
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+from scipy import sparse
+
+from bm25_engine import B, EPSILON, K1, BM25Engine
+
+BM25_INDEX_DIR = os.environ.get('BM25_INDEX_DIR', os.path.dirname(os.path.abspath(__file__)))
+BM25_MAX_SEGMENTS = int(os.environ.get('BM25_MAX_SEGMENTS', 8))
+CSV_CHUNK_ROWS = int(os.environ.get('CSV_CHUNK_ROWS', 1000))
+
+# Stored with every document and returned with its hits
+DOC_FIELDS = ('id', 'key', 'title', 'description', 'project', 'priority', 'status', 'type',
+              'created', 'resolved', 'updated')
+TOKEN_PATTERN = re.compile(r"\w+")
+MAX_TF = np.iinfo(np.uint16).max
+
+
+def tokenize(text):
+    """Lower-cased word tokens; JIRA keys split into project and number ('HBASE-123' -> hbase, 123)."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def index_text(doc):
+    """Text indexed for one stored document: key, title and description (or content if there is none)."""
+    body = doc.get('description') or doc.get('content') or ''
+    return f"{doc.get('key') or ''} {doc.get('title') or ''} {body}"
+
+
+def stored_doc(ticket_id, payload):
+    """Stored fields for one ticket from an upload payload."""
+    doc = {field: payload.get(field) for field in DOC_FIELDS}
+    doc['id'] = ticket_id
+    if not doc['description'] and payload.get('content'):
+        # Semantic/combined payloads carry the formatted content instead of the description
+        doc['content'] = payload['content']
+    return doc
+
+
+def index_path(collection_name):
+    return os.path.join(BM25_INDEX_DIR, f".{collection_name}.bm25")
+
+
+def _map(path):
+    """Read-only memory map of a file (None if it is empty)."""
+    if not os.path.getsize(path):
+        return None
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _save(path, array_):
+    """np.save via a temporary file so readers never see a half-written array."""
+    tmp_path = path + '.tmp.npy'
+    np.save(tmp_path, array_)
+    os.replace(tmp_path, path)
+
+
+def write_segment(path, docs):
+    """
+    Write one immutable segment for `docs` (dicts from `stored_doc`).
+
+    Postings are collected as flat (term, document, tf) integer arrays and
+    sorted by term once at the end, so building needs a few bytes per posting
+    rather than a Python object per posting.
+
+    Returns:
+        dict: Manifest entry {'name', 'docs', 'max_updated'}
+    """
+    os.makedirs(path)
+    vocabulary = {}
+    terms, doc_numbers, tfs = array('i'), array('i'), array('q')
+    doc_lengths, ticket_ids, doc_offsets = array('i'), array('q'), array('q', [0])
+    max_updated = None
+
+    with open(os.path.join(path, 'docs.jsonl'), 'wb') as f:
+        for number, doc in enumerate(docs):
+            counts = Counter(tokenize(index_text(doc)))
+            terms.extend(vocabulary.setdefault(term, len(vocabulary)) for term in counts)
+            tfs.extend(counts.values())
+            doc_numbers.extend([number] * len(counts))
+            doc_lengths.append(sum(counts.values()))
+            ticket_ids.append(doc['id'])
+            line = (json.dumps(doc, default=str) + "\n").encode('utf-8')
+            f.write(line)
+            doc_offsets.append(doc_offsets[-1] + len(line))
+            updated = doc.get('updated')
+            if isinstance(updated, int) and (max_updated is None or updated > max_updated):
+                max_updated = updated
+
+    # Renumber terms alphabetically so lookups can binary-search terms.bin
+    sorted_terms = sorted(vocabulary)
+    rank = np.empty(len(sorted_terms), dtype=np.int32)
+    rank[np.fromiter((vocabulary[term] for term in sorted_terms), dtype=np.int64, count=len(sorted_terms))] = \
+        np.arange(len(sorted_terms), dtype=np.int32)
+    term_numbers = rank[np.frombuffer(terms, dtype=np.int32)] if terms else np.zeros(0, dtype=np.int32)
+    # Stable sort keeps document numbers ascending within each term
+    order = np.argsort(term_numbers, kind='stable')
+    postings_offsets = np.zeros(len(sorted_terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_numbers, minlength=len(sorted_terms)), out=postings_offsets[1:])
+
+    encoded = [term.encode('utf-8') for term in sorted_terms]
+    with open(os.path.join(path, 'terms.bin'), 'wb') as f:
+        f.write(b"".join(encoded))
+    term_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(term) for term in encoded], out=term_offsets[1:])
+
+    np.save(os.path.join(path, 'term_offsets.npy'), term_offsets)
+    np.save(os.path.join(path, 'postings_offsets.npy'), postings_offsets)
+    np.save(os.path.join(path, 'postings_docs.npy'), np.frombuffer(doc_numbers, dtype=np.int32)[order])
+    np.save(os.path.join(path, 'postings_tfs.npy'),
+            np.minimum(np.frombuffer(tfs, dtype=np.int64)[order], MAX_TF).astype(np.uint16))
+    np.save(os.path.join(path, 'doc_lengths.npy'), np.frombuffer(doc_lengths, dtype=np.int32))
+    np.save(os.path.join(path, 'ticket_ids.npy'), np.frombuffer(ticket_ids, dtype=np.int64))
+    np.save(os.path.join(path, 'doc_offsets.npy'), np.frombuffer(doc_offsets, dtype=np.int64))
+    np.save(os.path.join(path, 'deleted.npy'), np.zeros(len(doc_lengths), dtype=bool))
+    return {'name': os.path.basename(path), 'docs': len(doc_lengths), 'max_updated': max_updated}
+
+
+class Segment:
+    """Read-only view of one segment; only `deleted` is held in memory (it changes on update)."""
+
+    def __init__(self, path, deleted_file='deleted.npy'):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.deleted_file = deleted_file
+
+        def load(name):
+            return np.load(os.path.join(path, name), mmap_mode='r')
+
+        self.term_offsets = load('term_offsets.npy')
+        self.postings_offsets = load('postings_offsets.npy')
+        self.postings_docs = load('postings_docs.npy')
+        self.postings_tfs = load('postings_tfs.npy')
+        self.doc_lengths = load('doc_lengths.npy')
+        self.ticket_ids = load('ticket_ids.npy')
+        self.doc_offsets = load('doc_offsets.npy')
+        self.deleted = np.load(os.path.join(path, deleted_file))
+        self._terms = _map(os.path.join(path, 'terms.bin'))
+        self._docs = _map(os.path.join(path, 'docs.jsonl'))
+        self.term_count = len(self.term_offsets) - 1
+        self.doc_count = len(self.doc_lengths)
+
+    def _term(self, number):
+        return self._terms[self.term_offsets[number]:self.term_offsets[number + 1]]
+
+    def terms(self):
+        """The segment's vocabulary, in term-number order."""
+        data = self._terms[:] if self._terms is not None else b''
+        offsets = self.term_offsets.tolist()
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def postings(self, term):
+        """(document numbers, term frequencies) of `term`, or None if the segment doesn't contain it."""
+        if not self.term_count:
+            return None
+        key = term.encode('utf-8')
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.term_count or self._term(lo) != key:
+            return None
+        start, end = self.postings_offsets[lo], self.postings_offsets[lo + 1]
+        return self.postings_docs[start:end], self.postings_tfs[start:end]
+
+    def doc(self, number):
+        return json.loads(self._docs[self.doc_offsets[number]:self.doc_offsets[number + 1]])
+
+    def live_docs(self):
+        for number in np.flatnonzero(~self.deleted):
+            yield self.doc(number)
+
+
+class BM25Index:
+    """
+    Segmented on-disk BM25 index; see module docstring.
+
+        index = BM25Index.build(index_path('cuttlefish3'), iter_csv_docs('export.csv'))
+        index = BM25Index.load(index_path('cuttlefish3'))
+        index.search("xerces memory leak", k=10)
+    """
+
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+        self.k1 = manifest['k1']
+        self.b = manifest['b']
+        self.epsilon = manifest.get('epsilon', EPSILON)
+        self._engine = None
+        self.segments = [Segment(os.path.join(path, entry['name']), entry.get('deleted', 'deleted.npy'))
+                         for entry in manifest['segments']]
+        self._refresh_stats()
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, 'manifest.json'))
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            return cls(path, json.load(f))
+
+    @classmethod
+    def build(cls, path, docs, k1=K1, b=B, epsilon=EPSILON):
+        """Build a fresh single-segment index at `path` from `docs`, replacing any existing one."""
+        building = path + '.building'
+        shutil.rmtree(building, ignore_errors=True)
+        os.makedirs(building)
+        entry = write_segment(os.path.join(building, 'seg-00000'), docs)
+        manifest = {
+            'version': 1, 'k1': k1, 'b': b, 'epsilon': epsilon, 'next_segment': 1, 'segments': [entry],
+            'high_water_mark': entry['max_updated'], 'built_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat()
+        }
+        with open(os.path.join(building, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        # Swap directories so a failed build leaves the previous index in place
+        if os.path.exists(path):
+            retired = path + '.old'
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(path, retired)
+            os.replace(building, path)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.replace(building, path)
+        return cls.load(path)
+
+    def _refresh_stats(self):
+        live = [~segment.deleted for segment in self.segments]
+        self.doc_count = int(sum(mask.sum() for mask in live))
+        total_length = sum(int(segment.doc_lengths[mask].sum()) for segment, mask in zip(self.segments, live))
+        self.avgdl = total_length / self.doc_count if self.doc_count else 0.0
+        # Statistics changed: the next search rebuilds the engine
+        self._engine = None
+
+    def _build_engine(self):
+        """
+        BM25Engine over the live documents of all segments.
+
+        Returns:
+            tuple: (engine, locations) where row r of the engine is document
+            locations[r] = (segment position, document number)
+        """
+        vocabulary = {}
+        rows, columns, counts, locations = [], [], [], []
+        doc_count = 0
+        for position, segment in enumerate(self.segments):
+            live = np.flatnonzero(~segment.deleted)
+            row_of = np.full(segment.doc_count, -1, dtype=np.int64)
+            row_of[live] = np.arange(doc_count, doc_count + len(live))
+            doc_count += len(live)
+            locations.append(np.column_stack((np.full(len(live), position, dtype=np.int64), live)))
+
+            column_of = np.fromiter((vocabulary.setdefault(term, len(vocabulary)) for term in segment.terms()),
+                                    dtype=np.int64, count=segment.term_count)
+            term_numbers = np.repeat(np.arange(segment.term_count), np.diff(segment.postings_offsets))
+            posting_rows = row_of[segment.postings_docs]
+            keep = posting_rows >= 0
+            rows.append(posting_rows[keep])
+            columns.append(column_of[term_numbers[keep]])
+            counts.append(np.asarray(segment.postings_tfs)[keep])
+
+        rows, columns, counts = (np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+                                 for parts in (rows, columns, counts))
+        # Terms that only occur in deleted documents must not count towards the mean IDF
+        present = np.bincount(columns, minlength=len(vocabulary)) > 0
+        renumbered = np.cumsum(present) - 1
+        vocabulary = {term: int(renumbered[column]) for term, column in vocabulary.items() if present[column]}
+        matrix = sparse.csr_matrix((counts.astype(np.int64), (rows, renumbered[columns])),
+                                   shape=(doc_count, len(vocabulary)))
+        engine = BM25Engine(matrix, vocabulary, k1=self.k1, b=self.b, epsilon=self.epsilon)
+        return engine, (np.concatenate(locations) if locations else np.zeros((0, 2), dtype=np.int64))
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = self._build_engine()
+        return self._engine[0]
+
+    def __len__(self):
+        return self.doc_count
+
+    @property
+    def high_water_mark(self):
+        """Latest `updated` (epoch seconds) of any indexed ticket, or None."""
+        return self.manifest.get('high_water_mark')
+
+    def ticket_ids(self):
+        """JIRA ids of all live documents."""
+        ids = set()
+        for segment in self.segments:
+            ids.update(segment.ticket_ids[~segment.deleted].tolist())
+        return ids
+
+    def search(self, query, k=10):
+        """
+        Top-`k` documents for `query` by BM25 over the whole index.
+
+        Returns:
+            list: {'id', 'score', 'doc'} dicts, best first; `doc` holds the stored fields
+        """
+        tokens = tokenize(query)
+        if not tokens or not self.doc_count:
+            return []
+        indices, scores = self.engine.top_k(tokens, k)
+        locations = self._engine[1]
+        hits = []
+        for row, score in zip(indices.tolist(), scores.tolist()):
+            position, number = locations[row]
+            segment = self.segments[position]
+            hits.append({'id': int(segment.ticket_ids[number]), 'score': score, 'doc': segment.doc(number)})
+        return hits
+
+    def _write_manifest(self, manifest):
+        """Commit `manifest` with one atomic replace of manifest.json, then make it the current one."""
+        updated = [entry['max_updated'] for entry in manifest['segments'] if entry['max_updated'] is not None]
+        manifest['high_water_mark'] = max(updated) if updated else None
+        manifest['updated_at'] = datetime.now().isoformat()
+        path = os.path.join(self.path, 'manifest.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+        self.manifest = manifest
+
+    def _new_segment_path(self, manifest):
+        name = f"seg-{manifest['next_segment']:05d}"
+        manifest['next_segment'] += 1
+        path = os.path.join(self.path, name)
+        # Left behind by an update that crashed before committing its manifest
+        shutil.rmtree(path, ignore_errors=True)
+        return path
+
+    def update(self, docs, removed_ids=()):
+        """
+        Add or replace `docs` and drop `removed_ids`.
+
+        Changed tickets are written to a new segment and the flags of their
+        previous documents to new deleted-<gen>.npy files; nothing the current
+        manifest refers to is touched until the new manifest, which points at
+        both, is swapped in.
+
+        Returns:
+            tuple: (documents added, documents deleted)
+        """
+        docs = list(docs)
+        superseded = {doc['id'] for doc in docs} | set(removed_ids)
+        manifest = copy.deepcopy(self.manifest)
+        manifest['generation'] = manifest.get('generation', 0) + 1
+        entry = None
+        if docs:
+            entry = write_segment(self._new_segment_path(manifest), docs)
+
+        deleted = 0
+        flags = {}
+        if superseded:
+            ids = np.fromiter(superseded, dtype=np.int64, count=len(superseded))
+            for segment, segment_entry in zip(self.segments, manifest['segments']):
+                hits = np.isin(segment.ticket_ids, ids) & ~segment.deleted
+                if hits.any():
+                    segment_entry['deleted'] = f"deleted-{manifest['generation']:05d}.npy"
+                    flags[segment.name] = (segment.deleted | hits, segment_entry['deleted'])
+                    _save(os.path.join(segment.path, segment_entry['deleted']), flags[segment.name][0])
+                    deleted += int(hits.sum())
+
+        if entry is not None:
+            manifest['segments'].append(entry)
+        self._write_manifest(manifest)
+
+        # Committed: switch the loaded segments over and drop the flags files nothing refers to any more
+        for segment in self.segments:
+            if segment.name in flags:
+                retired = os.path.join(segment.path, segment.deleted_file)
+                segment.deleted, segment.deleted_file = flags[segment.name]
+                if os.path.exists(retired):
+                    os.remove(retired)
+        if entry is not None:
+            self.segments.append(Segment(os.path.join(self.path, entry['name'])))
+        self._refresh_stats()
+        if len(self.segments) > BM25_MAX_SEGMENTS:
+            self.compact()
+        return len(docs), deleted
+
+    def compact(self):
+        """Merge all segments into one, dropping deleted documents."""
+        retired = list(self.segments)
+        manifest = copy.deepcopy(self.manifest)
+        docs = (doc for segment in retired for doc in segment.live_docs())
+        entry = write_segment(self._new_segment_path(manifest), docs)
+        manifest['segments'] = [entry]
+        self._write_manifest(manifest)
+        self.segments = [Segment(os.path.join(self.path, entry['name']))]
+        for segment in retired:
+            shutil.rmtree(segment.path, ignore_errors=True)
+        self._refresh_stats()
+        print(f"🗜️  Merged {len(retired)} BM25 segments into {entry['name']} ({entry['docs']} documents)")
+
+    def summary(self):
+        size = sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(self.path) for name in names)
+        terms = sum(segment.term_count for segment in self.segments)
+        return (f"{self.doc_count:,} documents, {terms:,} terms in {len(self.segments)} segment(s), "
+                f"{size / 1e6:.1f} MB at {self.path}")
+
+
+def iter_csv_docs(csv_path, tracker=None, chunk_rows=CSV_CHUNK_ROWS):
+    """Stored documents for every row of the CSV export (only changed rows if `tracker` is given)."""
+    from csv_stream import iter_csv_frames
+    from payload_builder import build_batch
+
+    for frame in iter_csv_frames(csv_path, chunk_rows):
+        if tracker is not None:
+            frame = tracker.filter_frame(frame)
+            if frame.empty:
+                continue
+        point_ids, _, payloads = build_batch(frame)
+        for point_id, payload in zip(point_ids, payloads):
+            yield stored_doc(point_id, payload)
+
+
+def iter_qdrant_docs(client, collection_name, page_size=1000):
+    """
+    Stored documents for every ticket in a whole-ticket collection.
+
+    Token windows (`parent_id`) are collapsed into their ticket. Semantic chunk
+    collections only hold pieces of each ticket; build those from the CSV.
+    """
+    from delta_sync import normalize_id
+
+    seen = set()
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        for record in records:
+            payload = record.payload or {}
+            if 'chunk_index' in payload:
+                raise ValueError(f"Collection '{collection_name}' holds semantic chunks, not whole tickets; "
+                                 f"build the BM25 index from the CSV export instead")
+            ticket_id = normalize_id(payload.get('parent_id', payload.get('id', record.id)))
+            if not isinstance(ticket_id, int) or ticket_id in seen:
+                continue
+            seen.add(ticket_id)
+            yield stored_doc(ticket_id, payload)
+        if offset is None:
+            return
+
+
+def main(csv_path=None, collection_name=None, path=None, from_qdrant=False, incremental=False):
+    """
+    Build or incrementally update the BM25 index.
+
+    Args:
+        csv_path (str, optional): JIRA CSV export to index
+        collection_name (str): Collection the index belongs to (names the default index path)
+        path (str, optional): Index directory (default: index_path(collection_name))
+        from_qdrant (bool): Scroll `collection_name` instead of reading a CSV
+        incremental (bool): Only re-index tickets changed since the index's high-water mark
+    """
+    path = path or index_path(collection_name)
+    start = datetime.now()
+
+    if incremental:
+        from delta_sync import SyncState, DeltaTracker
+        from payload_schema import from_epoch
+
+        if not BM25Index.exists(path):
+            print(f"❌ No BM25 index at {path}; build one first")
+            return
+        if not csv_path:
+            print("❌ --incremental needs the CSV export (deletions are detected against it)")
+            return
+        index = BM25Index.load(path)
+        hwm = index.high_water_mark
+        state = SyncState(collection_name, high_water_mark=from_epoch(hwm) if hwm is not None else None,
+                          ids=index.ticket_ids())
+        tracker = DeltaTracker(state)
+        print(f"🔄 Incremental BM25 update from high-water mark {state.high_water_mark} "
+              f"({len(state.ids)} tickets indexed)")
+        changed = list(iter_csv_docs(csv_path, tracker))
+        added, deleted = index.update(changed, tracker.removed_ids())
+        print(f"✅ Indexed {added} new/modified tickets, retired {deleted} documents "
+              f"({len(tracker.removed_ids())} tickets no longer in the export)")
+    elif from_qdrant:
+        from dotenv import load_dotenv
+        from qdrant_client import QdrantClient
+
+        load_dotenv()
+        client = QdrantClient(url=os.environ.get('QDRANT_URL'), api_key=os.environ.get('QDRANT_API_KEY'))
+        print(f"📥 Building BM25 index from Qdrant collection '{collection_name}'...")
+        try:
+            index = BM25Index.build(path, iter_qdrant_docs(client, collection_name))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+    else:
+        if not csv_path:
+            print("❌ Pass the CSV export or --from-qdrant")
+            return
+        print(f"📥 Building BM25 index from {csv_path}...")
+        index = BM25Index.build(path, iter_csv_docs(csv_path))
+
+    print(f"📚 BM25 index: {index.summary()}")
+    print(f"⏱️  {(datetime.now() - start).total_seconds():.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build or update the persistent full-corpus BM25 index used by BM25Agent.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Full build from the CSV export
+  python bm25_index.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv
+
+  # Apply new, modified and deleted tickets since the last build
+  python bm25_index.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --incremental
+
+  # Build from a whole-ticket Qdrant collection instead
+  python bm25_index.py --from-qdrant
+
+  # Try a query against the index
+  python bm25_index.py --query "xerces memory leak"
+
+Environment Variables:
+  QDRANT_COLLECTION - Collection the index belongs to (default: cuttlefish3)
+  BM25_INDEX_DIR - Directory for .<collection>.bm25 (default: this directory)
+  BM25_MAX_SEGMENTS - Segments kept before an update merges them (default: 8)
+  QDRANT_URL, QDRANT_API_KEY - For --from-qdrant
+        """
+    )
+    parser.add_argument('csv_path', nargs='?', help='Path to the JIRA CSV export')
+    parser.add_argument('--collection', default=os.environ.get('QDRANT_COLLECTION', 'cuttlefish3'),
+                       help='Collection name (default: QDRANT_COLLECTION or cuttlefish3)')
+    parser.add_argument('--index', help='Index directory (default: BM25_INDEX_DIR/.<collection>.bm25)')
+    parser.add_argument('--from-qdrant', action='store_true', help='Scroll the collection instead of reading a CSV')
+    parser.add_argument('--incremental', action='store_true', help='Only re-index changed and removed tickets')
+    parser.add_argument('--query', help='Search the existing index and print the top hits')
+    parser.add_argument('-k', type=int, default=10, help='Hits to print for --query (default: 10)')
+
+    args = parser.parse_args()
+    if args.query:
+        index = BM25Index.load(args.index or index_path(args.collection))
+        for hit in index.search(args.query, args.k):
+            print(f"{hit['score']:8.3f}  {hit['doc'].get('key')}  {hit['doc'].get('title')}")
+    else:
+        main(args.csv_path, args.collection, args.index, args.from_qdrant, args.incremental)
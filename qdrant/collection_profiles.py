@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Named collection profiles: quantization, on-disk storage and HNSW settings.
+
+    default     float32 vectors in RAM, Qdrant's default HNSW (previous behaviour)
+    fast        int8 scalar quantization in RAM, originals in RAM, denser graph
+    balanced    int8 scalar quantization in RAM, originals on disk
+    low-memory  binary quantization in RAM, originals and HNSW graph on disk
+
+Quantized profiles search the compressed vectors first and rescore an
+oversampled candidate set with the original vectors, so recall stays close to
+float32 while most of the RAM goes away. A collection records the profile it
+was built with, and `collection_search_params(client, name)` returns the
+matching query settings (hnsw_ef, rescoring, oversampling) for the search
+calls; test/benchmark_collection_profiles.py measures recall@k and latency for
+each profile.
+"""
+
+import os
+import uuid
+from datetime import datetime, timezone
+
+from qdrant_client import models
+
+COLLECTION_PROFILE = os.environ.get('COLLECTION_PROFILE', 'default')
+
+PROFILES = {
+    'default': {
+        'on_disk': False,
+        'hnsw': None,
+        'quantization': None,
+        'hnsw_ef': None,
+        'oversampling': None,
+    },
+    'fast': {
+        'on_disk': False,
+        'hnsw': models.HnswConfigDiff(m=32, ef_construct=256),
+        'quantization': models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8, quantile=0.99, always_ram=True)),
+        'hnsw_ef': 128,
+        'oversampling': 1.5,
+    },
+    'balanced': {
+        'on_disk': True,
+        'hnsw': models.HnswConfigDiff(m=16, ef_construct=128),
+        'quantization': models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8, quantile=0.99, always_ram=True)),
+        'hnsw_ef': 96,
+        'oversampling': 2.0,
+    },
+    'low-memory': {
+        'on_disk': True,
+        'hnsw': models.HnswConfigDiff(m=8, ef_construct=64, on_disk=True),
+        # 1 bit per dimension; works well for 1536-d OpenAI embeddings when rescored
+        'quantization': models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True)),
+        'hnsw_ef': 64,
+        'oversampling': 3.0,
+    },
+}
+
+
+def get_profile(name):
+    if name not in PROFILES:
+        raise ValueError(f"Unknown collection profile '{name}' (choose from: {', '.join(PROFILES)})")
+    return PROFILES[name]
+
+
+def create_collection(client, collection_name, vector_size, profile=COLLECTION_PROFILE, named_vectors=None,
+                      sparse_vectors=None):
+    """
+    (Re)create `collection_name` for `vector_size`-d cosine vectors using `profile`.
+
+    `named_vectors` maps vector names to a MultiVectorConfig (or None for a
+    dense vector) to create named vectors instead of a single unnamed one;
+    see combined_collection. `sparse_vectors` maps sparse vector names to
+    SparseVectorParams (see sparse_vectors).
+    """
+    settings = get_profile(profile)
+    print(f"Creating collection with vector dimension: {vector_size} (profile: {profile})")
+
+    def params(multivector_config=None):
+        return models.VectorParams(
+            size=vector_size,
+            distance=models.Distance.COSINE,
+            on_disk=settings['on_disk'] or None,
+            multivector_config=multivector_config
+        )
+
+    client.recreate_collection(
+        collection_name=collection_name,
+        vectors_config={name: params(config) for name, config in named_vectors.items()} if named_vectors else params(),
+        sparse_vectors_config=sparse_vectors,
+        hnsw_config=settings['hnsw'],
+        quantization_config=settings['quantization']
+    )
+    # Lets readers query with the matching search params (see collection_search_params)
+    try:
+        client.update_collection(collection_name, metadata={'profile': profile})
+    except Exception as e:
+        print(f"Could not record profile on '{collection_name}': {e}")
+
+
+def open_collection(client, collection_name, vector_size, profile=COLLECTION_PROFILE, recreate=True,
+                    named_vectors=None, sparse_vectors=None):
+    """
+    Recreate `collection_name`, or with `recreate=False` reuse it if it exists.
+
+    A reused collection must already hold `vector_size`-d vectors with the
+    same vector names (ValueError otherwise) and keeps whatever sparse vectors
+    it was created with; a missing one is created with `profile`.
+    """
+    if not recreate and client.collection_exists(collection_name):
+        ensure_vector_size(client, collection_name, vector_size)
+        vectors = client.get_collection(collection_name).config.params.vectors
+        names = set(vectors) if isinstance(vectors, dict) else set()
+        if names != set(named_vectors or ()):
+            raise ValueError(
+                f"Collection '{collection_name}' has vectors {sorted(names) or ['(unnamed)']} but this upload "
+                f"writes {sorted(named_vectors or ()) or ['(unnamed)']}; use another collection or rebuild it"
+            )
+        return False
+    create_collection(client, collection_name, vector_size, profile, named_vectors, sparse_vectors)
+    return True
+
+
+def collection_vector_size(client, collection_name):
+    """Vector size the collection was created with (first vector if it has several)."""
+    vectors = client.get_collection(collection_name).config.params.vectors
+    if isinstance(vectors, dict):
+        vectors = next(iter(vectors.values()))
+    return vectors.size
+
+
+def ensure_vector_size(client, collection_name, vector_size):
+    """Raise ValueError if `collection_name` was built for a different embedding dimension."""
+    actual = collection_vector_size(client, collection_name)
+    if actual != vector_size:
+        raise ValueError(
+            f"Collection '{collection_name}' stores {actual}-d vectors but the embedding model returns "
+            f"{vector_size}-d vectors; set OPENAI_EMBED_DIMENSIONS={actual} or rebuild the collection"
+        )
+
+
+def mark_indexed(client, collection_name):
+    """
+    Stamp a new `index_version` into the collection metadata after an upload.
+
+    Readers that cache results (the notebook's semantic answer cache) compare
+    it with `index_version` to drop entries from before the re-index. Servers
+    without collection metadata just skip the stamp.
+    """
+    version = uuid.uuid4().hex
+    try:
+        client.update_collection(collection_name, metadata={
+            'index_version': version,
+            'indexed_at': datetime.now(timezone.utc).isoformat(),
+        })
+    except Exception as e:
+        print(f"Could not stamp index version on '{collection_name}': {e}")
+        return None
+    return version
+
+
+def index_version(client, collection_name):
+    """Changes whenever the collection is re-indexed: the mark_indexed stamp plus the point count."""
+    info = client.get_collection(collection_name)
+    stamp = (getattr(info.config, 'metadata', None) or {}).get('index_version', 'unstamped')
+    return f"{stamp}:{info.points_count}"
+
+
+def search_params(profile=COLLECTION_PROFILE, exact=False):
+    """
+    SearchParams matching a profile.
+
+    With `exact=True` the quantized index is bypassed, giving the ground truth
+    that recall is measured against.
+    """
+    settings = get_profile(profile)
+    if exact:
+        return models.SearchParams(exact=True, quantization=models.QuantizationSearchParams(ignore=True))
+    quantization = None
+    if settings['quantization'] is not None:
+        quantization = models.QuantizationSearchParams(rescore=True, oversampling=settings['oversampling'])
+    return models.SearchParams(hnsw_ef=settings['hnsw_ef'], quantization=quantization)
+
+
+def collection_profile(client, collection_name):
+    """
+    Profile `collection_name` was built with.
+
+    Read from the collection metadata written by create_collection; for
+    collections built before that (or on servers without metadata) it is the
+    profile whose quantization and HNSW settings match, else COLLECTION_PROFILE.
+    """
+    config = client.get_collection(collection_name).config
+    profile = (getattr(config, 'metadata', None) or {}).get('profile')
+    if profile in PROFILES:
+        return profile
+    quantization = config.quantization_config
+    m = config.hnsw_config.m if config.hnsw_config else None
+    for name, settings in PROFILES.items():
+        if type(settings['quantization']) is type(quantization) and (settings['hnsw'] is None or settings['hnsw'].m == m):
+            return name
+    return COLLECTION_PROFILE
+
+
+def collection_search_params(client, collection_name):
+    """SearchParams for querying `collection_name` with the profile it was built with."""
+    return search_params(collection_profile(client, collection_name))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Single-collection layout holding whole-ticket and semantic-chunk vectors.
+
+Instead of one collection per chunking strategy, every ticket becomes one
+point with two named vectors:
+
+    ticket  dense embedding of the whole ticket text (as upload_jira_csv_to_qdrant.py)
+    chunks  multivector of the ticket's semantic-chunk embeddings, compared with
+            MAX_SIM, so a query scores a ticket by its best-matching chunk
+
+The payload is stored once per ticket rather than once per chunk and once
+more in a second collection. `search_combined` queries both vectors in one
+`query_points` round trip (two prefetches fused with reciprocal rank fusion)
+and, since there is one point per ticket, returns deduplicated tickets. With
+the query text it adds the sparse lexical vector as a third prefetch
+(see sparse_vectors).
+"""
+
+import uuid
+
+from qdrant_client import models
+
+from sparse_vectors import sparse_prefetch
+
+TICKET_VECTOR = 'ticket'
+CHUNKS_VECTOR = 'chunks'
+
+# Vector name -> multivector config (None for a plain dense vector)
+COMBINED_VECTORS = {
+    TICKET_VECTOR: None,
+    CHUNKS_VECTOR: models.MultiVectorConfig(comparator=models.MultiVectorComparator.MAX_SIM),
+}
+
+TICKET_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'cuttlefish3/ticket')
+
+
+def is_combined(client, collection_name):
+    """True if `collection_name` was built with the combined (ticket + chunks) layout."""
+    vectors = client.get_collection(collection_name).config.params.vectors
+    return isinstance(vectors, dict) and set(COMBINED_VECTORS) <= set(vectors)
+
+
+def ticket_point_id(ticket_id):
+    """Point id for a ticket: the JIRA id itself when numeric, a stable UUID otherwise."""
+    if ticket_id is None:
+        raise ValueError("ticket_point_id needs a ticket id")
+    if isinstance(ticket_id, int):
+        return ticket_id
+    return str(uuid.uuid5(TICKET_NAMESPACE, str(ticket_id)))
+
+
+def combined_point(point_id, payload, ticket_vector, chunk_vectors):
+    """One point carrying both representations of a ticket."""
+    return {
+        "id": point_id,
+        "vector": {
+            TICKET_VECTOR: ticket_vector,
+            # A ticket that could not be chunked is its own single chunk
+            CHUNKS_VECTOR: chunk_vectors or [ticket_vector],
+        },
+        "payload": payload
+    }
+
+
+def search_combined(client, collection_name, query_vector, limit=10, query_filter=None, search_params=None,
+                    candidates=None, query_text=None):
+    """
+    Search both representations in one request and fuse them with RRF.
+
+    Args:
+        query_vector (list): Query embedding (same model/dimensions as the collection)
+        limit (int): Tickets to return
+        query_filter (models.Filter, optional): Applied to both prefetches
+        search_params (models.SearchParams, optional): e.g. collection_profiles.search_params(profile)
+        candidates (int, optional): Hits per prefetch before fusion (default: 2 * limit)
+        query_text (str, optional): Raw query; adds a sparse lexical prefetch (collection needs sparse vectors)
+
+    Returns:
+        list: ScoredPoint hits, one per ticket, best first
+    """
+    candidates = candidates or limit * 2
+    prefetch = [
+        models.Prefetch(query=query_vector, using=TICKET_VECTOR, filter=query_filter,
+                        params=search_params, limit=candidates),
+        # A multivector query with a single vector: MAX_SIM picks the ticket's best chunk
+        models.Prefetch(query=[query_vector], using=CHUNKS_VECTOR, filter=query_filter,
+                        params=search_params, limit=candidates),
+    ]
+    if query_text:
+        prefetch.append(sparse_prefetch(query_text, candidates, query_filter))
+    response = client.query_points(
+        collection_name=collection_name,
+        prefetch=prefetch,
+        query=models.FusionQuery(fusion=models.Fusion.RRF),
+        limit=limit,
+        with_payload=True
+    )
+    return response.points
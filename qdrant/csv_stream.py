@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Constant-memory CSV readers for the Qdrant upload scripts.
+
+Both readers stream the JIRA export in batches instead of loading it whole,
+so peak memory depends on the batch size rather than the corpus size.
+Rows before `start_line` are skipped by the parser without being turned into
+DataFrames or Documents.
+"""
+
+import csv
+from itertools import islice
+
+import pandas as pd
+
+# JIRA descriptions can be very large (stack traces, logs)
+CSV_FIELD_SIZE_LIMIT = 10000000
+
+
+def iter_csv_frames(csv_path, batch_size, start_line=0):
+    """
+    Yield DataFrames of at most `batch_size` rows, starting at data row `start_line`.
+
+    The index of every frame is the absolute row number in the file, matching
+    what `pd.read_csv(csv_path).iloc[start_line:]` would have produced.
+    """
+    skip = (lambda i: 0 < i <= start_line) if start_line > 0 else None
+    offset = start_line
+    for frame in pd.read_csv(csv_path, chunksize=batch_size, skiprows=skip):
+        frame.index = pd.RangeIndex(offset, offset + len(frame))
+        offset += len(frame)
+        yield frame
+
+
+def iter_csv_rows(csv_path, start_line=0):
+    """Yield (row_index, row_dict) pairs from data row `start_line` onwards."""
+    csv.field_size_limit(CSV_FIELD_SIZE_LIMIT)
+    with open(csv_path, 'r', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        # Parse past skipped rows without keeping them
+        for _ in islice(reader, start_line):
+            pass
+        for i, row in enumerate(reader, start=start_line):
+            yield i, row
+
+
+def batched(iterable, batch_size):
+    """Group any iterable into lists of at most `batch_size` items."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
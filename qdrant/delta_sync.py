@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Incremental delta-sync support for the Qdrant upload scripts.
+
+A small JSON state file per collection records the high-water mark of the
+ticket `updated` timestamp and the set of JIRA ids currently indexed. An
+`--incremental` run only re-embeds tickets whose `updated` is at or past the
+mark (or whose id is new), and deletes tickets that disappeared from the
+export, instead of recreating the whole collection.
+
+If no state file exists yet, it is bootstrapped once by scrolling the
+collection's `id` / `updated` payload fields.
+"""
+
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+from qdrant_client import models
+
+from payload_schema import from_epoch
+
+SYNC_STATE_DIR = os.environ.get('SYNC_STATE_DIR', os.path.dirname(os.path.abspath(__file__)))
+
+
+def normalize_id(value):
+    """JIRA ids arrive as ints, floats (pandas NaN columns) or strings (csv module)."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return str(value).strip() or None
+
+
+def parse_updated(value):
+    """Parse a JIRA `updated` value ('2014-01-06 00:00:00.000' or epoch seconds); None if missing or malformed."""
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return from_epoch(value)
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+class SyncState:
+    """High-water mark and indexed ticket ids for one collection."""
+
+    def __init__(self, collection_name, high_water_mark=None, ids=None, synced_at=None):
+        self.collection_name = collection_name
+        self.high_water_mark = high_water_mark
+        self.ids = set(ids or [])
+        self.synced_at = synced_at
+
+    @staticmethod
+    def path_for(collection_name):
+        return os.path.join(SYNC_STATE_DIR, f".{collection_name}.sync_state.json")
+
+    @classmethod
+    def load(cls, collection_name):
+        """Load saved state, or None if this collection has never been synced."""
+        path = cls.path_for(collection_name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        hwm = data.get('high_water_mark')
+        return cls(
+            collection_name,
+            high_water_mark=datetime.fromisoformat(hwm) if hwm else None,
+            ids=data.get('ids', []),
+            synced_at=data.get('synced_at')
+        )
+
+    @classmethod
+    def bootstrap(cls, client, collection_name, page_size=10000):
+        """Rebuild state from what is already in the collection (one full scroll)."""
+        print(f"No sync state for '{collection_name}', bootstrapping from collection payloads ...")
+        state = cls(collection_name)
+        offset = None
+        while True:
+            records, offset = client.scroll(
+                collection_name=collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=['id', 'updated'],
+                with_vectors=False
+            )
+            for record in records:
+                payload = record.payload or {}
+                ticket_id = normalize_id(payload.get('id'))
+                if ticket_id is not None:
+                    state.ids.add(ticket_id)
+                updated = parse_updated(payload.get('updated'))
+                if updated and (state.high_water_mark is None or updated > state.high_water_mark):
+                    state.high_water_mark = updated
+            if offset is None:
+                break
+        print(f"   Found {len(state.ids)} tickets, high-water mark {state.high_water_mark}")
+        return state
+
+    def save(self):
+        self.synced_at = datetime.now().isoformat()
+        path = self.path_for(self.collection_name)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'collection': self.collection_name,
+                'high_water_mark': self.high_water_mark.isoformat() if self.high_water_mark else None,
+                'ids': sorted(self.ids, key=str),
+                'synced_at': self.synced_at
+            }, f)
+        os.replace(tmp_path, path)
+
+
+class DeltaTracker:
+    """
+    Decide which exported tickets need (re-)indexing and which were removed.
+
+    Every ticket in the export passes through `is_changed` or `filter_frame`, so
+    the tracker also sees the full set of exported ids for delete detection.
+    In full (non-incremental) mode pass a fresh SyncState and everything is changed.
+    """
+
+    def __init__(self, state, incremental=True):
+        self.state = state
+        self.incremental = incremental
+        self.seen_ids = set()
+        self.changed_ids = set()
+        self.max_updated = state.high_water_mark
+
+    def _observe(self, ticket_id, updated):
+        if ticket_id is not None:
+            self.seen_ids.add(ticket_id)
+        if updated and (self.max_updated is None or updated > self.max_updated):
+            self.max_updated = updated
+
+    def _changed(self, ticket_id, updated):
+        if not self.incremental or self.state.high_water_mark is None:
+            return True
+        if ticket_id not in self.state.ids:
+            return True
+        # >= rather than >: tickets sharing the mark's timestamp may have arrived after the last run
+        return updated is not None and updated >= self.state.high_water_mark
+
+    def is_changed(self, ticket_id, updated):
+        """Record one exported ticket and return whether it must be (re-)indexed."""
+        ticket_id = normalize_id(ticket_id)
+        updated = parse_updated(updated)
+        self._observe(ticket_id, updated)
+        changed = self._changed(ticket_id, updated)
+        if changed and ticket_id is not None:
+            self.changed_ids.add(ticket_id)
+        return changed
+
+    def filter_frame(self, frame):
+        """Vectorized `is_changed` for a DataFrame batch; returns only the rows to index."""
+        ids = frame['id'].map(normalize_id)
+        updated = pd.to_datetime(frame['updated'], errors='coerce')
+        self.seen_ids.update(i for i in ids if i is not None)
+        if updated.notna().any():
+            frame_max = updated.max().to_pydatetime()
+            if self.max_updated is None or frame_max > self.max_updated:
+                self.max_updated = frame_max
+
+        if not self.incremental or self.state.high_water_mark is None:
+            mask = pd.Series(True, index=frame.index)
+        else:
+            is_new = ~ids.isin(self.state.ids)
+            mask = is_new | (updated >= pd.Timestamp(self.state.high_water_mark))
+        self.changed_ids.update(i for i in ids[mask] if i is not None)
+        return frame[mask]
+
+    def removed_ids(self):
+        """Ticket ids indexed previously but absent from this export."""
+        return self.state.ids - self.seen_ids
+
+    def commit(self):
+        """Persist the new high-water mark and id set after a successful run."""
+        self.state.high_water_mark = self.max_updated
+        self.state.ids = set(self.seen_ids)
+        self.state.save()
+
+
+def delete_windows(client, collection_name, ticket_ids):
+    """Delete the token-window points (`parent_id` payload) of `ticket_ids`."""
+    ticket_ids = [i for i in ticket_ids if isinstance(i, int)]
+    for start in range(0, len(ticket_ids), 1000):
+        client.delete(collection_name=collection_name, points_selector=models.FilterSelector(filter=models.Filter(must=[
+            models.FieldCondition(key='parent_id', match=models.MatchAny(any=ticket_ids[start:start + 1000]))
+        ])))
+
+
+def ticket_id_filter(ticket_ids, key='id'):
+    """
+    Match the `key` payload field against `ticket_ids`.
+
+    Current uploads store the normalized JIRA id (an int for numeric ids);
+    collections written by older semantic uploads hold the CSV string, so
+    both forms are matched.
+    """
+    ids = [i for i in (normalize_id(i) for i in ticket_ids) if i is not None]
+    numeric = [i for i in ids if isinstance(i, int)]
+    conditions = [models.FieldCondition(key=key, match=models.MatchAny(any=[str(i) for i in ids]))]
+    if numeric:
+        conditions.append(models.FieldCondition(key=key, match=models.MatchAny(any=numeric)))
+    return models.Filter(should=conditions)
+
+
+def delete_stale_chunks(client, collection_name, chunk_counts):
+    """
+    Delete semantic chunks beyond each ticket's current chunk count.
+
+    `chunk_counts` maps ticket id -> total_chunks of the fresh upload. Chunk
+    point ids are deterministic, so chunks below the count are overwritten in
+    place; only the tail left over from a longer previous version goes.
+    """
+    items = [(ticket_id, count) for ticket_id, count in chunk_counts.items() if normalize_id(ticket_id) is not None]
+    for start in range(0, len(items), 100):
+        client.delete(collection_name=collection_name, points_selector=models.FilterSelector(filter=models.Filter(
+            should=[models.Filter(must=[
+                ticket_id_filter([ticket_id]),
+                models.FieldCondition(key='chunk_index', range=models.Range(gte=count))
+            ]) for ticket_id, count in items[start:start + 100]]
+        )))
+
+
+def delete_tickets(client, collection_name, ticket_ids, by_payload=False):
+    """
+    Delete all points belonging to `ticket_ids`.
+
+    The whole-ticket uploader uses the JIRA id as point id, plus extra window
+    points for oversized tickets; the semantic uploader stores it in the `id`
+    payload field of every chunk (see `ticket_id_filter`).
+    """
+    ticket_ids = list(ticket_ids)
+    if not ticket_ids:
+        return
+    for start in range(0, len(ticket_ids), 1000):
+        chunk = ticket_ids[start:start + 1000]
+        if by_payload:
+            selector = models.FilterSelector(filter=ticket_id_filter(chunk))
+        else:
+            selector = models.PointIdsList(points=chunk)
+        client.delete(collection_name=collection_name, points_selector=selector)
+    if not by_payload:
+        delete_windows(client, collection_name, ticket_ids)
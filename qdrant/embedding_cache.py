@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Persistent content-hash embedding cache shared by the Qdrant upload scripts.
+
+Vectors are stored in a single SQLite file keyed by
+(model, dimensions, sha256(content)), packed as float16 (default) or float32
+blobs. When the stored vectors grow past EMBED_CACHE_MAX_MB the least
+recently used entries are evicted, so re-indexing and chunking experiments
+only pay the embedding API for text that is new or has changed.
+
+The stored size is kept in the database itself (a one-row `cache_size`
+table maintained by triggers), so sharded chunking workers writing the same
+file all enforce one limit.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+EMBED_CACHE_PATH = os.environ.get(
+    'EMBED_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.embedding_cache.sqlite')
+)
+EMBED_CACHE_DTYPE = os.environ.get('EMBED_CACHE_DTYPE', 'float16')
+EMBED_CACHE_MAX_MB = int(os.environ.get('EMBED_CACHE_MAX_MB', 2048))
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """Thread-safe on-disk LRU cache of embedding vectors."""
+
+    def __init__(self, model, dimensions=None, path=EMBED_CACHE_PATH,
+                 dtype=EMBED_CACHE_DTYPE, max_mb=EMBED_CACHE_MAX_MB):
+        if dtype not in ('float16', 'float32'):
+            raise ValueError(f"Unsupported cache dtype: {dtype}")
+        self.model = model
+        self.dimensions = dimensions
+        self.path = path
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        # Vector bytes served from the cache instead of requested from the API
+        self.bytes_saved = 0
+        self.evictions = 0
+
+        # Chunking worker processes share the file; give concurrent writers time to take the lock
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                dtype TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+            CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+            -- Caches written before the size table existed are measured once
+            INSERT OR IGNORE INTO cache_size SELECT 0, COALESCE(SUM(size), 0) FROM embeddings;
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_insert AFTER INSERT ON embeddings BEGIN
+                UPDATE cache_size SET bytes = bytes + NEW.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_update AFTER UPDATE OF size ON embeddings BEGIN
+                UPDATE cache_size SET bytes = bytes + NEW.size - OLD.size WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_size_delete AFTER DELETE ON embeddings BEGIN
+                UPDATE cache_size SET bytes = bytes - OLD.size WHERE id = 0;
+            END;
+            COMMIT;
+        """)
+
+    def _stored_bytes(self):
+        return self._conn.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+
+    @property
+    def total_bytes(self):
+        """Bytes of vectors stored in the cache file, across every process writing it."""
+        with self._lock:
+            return self._stored_bytes()
+
+    def _key(self, text):
+        return f"{self.model}|{self.dimensions or 'native'}|{content_hash(text)}"
+
+    def get_many(self, texts):
+        """Return a list of cached vectors (or None) aligned with `texts`."""
+        keys = [self._key(text) for text in texts]
+        found = {}
+        with self._lock:
+            # SQLite limits bound parameters per statement; look up in slices
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, dtype, blob in rows:
+                    found[key] = (np.frombuffer(blob, dtype=np.dtype(dtype).newbyteorder('<')).astype(np.float32)
+                                  .tolist(), len(blob))
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+
+            results = []
+            for key in keys:
+                vector, size = found.get(key, (None, 0))
+                if vector is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self.bytes_saved += size
+                results.append(vector)
+        return results
+
+    def put_many(self, texts, vectors):
+        """Store freshly computed vectors; None entries are ignored."""
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            if vector is None:
+                continue
+            blob = np.asarray(vector, dtype=self.dtype).tobytes()
+            rows.append((self._key(text), self.dtype.name, blob, len(blob), now))
+        if not rows:
+            return
+        with self._lock:
+            # Take the write lock before measuring, so two processes can't both evict for the same overflow
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete doesn't fire the size trigger
+                self._conn.executemany("""
+                    INSERT INTO embeddings VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET dtype = excluded.dtype, vector = excluded.vector,
+                                                   size = excluded.size, last_used = excluded.last_used
+                """, rows)
+                self._evict()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of its limit."""
+        total = self._stored_bytes()
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        while total > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_used LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            doomed = []
+            for key, size in rows:
+                doomed.append((key,))
+                total -= size
+                if total <= target:
+                    break
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+            self.evictions += len(doomed)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def summary(self):
+        """One-line end-of-run summary."""
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0.0
+        return (f"Embedding cache: {self.hits} hits / {self.misses} misses ({hit_rate:.1f}% hit rate), "
+                f"{self.bytes_saved / 1024 / 1024:.1f} MB of vectors served without an API call, "
+                f"{self.evictions} evicted, {self.total_bytes / 1024 / 1024:.1f} MB on disk [{self.dtype.name}]")
+
+
+class CachedEmbeddings:
+    """
+    Wrap a LangChain embeddings model (embed_documents / embed_query) with an EmbeddingCache.
+
+    Used by the semantic uploader so both SemanticChunker's sentence embeddings
+    and the final chunk embeddings are served from the same cache.
+    """
+
+    def __init__(self, embeddings, cache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = self.embeddings.embed_documents([texts[i] for i in missing])
+            self.cache.put_many([texts[i] for i in missing], fresh)
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Batched, concurrent embedding stage for the Qdrant upload scripts.
+
+Instead of one `openai.embeddings.create` call per ticket, texts are grouped
+into requests of EMBED_BATCH_SIZE inputs and up to EMBED_WORKERS requests are
+kept in flight on a bounded thread pool. Results are yielded back in input
+order so they can feed the existing BATCH_SIZE upsert loop unchanged.
+When an EmbeddingCache is supplied, only cache misses are sent to the API.
+
+Point OPENAI_BASE_URL at a local stand-in server (see
+test/fake_embedding_server.py) to exercise this without the real API.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+EMBED_BATCH_SIZE = int(os.environ.get('EMBED_BATCH_SIZE', 64))
+EMBED_WORKERS = int(os.environ.get('EMBED_WORKERS', 4))
+# The embeddings API caps the total tokens of one request (300k); stay under it
+EMBED_BATCH_TOKENS = int(os.environ.get('EMBED_BATCH_TOKENS', 250000))
+
+
+class BatchEmbedder:
+    """Embed many texts per request with a bounded number of requests in flight."""
+
+    def __init__(self, model, batch_size=EMBED_BATCH_SIZE, max_workers=EMBED_WORKERS, client=None, cache=None,
+                 dimensions=None, token_counter=None, max_batch_tokens=EMBED_BATCH_TOKENS):
+        self.model = model
+        # Optional callable(text) -> token count; when set, batches are also capped at max_batch_tokens
+        self.token_counter = token_counter
+        self.max_batch_tokens = max_batch_tokens
+        # Shortened (Matryoshka) output size for text-embedding-3 models; None = native size
+        self.dimensions = dimensions
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        # The module-level openai client honours OPENAI_API_KEY / OPENAI_BASE_URL
+        self.client = client or openai
+        self.cache = cache
+        self.embedded = 0
+        self.failed = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.started_at = None
+        self.finished_at = None
+
+    def _create(self, texts):
+        with self._lock:
+            self.requests += 1
+        if self.dimensions:
+            response = self.client.embeddings.create(input=texts, model=self.model, dimensions=self.dimensions)
+        else:
+            response = self.client.embeddings.create(input=texts, model=self.model)
+        # The API returns one item per input; order by index to be safe
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+    def _embed_batch(self, texts):
+        """Embed one batch, serving cache hits locally and requesting only the misses."""
+        if not self.cache:
+            return self._embed_uncached(texts)
+
+        cached = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        results = [(vector, None) for vector in cached]
+        if missing:
+            fresh = self._embed_uncached([texts[i] for i in missing])
+            self.cache.put_many([texts[i] for i in missing], [vector for vector, _ in fresh])
+            for i, result in zip(missing, fresh):
+                results[i] = result
+        return results
+
+    def _embed_uncached(self, texts):
+        """Embed one batch, falling back to single-text calls so one bad row only loses itself."""
+        try:
+            return [(vector, None) for vector in self._create(texts)]
+        except Exception as batch_error:
+            if len(texts) == 1:
+                return [(None, batch_error)]
+            results = []
+            for text in texts:
+                try:
+                    results.append((self._create([text])[0], None))
+                except Exception as e:
+                    results.append((None, e))
+            return results
+
+    def embed_stream(self, records):
+        """
+        Embed a stream of (record, text) pairs.
+
+        Args:
+            records: Iterable of (record, text) tuples. `record` is passed through untouched.
+
+        Yields:
+            (record, vector, error) in input order. `vector` is None when `error` is set.
+        """
+        self.started_at = self.started_at or time.time()
+        max_in_flight = self.max_workers * 2
+        pending = deque()
+
+        def drain(future, batch_records):
+            for record, (vector, error) in zip(batch_records, future.result()):
+                if error is None:
+                    self.embedded += 1
+                else:
+                    self.failed += 1
+                yield record, vector, error
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            batch_records, batch_texts, batch_tokens = [], [], 0
+            for record, text in records:
+                tokens = self.token_counter(text) if self.token_counter else 0
+                if batch_texts and batch_tokens + tokens > self.max_batch_tokens:
+                    pending.append((executor.submit(self._embed_batch, batch_texts), batch_records))
+                    batch_records, batch_texts, batch_tokens = [], [], 0
+                batch_records.append(record)
+                batch_texts.append(text)
+                batch_tokens += tokens
+                if len(batch_texts) >= self.batch_size:
+                    pending.append((executor.submit(self._embed_batch, batch_texts), batch_records))
+                    batch_records, batch_texts, batch_tokens = [], [], 0
+                # Keep the pool busy without reading the whole input ahead
+                while len(pending) >= max_in_flight:
+                    yield from drain(*pending.popleft())
+
+            if batch_texts:
+                pending.append((executor.submit(self._embed_batch, batch_texts), batch_records))
+            while pending:
+                yield from drain(*pending.popleft())
+
+        self.finished_at = time.time()
+
+    def embed(self, texts):
+        """Embed a list of texts, returning vectors (None for failures) in input order."""
+        return [vector for _, vector, _ in self.embed_stream((i, text) for i, text in enumerate(texts))]
+
+    def throughput(self):
+        """Sustained embedded texts per second since the first request."""
+        if not self.started_at:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return self.embedded / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        """One-line end-of-run summary."""
+        return (f"Embedded {self.embedded} texts in {self.requests} requests "
+                f"({self.failed} failed), sustained {self.throughput():.1f} tickets/sec "
+                f"[batch={self.batch_size}, workers={self.max_workers}]")
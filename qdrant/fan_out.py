@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Run several retrievers at once and fuse their rankings as they arrive.
+
+LangChain's EnsembleRetriever calls its retrievers one after another, so an
+ensemble costs the sum of their latencies (an LLM query expansion, a Cohere
+rerank, a vector search, BM25). `fan_out` submits every retriever to a shared
+thread pool immediately and hands each result to a callback the moment it
+completes, so the ensemble costs roughly its slowest member. A retriever that
+overruns its timeout is dropped from the result instead of stalling the
+request; Python threads cannot be killed, so it finishes in the background
+and its result is discarded.
+
+`RankFusion` is the weighted reciprocal rank fusion EnsembleRetriever uses
+(score = sum of weight / (c + rank)), updated incrementally.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Threads shared by every fan-out in the process
+FANOUT_WORKERS = int(os.environ.get('FANOUT_WORKERS', 16))
+# Seconds a single retriever may take before it is dropped
+RETRIEVER_TIMEOUT = float(os.environ.get('RETRIEVER_TIMEOUT', 15))
+RRF_C = 60
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def shared_executor():
+    """Process-wide thread pool for retriever fan-out, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='retriever')
+        return _executor
+
+
+class FanOutResult:
+    """Results of the retrievers that finished in time, with per-retriever timings."""
+
+    def __init__(self):
+        self.results = {}
+        self.timings = {}
+        self.timed_out = []
+        self.failed = {}
+        self.elapsed = 0.0
+
+    def as_metadata(self):
+        return {
+            'elapsed_ms': round(self.elapsed * 1000, 1),
+            'retriever_ms': {name: round(seconds * 1000, 1) for name, seconds in self.timings.items()},
+            'timed_out': list(self.timed_out),
+            'failed': dict(self.failed),
+        }
+
+
+def fan_out(tasks, timeout=RETRIEVER_TIMEOUT, timeouts=None, on_result=None, executor=None):
+    """
+    Start every task at once and collect them as they complete.
+
+    Args:
+        tasks (dict): name -> zero-argument callable
+        timeout (float): Seconds each task may run, measured from the common start
+        timeouts (dict, optional): Per-task overrides of `timeout`
+        on_result (callable, optional): on_result(name, value), called in completion order
+
+    Returns:
+        FanOutResult: exceptions are recorded in `failed`, overruns in `timed_out`
+    """
+    executor = executor or shared_executor()
+    timeouts = timeouts or {}
+    outcome = FanOutResult()
+    start = time.perf_counter()
+
+    def timed(call):
+        began = time.perf_counter()
+        return call(), time.perf_counter() - began
+
+    # Each task runs in a copy of the caller's context (per-request cache stats and the like)
+    futures = {executor.submit(contextvars.copy_context().run, timed, call): name for name, call in tasks.items()}
+    deadlines = {future: start + timeouts.get(name, timeout) for future, name in futures.items()}
+    pending = set(futures)
+    while pending:
+        now = time.perf_counter()
+        overdue = {future for future in pending if deadlines[future] <= now and not future.done()}
+        for future in overdue:
+            future.cancel()
+            outcome.timed_out.append(futures[future])
+        pending -= overdue
+        if not pending:
+            break
+        done, pending = wait(pending, timeout=max(0.0, min(deadlines[f] for f in pending) - now),
+                             return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            try:
+                value, seconds = future.result()
+            except Exception as e:
+                outcome.failed[name] = str(e)
+                continue
+            outcome.results[name] = value
+            outcome.timings[name] = seconds
+            if on_result:
+                on_result(name, value)
+    outcome.elapsed = time.perf_counter() - start
+    return outcome
+
+
+class RankFusion:
+    """
+    Incremental weighted reciprocal rank fusion.
+
+    Args:
+        key (callable): Identity of an item, so the same document from two retrievers is merged
+        weights (dict, optional): name -> weight (default 1.0)
+    """
+
+    def __init__(self, key, weights=None, c=RRF_C):
+        self.key = key
+        self.weights = weights or {}
+        self.c = c
+        self._scores = {}
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, ranked_items):
+        weight = self.weights.get(name, 1.0)
+        with self._lock:
+            for rank, item in enumerate(ranked_items):
+                key = self.key(item)
+                self._scores[key] = self._scores.get(key, 0.0) + weight / (self.c + rank + 1)
+                # The first retriever to return a document supplies its content
+                self._items.setdefault(key, item)
+
+    def ranked(self):
+        """(item, fused score) pairs, best first."""
+        with self._lock:
+            order = sorted(self._scores, key=self._scores.get, reverse=True)
+            return [(self._items[key], self._scores[key]) for key in order]
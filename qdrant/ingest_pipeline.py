@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Producer/consumer ingest pipeline for the Qdrant upload scripts.
+
+    parse (thread) --parse queue--> embed (caller thread) --upsert queue--> upsert (threads)
+
+CSV parsing / chunking, embedding and Qdrant writes overlap instead of running
+one after another. Both queues are bounded so a slow stage applies
+backpressure rather than buffering the corpus in memory. Upserts are sent with
+`wait=False`; once every batch has been acknowledged the last batch is
+re-sent with `wait=True`, which Qdrant applies only after all earlier writes
+to the collection, as a final consistency barrier.
+
+With an UploadJournal, every batch is journaled once Qdrant accepts it, and
+records that fail to embed or upsert are dead-lettered (see upload_journal).
+
+Each stage reports its throughput, how busy it was and the depth of its
+output queue every PIPELINE_REPORT_SECONDS; the stage that is busy close to
+100% of the time is the bottleneck.
+"""
+
+import os
+import queue
+import threading
+import time
+
+PIPELINE_QUEUE_BATCHES = int(os.environ.get('PIPELINE_QUEUE_BATCHES', 8))
+UPSERT_WORKERS = int(os.environ.get('UPSERT_WORKERS', 2))
+PIPELINE_REPORT_SECONDS = float(os.environ.get('PIPELINE_REPORT_SECONDS', 30))
+# How often a stage blocked on a full queue checks whether the run was aborted
+QUEUE_POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+class _Aborted(Exception):
+    """Raised in a stage blocked on a full queue once the run has failed elsewhere."""
+
+
+class StageStats:
+    """Item count, wall time and time spent blocked on queues for one stage."""
+
+    def __init__(self, name, out_queue=None):
+        self.name = name
+        self.out_queue = out_queue
+        self.items = 0
+        self.waiting = 0.0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.started_at = self.started_at or time.time()
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    def add(self, items=1, waiting=0.0):
+        with self._lock:
+            self.items += items
+            self.waiting += waiting
+
+    def elapsed(self):
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def rate(self):
+        elapsed = self.elapsed()
+        return self.items / elapsed if elapsed > 0 else 0.0
+
+    def utilization(self, workers=1, over=None):
+        """Fraction of `over` seconds (default: own lifetime) the stage spent working."""
+        busy = self.elapsed() * workers - self.waiting
+        span = (over or self.elapsed()) * workers
+        return min(1.0, max(0.0, busy / span)) if span > 0 else 0.0
+
+    def describe(self, workers=1, over=None):
+        text = f"{self.name}: {self.items} ({self.rate():.1f}/s, busy {self.utilization(workers, over):.0%}"
+        if self.out_queue is not None:
+            text += f", out-queue {self.out_queue.qsize()}/{self.out_queue.maxsize}"
+        return text + ")"
+
+
+class IngestPipeline:
+    """Run parse -> embed -> upsert as overlapping stages with bounded queues."""
+
+    def __init__(self, client, collection_name, batch_size, queue_batches=PIPELINE_QUEUE_BATCHES,
+                 upsert_workers=UPSERT_WORKERS, report_every=PIPELINE_REPORT_SECONDS):
+        self.client = client
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.upsert_workers = max(1, upsert_workers)
+        self.report_every = report_every
+
+        self.parse_queue = queue.Queue(maxsize=queue_batches * batch_size)
+        self.upsert_queue = queue.Queue(maxsize=queue_batches)
+        self.parse_stats = StageStats('parse', self.parse_queue)
+        self.embed_stats = StageStats('embed', self.upsert_queue)
+        self.upsert_stats = StageStats('upsert')
+
+        self.uploaded = 0
+        self.failed = 0
+        self.journal = None
+        self._last_batch = None
+        self._errors = []
+        self._lock = threading.Lock()
+        self._stop_reporting = threading.Event()
+        self._abort = threading.Event()
+        self.started_at = None
+
+    # --- queue helpers that account blocked time to the calling stage ---
+    def _put(self, q, item, stats):
+        start = time.time()
+        while True:
+            try:
+                q.put(item, timeout=QUEUE_POLL_SECONDS)
+                break
+            except queue.Full:
+                if self._abort.is_set():
+                    raise _Aborted()
+        stats.add(0, time.time() - start)
+
+    def _get(self, q, stats):
+        start = time.time()
+        item = q.get()
+        stats.add(0, time.time() - start)
+        return item
+
+    # --- stages ---
+    def _parse_stage(self, records):
+        self.parse_stats.start()
+        try:
+            for record in records:
+                self._put(self.parse_queue, record, self.parse_stats)
+                self.parse_stats.add(1)
+        except _Aborted:
+            pass
+        except Exception as e:
+            self._errors.append(e)
+        finally:
+            try:
+                self._put(self.parse_queue, _DONE, self.parse_stats)
+            except _Aborted:
+                pass
+            self.parse_stats.finish()
+
+    def _parsed_records(self):
+        while True:
+            record = self._get(self.parse_queue, self.embed_stats)
+            if record is _DONE:
+                return
+            yield record
+
+    def _upsert_stage(self):
+        self.upsert_stats.start()
+        while True:
+            item = self._get(self.upsert_queue, self.upsert_stats)
+            if item is _DONE:
+                break
+            seq, batch, records = item
+            try:
+                self.client.upsert(collection_name=self.collection_name, points=batch, wait=False)
+                with self._lock:
+                    self.uploaded += len(batch)
+                    self._last_batch = batch
+                self.upsert_stats.add(len(batch))
+            except Exception as e:
+                print(f"❌ Batch upload of {len(batch)} points failed: {e}")
+                with self._lock:
+                    self.failed += len(batch)
+                if self.journal:
+                    self.journal.fail_batch(seq, records, e)
+                continue
+            if self.journal:
+                self.journal.commit(seq, records)
+        self.upsert_stats.finish()
+
+    def _report(self):
+        while not self._stop_reporting.wait(self.report_every):
+            print(f"⏱️  {self.status()}")
+
+    def _stages(self):
+        return [(self.parse_stats, 1), (self.embed_stats, 1), (self.upsert_stats, self.upsert_workers)]
+
+    def status(self):
+        # Busy time is measured against the whole run so a stage that finished early doesn't look saturated
+        over = time.time() - self.started_at if self.started_at else None
+        return " | ".join(stats.describe(workers, over) for stats, workers in self._stages())
+
+    def _barrier(self):
+        """Block until every wait=False upsert has been applied."""
+        if self._last_batch:
+            self.client.upsert(collection_name=self.collection_name, points=self._last_batch, wait=True)
+
+    def run(self, records, embed_stream, to_point, on_error=None, journal=None):
+        """
+        Ingest `records` into the collection.
+
+        Args:
+            records: Iterable of (record, text) pairs; consumed on the parse thread
+            embed_stream: Callable taking an iterable of (record, text) and yielding
+                (record, vector, error), e.g. BatchEmbedder.embed_stream
+            to_point: Callable (record, vector) -> Qdrant point
+            on_error: Optional callable (record, error) for embedding failures
+            journal: Optional UploadJournal for checkpoints and dead letters
+
+        Returns:
+            tuple: (uploaded_count, failed_count)
+
+        Raises:
+            The first exception raised by `records`, `embed_stream` or `to_point`, once the other stages stopped
+        """
+        self.started_at = time.time()
+        self.journal = journal
+        threads = [threading.Thread(target=self._parse_stage, args=(records,), daemon=True)]
+        threads += [threading.Thread(target=self._upsert_stage, daemon=True) for _ in range(self.upsert_workers)]
+        reporter = threading.Thread(target=self._report, daemon=True)
+        for thread in threads + [reporter]:
+            thread.start()
+
+        self.embed_stats.start()
+        batch, batch_records, seq = [], [], 0
+        try:
+            for record, vector, error in embed_stream(self._parsed_records()):
+                if error is not None:
+                    with self._lock:
+                        self.failed += 1
+                    if on_error:
+                        on_error(record, error)
+                    if journal:
+                        journal.dead_letter([record], error)
+                    continue
+                batch.append(to_point(record, vector))
+                batch_records.append(record)
+                self.embed_stats.add(1)
+                if len(batch) >= self.batch_size:
+                    # Batches are numbered in stream order so the journal can find the committed prefix
+                    self._put(self.upsert_queue, (seq, batch, batch_records), self.embed_stats)
+                    batch, batch_records, seq = [], [], seq + 1
+            if batch:
+                self._put(self.upsert_queue, (seq, batch, batch_records), self.embed_stats)
+        except BaseException:
+            # Nothing reads the parse queue any more; let a parse thread blocked on it exit so the join can't hang
+            self._abort.set()
+            raise
+        finally:
+            self.embed_stats.finish()
+            for _ in range(self.upsert_workers):
+                self.upsert_queue.put(_DONE)
+            for thread in threads:
+                thread.join()
+            self._stop_reporting.set()
+
+        self._barrier()
+        if self._errors:
+            raise self._errors[0]
+
+        print(f"📈 Pipeline stages: {self.status()}")
+        over = time.time() - self.started_at
+        busiest, workers = max(self._stages(), key=lambda stage: stage[0].utilization(stage[1], over))
+        print(f"   Bottleneck: {busiest.name} stage (busy {busiest.utilization(workers, over):.0%})")
+        return self.uploaded, self.failed
+
+
+def batch_embed_stream(embed_many, batch_size=64):
+    """Adapt a list-at-a-time embed function (e.g. LangChain's embed_documents) to the embed_stream interface."""
+    def embed_stream(records):
+        batch = []
+        for item in records:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield from _embed_batch(embed_many, batch)
+                batch = []
+        if batch:
+            yield from _embed_batch(embed_many, batch)
+    return embed_stream
+
+
+def _embed_batch(embed_many, batch):
+    try:
+        vectors = embed_many([text for _, text in batch])
+    except Exception as e:
+        for record, _ in batch:
+            yield record, None, e
+        return
+    for (record, _), vector in zip(batch, vectors):
+        yield record, vector, None
+
+
+def map_embed_stream(embed_one):
+    """Adapt a one-text-at-a-time embed function to the embed_stream interface."""
+    def embed_stream(records):
+        for record, text in records:
+            try:
+                yield record, embed_one(text), None
+            except Exception as e:
+                yield record, None, e
+    return embed_stream
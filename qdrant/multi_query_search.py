@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Multi-query expansion search in one Qdrant round trip.
+
+LangChain's MultiQueryRetriever embeds and searches every LLM rewrite of a
+question on its own: N embedding calls and N Qdrant requests. Here the
+caller embeds all rewrites in a single embedding request, `batch_search`
+sends one `query_batch_points` request for all of them, and
+`multi_query_search` fuses the hit lists with reciprocal rank fusion per
+ticket, so a ticket found by several rewrites (or as several chunks /
+token windows) is returned once.
+"""
+
+from qdrant_client import models
+
+from delta_sync import normalize_id
+from fan_out import RankFusion
+
+
+def ticket_key(hit):
+    """Ticket a hit belongs to: token windows carry parent_id, semantic chunks the ticket id."""
+    payload = hit.payload or {}
+    return normalize_id(payload.get('parent_id', payload.get('id', hit.id)))
+
+
+def batch_search(client, collection_name, query_vectors, limit=10, using=None, query_filter=None,
+                 search_params=None):
+    """One query_batch_points request; returns a list of ScoredPoint lists aligned with `query_vectors`."""
+    requests = [
+        models.QueryRequest(query=vector, using=using, filter=query_filter, params=search_params, limit=limit,
+                            with_payload=True)
+        for vector in query_vectors
+    ]
+    return [response.points for response in client.query_batch_points(collection_name, requests=requests)]
+
+
+def multi_query_search(client, collection_name, query_vectors, limit=10, using=None, query_filter=None,
+                       search_params=None, candidates=None):
+    """
+    Search every query vector in one batch and fuse the results per ticket.
+
+    Args:
+        query_vectors (list): One embedding per query rewrite (the original first)
+        candidates (int, optional): Hits per rewrite before fusion (default: 2 * limit)
+
+    Returns:
+        list: (ScoredPoint, fused score) pairs, one per ticket, best first
+    """
+    hit_lists = batch_search(client, collection_name, query_vectors, candidates or limit * 2, using,
+                             query_filter, search_params)
+    fusion = RankFusion(key=ticket_key)
+    for index, hits in enumerate(hit_lists):
+        # A ticket ranks once per rewrite, at its best chunk / window
+        seen, best_per_ticket = set(), []
+        for hit in hits:
+            key = ticket_key(hit)
+            if key not in seen:
+                seen.add(key)
+                best_per_ticket.append(hit)
+        fusion.add(index, best_per_ticket)
+    return fusion.ranked()[:limit]
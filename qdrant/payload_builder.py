@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Columnar content and payload construction for the Qdrant upload scripts.
+
+Builds the `content` text, the truncated embedding input and the payload dicts
+for a whole DataFrame batch with vectorized column operations, instead of
+touching one pandas Series per row. NaN / NaT values become None so payloads
+are valid JSON, and date columns become epoch seconds (see payload_schema).
+"""
+
+import numpy as np
+import pandas as pd
+
+from payload_schema import DATE_FIELDS, epoch_series
+
+MAX_CHARS = 16000
+
+
+def clean_value(value):
+    """Make one payload value JSON-safe: NaN -> None, unknown types -> str."""
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return None if value != value else value
+    if value is pd.NaT:
+        return None
+    return str(value)
+
+
+def clean_payload(payload):
+    """Apply `clean_value` to every value of a payload dict."""
+    return {key: clean_value(value) for key, value in payload.items()}
+
+
+def build_contents(titles, descriptions, max_chars=MAX_CHARS):
+    """
+    Vectorized "Title: X\\n\\nDescription: Y" formatting for stripped title/description Series.
+
+    Returns:
+        pd.Series: Content truncated to `max_chars` (None = untruncated), aligned with the inputs
+    """
+    has_title = titles.str.len() > 0
+    has_description = descriptions.str.len() > 0
+    title_part = "Title: " + titles
+    description_part = "Description: " + descriptions
+    content = np.select(
+        [has_title & has_description, has_title, has_description],
+        [title_part + "\n\nDescription: " + descriptions, title_part, description_part],
+        default="No content available"
+    )
+    return pd.Series(content, index=titles.index, dtype=object).str.slice(0, max_chars)
+
+
+def build_batch(frame, max_chars=MAX_CHARS):
+    """
+    Build point ids, embedding texts and payloads for one CSV batch.
+
+    Payloads carry every CSV column plus `content`, with `title` and
+    `description` stripped and dates as epoch seconds. Rows without a JIRA
+    id fall back to their row number: the frame index, which
+    csv_stream.iter_csv_frames already sets to the absolute row in the file.
+
+    Returns:
+        tuple: (point_ids, contents, payloads) lists of equal length
+    """
+    titles = frame['title'].fillna("").astype(str).str.strip()
+    descriptions = frame['description'].fillna("").astype(str).str.strip()
+    contents = build_contents(titles, descriptions, max_chars)
+
+    ids = pd.to_numeric(frame['id'], errors='coerce')
+    fallback = pd.Series(frame.index, index=frame.index)
+    point_ids = ids.fillna(fallback).astype('int64').tolist()
+
+    # object dtype turns numpy scalars into Python ints/floats; where() swaps NaN for None
+    columns = frame.drop(columns=['title', 'description']).astype(object)
+    columns = columns.where(columns.notna(), None)
+    for field in DATE_FIELDS:
+        if field in columns:
+            columns[field] = epoch_series(frame[field])
+    columns['content'] = contents
+    columns['title'] = titles
+    columns['description'] = descriptions
+    payloads = columns.to_dict('records')
+
+    return point_ids, contents.tolist(), payloads
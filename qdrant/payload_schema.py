@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Typed payload schema and payload indexes for the JIRA collections.
+
+Both uploaders create the collection, then declare a payload index for every
+field the agents filter on, so project / priority / status / date filters use
+an index instead of scanning payloads. Date fields are stored as epoch
+seconds (UTC) so range filters become integer range lookups.
+"""
+
+from datetime import datetime, timezone
+
+import pandas as pd
+from qdrant_client import models
+
+KEYWORD_FIELDS = ('project', 'priority', 'status', 'type', 'key')
+DATE_FIELDS = ('created', 'resolved', 'updated')
+
+PAYLOAD_SCHEMA = {
+    **{field: models.PayloadSchemaType.KEYWORD for field in KEYWORD_FIELDS},
+    # Dates only need range filters, not exact-match lookups
+    **{field: models.IntegerIndexParams(type=models.IntegerIndexType.INTEGER, lookup=False, range=True)
+       for field in DATE_FIELDS},
+    # Token windows of oversized tickets point back at their ticket (see token_windows)
+    'parent_id': models.IntegerIndexParams(type=models.IntegerIndexType.INTEGER, lookup=True, range=False),
+}
+
+_EPOCH = pd.Timestamp(0, tz='UTC')
+
+
+def to_epoch(value):
+    """Convert one JIRA date ('2014-01-06 00:00:00.000') to epoch seconds; None if missing."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return None if value != value else int(value)
+    if isinstance(value, str):
+        # Fast path for the export's ISO format; pd.to_datetime costs ~100x more per scalar
+        try:
+            parsed = datetime.fromisoformat(value.strip())
+        except ValueError:
+            parsed = None
+        if parsed is not None:
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return int(parsed.timestamp())
+    # Naive dates are UTC; tz-aware ones are converted to it
+    timestamp = pd.to_datetime(value, errors='coerce', utc=True)
+    if pd.isna(timestamp):
+        return None
+    return int((timestamp - _EPOCH) // pd.Timedelta(seconds=1))
+
+
+def epoch_series(values):
+    """Vectorized `to_epoch` for a Series of date strings; returns Python ints / None."""
+    # Without a format pandas infers one from the first value and silently drops values spelled differently
+    timestamps = pd.to_datetime(values, errors='coerce', utc=True, format='ISO8601')
+    retry = timestamps.isna() & values.notna()
+    if retry.any():
+        # Non-ISO spellings: parse value by value, as to_epoch does
+        timestamps[retry] = pd.to_datetime(values[retry], errors='coerce', utc=True, format='mixed')
+    seconds = (timestamps - _EPOCH) // pd.Timedelta(seconds=1)
+    return pd.Series([None if pd.isna(s) else int(s) for s in seconds], index=values.index, dtype=object)
+
+
+def from_epoch(seconds):
+    """Epoch seconds -> naive UTC datetime (inverse of `to_epoch`)."""
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+
+
+def normalize_dates(payload):
+    """Rewrite the date fields of one payload dict to epoch seconds in place."""
+    for field in DATE_FIELDS:
+        if field in payload:
+            payload[field] = to_epoch(payload[field])
+    return payload
+
+
+def create_payload_indexes(client, collection_name, schema=PAYLOAD_SCHEMA):
+    """Create (or confirm) a payload index for every field in `schema`."""
+    existing = client.get_collection(collection_name).payload_schema or {}
+    created = []
+    for field, field_schema in schema.items():
+        if field in existing:
+            continue
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field,
+            field_schema=field_schema,
+            wait=True
+        )
+        created.append(field)
+    if created:
+        print(f"📇 Created payload indexes on: {', '.join(created)}")
+    return created
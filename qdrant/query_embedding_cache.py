@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+In-memory query-embedding cache shared by the retrieval agents and APIs.
+
+Serving one request can embed the same query many times: direct_qdrant_search,
+the QdrantVectorStore retrievers behind the naive, compression and ensemble
+paths, and the multi-query retriever's original question all call
+`embed_query`. QueryEmbeddingCache keys vectors by (model, normalized query
+text) and keeps them in a thread-safe LRU with a time-to-live, so
+each distinct query string is embedded once and concurrent callers of the
+same query wait for the in-flight request instead of issuing their own.
+
+When callers bring their own API key, scope the namespace to it with
+`key_namespace`, so a vector is only served to callers holding the key that
+paid for it (an invalid key still fails at the embedding API).
+
+Hits and the embedding latency they saved are counted globally and, inside
+`with cache.track() as stats:`, for the current request only, for
+retrieval_metadata.
+"""
+
+import contextvars
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Maximum cached queries (least recently used are evicted first)
+QUERY_CACHE_SIZE = int(os.environ.get('QUERY_CACHE_SIZE', 2048))
+# Seconds a cached query vector stays valid (0 disables expiry)
+QUERY_CACHE_TTL = float(os.environ.get('QUERY_CACHE_TTL', 3600))
+
+_request_stats = contextvars.ContextVar('query_embedding_cache_request_stats', default=None)
+
+
+def normalize_query(text):
+    """Cache key text: case-folded with runs of whitespace collapsed."""
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+
+def key_namespace(namespace, api_key):
+    """`namespace` scoped to a caller's API key (hashed, never stored in clear); unchanged without a key."""
+    if not api_key:
+        return namespace
+    digest = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+    return f"{namespace}|key:{digest}"
+
+
+class CacheStats:
+    """Hit / miss counters and the embedding time hits avoided."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.embed_seconds = 0.0
+
+    def record_hit(self, saved_seconds):
+        self.hits += 1
+        self.saved_seconds += saved_seconds
+
+    def record_miss(self, embed_seconds):
+        self.misses += 1
+        self.embed_seconds += embed_seconds
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'saved_ms': round(self.saved_seconds * 1000, 1),
+            'embed_ms': round(self.embed_seconds * 1000, 1),
+        }
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU + TTL cache of query vectors with single-flight misses."""
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self.evictions = 0
+        # key -> (vector, stored_at, seconds the embedding call took)
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        """Fresh entry for `key` (moved to most recently used) or None. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl and self.clock() - entry[1] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _record(self, hit, seconds):
+        request = _request_stats.get()
+        for stats in (self.stats, request) if request is not None else (self.stats,):
+            if hit:
+                stats.record_hit(seconds)
+            else:
+                stats.record_miss(seconds)
+
+    def get_or_embed(self, text, embed, namespace=''):
+        """
+        Cached vector of `text`, computing it with `embed(text)` on a miss.
+
+        Args:
+            namespace (str): Keeps vectors of different models / dimensions apart
+        """
+        key = (namespace, normalize_query(text))
+        while True:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    self._record(True, entry[2])
+                    return entry[0]
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = self._inflight[key] = threading.Event()
+                    break
+            # Another thread is embedding this query: wait for it, then read the cache
+            # (or embed ourselves if it failed)
+            pending.wait()
+
+        try:
+            start = time.perf_counter()
+            vector = embed(text)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._entries[key] = (vector, self.clock(), elapsed)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+                self._record(False, elapsed)
+            return vector
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            pending.set()
+
+    def get_or_embed_many(self, texts, embed_many, namespace=''):
+        """
+        Cached vectors of `texts`, computing all misses with a single `embed_many(list)` call.
+
+        Used for multi-query expansion, where every rewrite is needed at once.
+        Texts that normalize to the same key are embedded once.
+        """
+        keys = [(namespace, normalize_query(text)) for text in texts]
+        vectors = {}
+        with self._lock:
+            for key in keys:
+                if key not in vectors:
+                    entry = self._lookup(key)
+                    if entry is not None:
+                        self._record(True, entry[2])
+                        vectors[key] = entry[0]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            start = time.perf_counter()
+            fresh = embed_many(list(missing.values()))
+            # Attribute the batch latency evenly to its texts
+            elapsed = (time.perf_counter() - start) / len(missing)
+            with self._lock:
+                now = self.clock()
+                for key, vector in zip(missing, fresh):
+                    vectors[key] = vector
+                    self._entries[key] = (vector, now, elapsed)
+                    self._entries.move_to_end(key)
+                    self._record(False, elapsed)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return [vectors[key] for key in keys]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @contextmanager
+    def track(self):
+        """Count the hits and misses of one request: `with cache.track() as stats: ...; stats.as_dict()`."""
+        stats = CacheStats()
+        token = _request_stats.set(stats)
+        try:
+            yield stats
+        finally:
+            _request_stats.reset(token)
+
+    def summary(self):
+        stats = self.stats.as_dict()
+        return (f"Query embedding cache: {stats['hits']} hits / {stats['misses']} misses "
+                f"({stats['hit_rate'] * 100:.1f}% hit rate), {stats['saved_ms'] / 1000:.1f}s of embedding saved, "
+                f"{len(self)} cached, {self.evictions} evicted")
+
+
+class CachedQueryEmbeddings:
+    """
+    Wrap a LangChain embeddings model so embed_query goes through a QueryEmbeddingCache.
+
+    embed_documents is passed through unchanged; pass the wrapper wherever the
+    model was used (QdrantVectorStore, retrievers, direct searches) so they all
+    share one cache.
+    """
+
+    def __init__(self, embeddings, cache, namespace=None):
+        self.embeddings = embeddings
+        self.cache = cache
+        model = getattr(embeddings, 'model', type(embeddings).__name__)
+        self.namespace = namespace or f"{model}|{getattr(embeddings, 'dimensions', None) or 'native'}"
+
+    def embed_query(self, text):
+        return self.cache.get_or_embed(text, self.embeddings.embed_query, self.namespace)
+
+    def embed_queries(self, texts):
+        """Query vectors of several texts: cache hits plus one embedding request for the rest."""
+        return self.cache.get_or_embed_many(texts, self.embeddings.embed_documents, self.namespace)
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
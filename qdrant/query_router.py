@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Deterministic fast-path routing for the supervisor.
+
+The supervisor's routing prompt is mostly rules a machine can check: ticket
+references go to BM25, production incidents to ContextualCompression,
+user_can_wait to Ensemble. `rule_route` applies them (plus a few cheap query
+features) in microseconds and returns a RouteDecision with a confidence; the
+supervisor only spends a GPT-4o round trip when that confidence is below
+ROUTER_CONFIDENCE, i.e. for queries the rules cannot settle.
+"""
+
+import os
+import re
+
+AGENTS = ("BM25", "ContextualCompression", "Ensemble")
+# Rule decisions at or above this confidence skip the LLM
+ROUTER_CONFIDENCE = float(os.environ.get('ROUTER_CONFIDENCE', 0.8))
+
+# JIRA keys like HBASE-123 or SPR-4567 (project keys are upper case letters/digits)
+TICKET_KEY = re.compile(r'\b[A-Z][A-Z0-9_]+-\d+\b')
+# Java/Python-style exception and error class names
+ERROR_NAME = re.compile(r'\b\w*(?:Exception|Error|Fault)\b')
+QUOTED = re.compile(r'"[^"]{3,}"|\'[^\']{3,}\'|`[^`]{3,}`')
+# Identifiers that only match as exact tokens: dotted packages, camelCase, ALLCAPS acronyms
+IDENTIFIER = re.compile(r'\b(?:[a-z]+\.[\w.]+|[a-z]+[A-Z]\w*|[A-Z]{3,}\d*)\b')
+QUESTION = re.compile(r'^\s*(?:how|why|what|when|which|where|who|can|should|is|are|does|do)\b|\?\s*$',
+                      re.IGNORECASE)
+
+
+class RouteDecision:
+    """A routing decision and the tier that made it ('rules', 'llm' or 'fallback')."""
+
+    def __init__(self, agent, reasoning, confidence, tier='rules', features=None):
+        self.agent = agent
+        self.reasoning = reasoning
+        self.confidence = confidence
+        self.tier = tier
+        self.features = features or {}
+
+    def as_dict(self):
+        return {
+            'agent': self.agent,
+            'reasoning': self.reasoning,
+            'confidence': self.confidence,
+            'tier': self.tier,
+            'features': self.features,
+        }
+
+
+def query_features(query):
+    """Cheap lexical features of a query."""
+    return {
+        'ticket_keys': TICKET_KEY.findall(query),
+        'error_names': ERROR_NAME.findall(query),
+        'quoted': len(QUOTED.findall(query)),
+        'identifiers': IDENTIFIER.findall(query),
+        'words': len(query.split()),
+        'question': bool(QUESTION.search(query)),
+    }
+
+
+def rule_route(query, user_can_wait=False, production_incident=False):
+    """
+    Route by the supervisor's own rules, in the prompt's priority order.
+
+    Returns:
+        RouteDecision: confidence below ROUTER_CONFIDENCE means the rules are unsure
+    """
+    features = query_features(query)
+    if features['ticket_keys']:
+        return RouteDecision("BM25", f"References ticket {', '.join(features['ticket_keys'][:3])}", 0.95,
+                             features=features)
+    if production_incident:
+        # Urgent: never wait on an LLM, even if user_can_wait is also set
+        return RouteDecision("ContextualCompression", "Production incident: fast reranked semantic search", 0.9,
+                             features=features)
+    if user_can_wait:
+        return RouteDecision("Ensemble", "User can wait: comprehensive multi-method search", 0.85,
+                             features=features)
+
+    exact_terms = features['quoted'] + len(features['error_names']) + len(features['identifiers'])
+    if not exact_terms:
+        return RouteDecision("ContextualCompression", "General question: default semantic search", 0.85,
+                             features=features)
+    if features['words'] <= 4 and not features['question']:
+        # A bare error name or identifier: a keyword lookup
+        return RouteDecision("BM25", "Short exact-term lookup", 0.8, features=features)
+    # Natural-language question around exact terms: could go either way
+    return RouteDecision("ContextualCompression", "Exact terms inside a descriptive query", 0.5,
+                         features=features)
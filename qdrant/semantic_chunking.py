@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Semantic chunking that hands back a vector for every chunk.
+
+LangChain's SemanticChunker embeds every (buffered) sentence to find
+breakpoints and then throws those embeddings away, so the uploader used to
+embed each chunk a second time, one request per chunk. VectorSemanticChunker
+keeps SemanticChunker's sentence splitting and breakpoint thresholds but:
+
+- embeds the buffered sentences of a whole window of documents in one
+  `embed_documents` call instead of one call per document,
+- computes the breakpoint distances of each document as a single vectorized
+  NumPy operation,
+- returns (chunk, vector) pairs. In `pooled` mode (default) the vector is
+  the re-normalized mean of the chunk's sentence embeddings, so chunks cost
+  no extra tokens. In `embedded` mode the final chunk texts are embedded in
+  one batched call.
+
+TokenMeter counts the tokens actually sent to the embeddings API so the two
+modes (and the old per-chunk path) can be compared.
+
+ShardedChunker runs VectorSemanticChunker in CHUNK_WORKERS processes. Each
+window of documents is sharded by document id, every shard is chunked
+independently, and the results are merged back in input order, so the
+output (and the chunk ids assigned from it) does not depend on the number
+of workers. `map_windows` submits the shards of the next CHUNK_WINDOWS_AHEAD
+windows before collecting the current one, so a worker that finishes its
+shard early moves on to the next window instead of idling until the slowest
+shard is done. Throughput is still bounded by shard imbalance within the
+look-ahead (a single very slow ticket delays its window's results) and, on
+the embedding side, by the API's rate limits.
+
+`chunk_point_id` derives each chunk's Qdrant point id from (ticket id, chunk
+index, chunking method), so re-uploading a ticket overwrites its own points
+whichever run, slice or shard does it.
+"""
+
+import os
+import threading
+import uuid
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import tiktoken
+from langchain_core.documents import Document
+from langchain_experimental.text_splitter import SemanticChunker, combine_sentences
+
+CHUNK_VECTORS = os.environ.get('CHUNK_VECTORS', 'pooled')
+CHUNK_VECTOR_MODES = ('pooled', 'embedded')
+CHUNK_WORKERS = int(os.environ.get('CHUNK_WORKERS', 1))
+# Windows whose shards are queued ahead of the one being collected (ShardedChunker.map_windows)
+CHUNK_WINDOWS_AHEAD = int(os.environ.get('CHUNK_WINDOWS_AHEAD', 1))
+
+CHUNK_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'cuttlefish3/chunk')
+
+
+def chunk_point_id(ticket_id, chunk_index, method='semantic'):
+    """Stable UUID point id for chunk `chunk_index` of a ticket."""
+    if ticket_id is None:
+        raise ValueError("chunk_point_id needs a ticket id")
+    return str(uuid.uuid5(CHUNK_NAMESPACE, f"{ticket_id}#{chunk_index}#{method}"))
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class TokenMeter:
+    """Pass-through LangChain embeddings wrapper that counts the tokens it forwards."""
+
+    def __init__(self, embeddings, model):
+        self.embeddings = embeddings
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding('cl100k_base')
+        self.tokens = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def count(self, texts):
+        return sum(len(self.encoding.encode(text, disallowed_special=())) for text in texts)
+
+    def _record(self, texts):
+        tokens = self.count(texts)
+        with self._lock:
+            self.tokens += tokens
+            self.texts += len(texts)
+
+    def embed_documents(self, texts):
+        self._record(texts)
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        self._record([text])
+        return self.embeddings.embed_query(text)
+
+
+class VectorSemanticChunker(SemanticChunker):
+    """SemanticChunker returning (Document, vector) pairs; see module docstring."""
+
+    def __init__(self, embeddings, chunk_vectors=CHUNK_VECTORS, **kwargs):
+        super().__init__(embeddings, **kwargs)
+        if chunk_vectors not in CHUNK_VECTOR_MODES:
+            raise ValueError(f"chunk_vectors must be one of {CHUNK_VECTOR_MODES}, got '{chunk_vectors}'")
+        self.chunk_vectors = chunk_vectors
+        self.sentence_texts = 0
+        self.chunk_texts = 0
+
+    def _breakpoints(self, sentence_vectors):
+        """Indices of sentences after which a new chunk starts."""
+        if len(sentence_vectors) < 2:
+            return np.array([], dtype=int)
+        # Cosine distance between each buffered sentence and the next, in one shot (vectors are unit length)
+        distances = 1.0 - np.einsum('ij,ij->i', sentence_vectors[:-1], sentence_vectors[1:])
+        if self.number_of_chunks is not None:
+            threshold, breakpoint_array = self._threshold_from_clusters(distances), distances
+        else:
+            threshold, breakpoint_array = self._calculate_breakpoint_threshold(distances)
+        return np.flatnonzero(np.asarray(breakpoint_array) > threshold)
+
+    def _groups(self, sentences, breakpoints):
+        """Sentence index ranges per chunk, honouring min_chunk_size like SemanticChunker."""
+        groups, start = [], 0
+        for index in breakpoints:
+            text = " ".join(sentences[start:index + 1])
+            if self.min_chunk_size is not None and len(text) < self.min_chunk_size:
+                continue
+            groups.append((start, index + 1))
+            start = index + 1
+        if start < len(sentences):
+            groups.append((start, len(sentences)))
+        return groups
+
+    def _sentence_groups(self, sentences, sentence_vectors):
+        """Sentence index ranges per chunk of one document."""
+        if self.breakpoint_threshold_type == "gradient" and len(sentences) == 2:
+            # np.gradient needs two distances; SemanticChunker returns both sentences as chunks
+            return [(0, 1), (1, 2)]
+        return self._groups(sentences, self._breakpoints(sentence_vectors))
+
+    def split_documents_with_vectors(self, documents):
+        """
+        Split `documents` into semantic chunks.
+
+        Returns:
+            list: (Document, vector) pairs; chunk metadata is a copy of the source document's
+        """
+        return [pair for doc_chunks in self.split_documents_grouped(documents) for pair in doc_chunks]
+
+    def split_documents_grouped(self, documents):
+        """Like `split_documents_with_vectors`, but one list of (Document, vector) pairs per input document."""
+        per_doc = []
+        buffered = []
+        for doc in documents:
+            sentences = self._get_single_sentences_list(doc.page_content)
+            combined = combine_sentences([{"sentence": s, "index": i} for i, s in enumerate(sentences)],
+                                         self.buffer_size)
+            per_doc.append((doc, sentences, len(buffered)))
+            buffered.extend(item["combined_sentence"] for item in combined)
+
+        # One request batch for every buffered sentence in the window
+        self.sentence_texts += len(buffered)
+        # float64 like SemanticChunker's cosine distances: a distance at the threshold must compare the same way
+        vectors = _normalize(np.asarray(self.embeddings.embed_documents(buffered), dtype=np.float64)) \
+            if buffered else np.zeros((0, 0), dtype=np.float64)
+
+        grouped = []
+        for doc, sentences, offset in per_doc:
+            sentence_vectors = vectors[offset:offset + len(sentences)]
+            doc_chunks = []
+            for start, end in self._sentence_groups(sentences, sentence_vectors):
+                chunk = Document(page_content=" ".join(sentences[start:end]), metadata=dict(doc.metadata))
+                # Mean of the chunk's buffered-sentence embeddings (exact for single-sentence documents)
+                doc_chunks.append((chunk, _normalize(sentence_vectors[start:end].mean(axis=0)).tolist()))
+            grouped.append(doc_chunks)
+
+        if self.chunk_vectors == 'embedded':
+            texts = [chunk.page_content for doc_chunks in grouped for chunk, _ in doc_chunks]
+            if texts:
+                self.chunk_texts += len(texts)
+                fresh = iter(self.embeddings.embed_documents(texts))
+                grouped = [[(chunk, next(fresh)) for chunk, _ in doc_chunks] for doc_chunks in grouped]
+        return grouped
+
+
+# --- process-pool sharding ---
+
+_worker_chunker = None
+_worker_meter = None
+
+
+def _init_worker(embeddings_factory, factory_args, chunk_vectors, chunker_kwargs):
+    """Build one chunker (and embeddings client / cache connection) per worker process."""
+    global _worker_chunker, _worker_meter
+    embeddings, _worker_meter = embeddings_factory(*factory_args)[:2]
+    _worker_chunker = VectorSemanticChunker(embeddings, chunk_vectors=chunk_vectors, **chunker_kwargs)
+
+
+def _chunk_shard(documents):
+    """Worker: chunk one shard; returns (per-document chunks, tokens sent, texts sent)."""
+    tokens, texts = _worker_meter.tokens, _worker_meter.texts
+    grouped = _worker_chunker.split_documents_grouped(documents)
+    return grouped, _worker_meter.tokens - tokens, _worker_meter.texts - texts
+
+
+def shard_of(doc, shards):
+    """Stable shard for a document, keyed by its JIRA id (crc32, not the salted built-in hash)."""
+    return zlib.crc32(str(doc.metadata.get('id')).encode('utf-8')) % shards
+
+
+class ShardedChunker:
+    """
+    Process-pool front end for VectorSemanticChunker.
+
+    `embeddings_factory(*factory_args)` must be a picklable module-level
+    callable returning (embeddings, TokenMeter, ...) and is called once in
+    every worker.
+    """
+
+    def __init__(self, workers, embeddings_factory, factory_args=(), chunk_vectors=CHUNK_VECTORS, **chunker_kwargs):
+        self.workers = max(1, workers)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(embeddings_factory, factory_args, chunk_vectors, chunker_kwargs)
+        )
+        self.tokens = 0
+        self.texts = 0
+
+    def _submit(self, documents):
+        """Queue the shards of one window; returns (shard, future) pairs."""
+        shards = [[] for _ in range(self.workers)]
+        for position, doc in enumerate(documents):
+            shards[shard_of(doc, self.workers)].append((position, doc))
+        return [(shard, self.executor.submit(_chunk_shard, [doc for _, doc in shard])) for shard in shards if shard]
+
+    def split_documents_grouped(self, documents):
+        """Chunk `documents` across the pool; one list of (Document, vector) pairs per document, in input order."""
+        return self._collect(documents, self._submit(documents))
+
+    def map_windows(self, windows, ahead=CHUNK_WINDOWS_AHEAD):
+        """
+        Chunk an iterable of document windows, yielding (window, grouped) in input order.
+
+        The shards of up to `ahead` further windows are queued before the
+        current window is collected, so workers keep busy across window
+        boundaries.
+        """
+        pending = deque()
+        for window in windows:
+            window = list(window)
+            pending.append((window, self._submit(window)))
+            if len(pending) > ahead:
+                window, futures = pending.popleft()
+                yield window, self._collect(window, futures)
+        while pending:
+            window, futures = pending.popleft()
+            yield window, self._collect(window, futures)
+
+    def _collect(self, documents, futures):
+        grouped = [None] * len(documents)
+        for shard, future in futures:
+            try:
+                per_doc, tokens, texts = future.result()
+            except Exception as e:
+                print(f"⚠️  Error chunking a shard of {len(shard)} documents: {e}")
+                # Fall back to the original documents; they are embedded at upload time
+                per_doc, tokens, texts = [[(doc, None)] for _, doc in shard], 0, 0
+            self.tokens += tokens
+            self.texts += texts
+            for (position, _), doc_chunks in zip(shard, per_doc):
+                grouped[position] = doc_chunks
+        return grouped
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Speculative retrieval while the supervisor is still routing.
+
+In the supervisor → retrieval agent → response writer workflow nothing is
+retrieved until routing finishes. `speculate` starts the cheapest likely
+retrieval (a dense vector search) on the shared fan-out pool as soon as a
+request arrives. Inside the request, a consumer that would run that same
+search calls `take_speculative` and gets the already-running (often already
+finished) result instead of searching again. If routing picks an agent that
+cannot use it, the speculation is cancelled: it is dropped before it starts
+if possible, otherwise its result is discarded.
+
+The saved latency is the part of the search that overlapped routing, plus
+the whole search for every further consumer.
+"""
+
+import contextvars
+import copy
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from fan_out import shared_executor
+
+# Start a speculative vector search for each request (SPECULATIVE_RETRIEVAL=0 to turn off)
+SPECULATIVE_RETRIEVAL = os.environ.get('SPECULATIVE_RETRIEVAL', '1') != '0'
+
+_current = contextvars.ContextVar('speculative_search', default=None)
+
+
+class SpeculativeSearch:
+    """
+    A search started ahead of routing.
+
+    Args:
+        search (callable): Zero-argument search returning ranked results
+        key: What the search was for (e.g. the query); consumers must ask for the same key
+        limit (int): Results the search returns; consumers may take any prefix
+    """
+
+    def __init__(self, search, key, limit, executor=None):
+        self.key = key
+        self.limit = limit
+        self.started = time.perf_counter()
+        self.search_seconds = None
+        self.saved_seconds = 0.0
+        self.used_by = []
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self.future = (executor or shared_executor()).submit(contextvars.copy_context().run, self._run, search)
+
+    def _run(self, search):
+        # The speculative search must not try to consume itself
+        _current.set(None)
+        start = time.perf_counter()
+        try:
+            return search()
+        finally:
+            self.search_seconds = time.perf_counter() - start
+
+    def take(self, key, limit, consumer=None):
+        """Copy of the first `limit` results if this search matches, waiting for it if still running; else None."""
+        if self.cancelled or key != self.key or limit > self.limit:
+            return None
+        requested_at = time.perf_counter()
+        try:
+            results = self.future.result()
+        except Exception as e:
+            print(f"⚠️  Speculative search failed, searching again: {e}")
+            return None
+        with self._lock:
+            if self.used_by:
+                self.saved_seconds += self.search_seconds
+            else:
+                # Only the part that ran before it was needed is saved
+                self.saved_seconds += min(self.search_seconds, requested_at - self.started)
+            self.used_by.append(consumer)
+        return copy.deepcopy(results[:limit])
+
+    def cancel(self):
+        """Drop an unused speculation (a running search finishes in the background and is discarded)."""
+        with self._lock:
+            if not self.used_by and not self.cancelled:
+                self.cancelled = True
+                self.future.cancel()
+
+    def as_metadata(self):
+        return {
+            'used_by': list(self.used_by),
+            'cancelled': self.cancelled,
+            'search_ms': round(self.search_seconds * 1000, 1) if self.search_seconds is not None else None,
+            'saved_ms': round(self.saved_seconds * 1000, 1),
+        }
+
+
+@contextmanager
+def speculate(search, key, limit, enabled=True, executor=None):
+    """
+    Run `search` speculatively for the duration of a request.
+
+    Yields the SpeculativeSearch (None when disabled); it is cancelled on exit if nobody used it.
+    """
+    if not enabled:
+        yield None
+        return
+    speculation = SpeculativeSearch(search, key, limit, executor)
+    token = _current.set(speculation)
+    try:
+        yield speculation
+    finally:
+        _current.reset(token)
+        speculation.cancel()
+
+
+def current_speculation():
+    return _current.get()
+
+
+def take_speculative(key, limit, consumer=None):
+    """Result of the current request's speculative search for `key`, or None to search normally."""
+    speculation = _current.get()
+    return speculation.take(key, limit, consumer) if speculation is not None else None
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Token-aware splitting of oversized tickets for the plain uploader.
+
+Instead of cutting every ticket at a fixed character count, tickets are
+measured with the embedding model's tokenizer. Anything longer than
+EMBED_WINDOW_TOKENS is split into overlapping token windows (sharing
+EMBED_WINDOW_OVERLAP tokens), so no text is dropped and no single input can
+exceed the model's context limit (8191 tokens for text-embedding-3-*).
+
+Every window is stored as its own point. Window 0 keeps the ticket's point
+id; later windows get a stable UUID derived from it. All windows carry
+`parent_id`, `window_index` and `window_count` so search results can be
+collapsed back to one hit per ticket (`collapse_windows`,
+`search_distinct_tickets`).
+"""
+
+import os
+import uuid
+
+import tiktoken
+
+from multi_query_search import ticket_key
+
+EMBED_WINDOW_TOKENS = int(os.environ.get('EMBED_WINDOW_TOKENS', 8000))
+EMBED_WINDOW_OVERLAP = int(os.environ.get('EMBED_WINDOW_OVERLAP', 200))
+
+WINDOW_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'cuttlefish3/token-window')
+
+
+class TokenWindowSplitter:
+    """Split text into overlapping windows of at most `max_tokens` tokens."""
+
+    def __init__(self, model, max_tokens=EMBED_WINDOW_TOKENS, overlap=EMBED_WINDOW_OVERLAP):
+        if not 0 <= overlap < max_tokens:
+            raise ValueError(f"Window overlap ({overlap}) must be smaller than the window size ({max_tokens})")
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding('cl100k_base')
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.split_tickets = 0
+        self.windows = 0
+
+    def _encode(self, text):
+        # Tickets can legitimately contain strings like '<|endoftext|>'
+        return self.encoding.encode(text, disallowed_special=())
+
+    def count(self, text):
+        return len(self._encode(text))
+
+    def split(self, text):
+        """Return the list of window texts; a short text comes back as a single window."""
+        tokens = self._encode(text)
+        if len(tokens) <= self.max_tokens:
+            return [text]
+        windows = []
+        stride = self.max_tokens - self.overlap
+        start = 0
+        while True:
+            windows.append(self.encoding.decode(tokens[start:start + self.max_tokens]))
+            if start + self.max_tokens >= len(tokens):
+                break
+            start += stride
+        self.split_tickets += 1
+        self.windows += len(windows)
+        return windows
+
+    def summary(self):
+        return (f"Split {self.split_tickets} oversized tickets into {self.windows} windows "
+                f"of <= {self.max_tokens} tokens ({self.overlap} overlap)")
+
+
+def window_point_id(parent_id, window_index):
+    """Point id for one window: the ticket's own id for window 0, a stable UUID otherwise."""
+    if window_index == 0:
+        return parent_id
+    return str(uuid.uuid5(WINDOW_NAMESPACE, f"{parent_id}#{window_index}"))
+
+
+def window_payload(payload, parent_id, window_index, window_count, text):
+    """Copy of the ticket payload for one window, with `content` set to the window text."""
+    payload = dict(payload)
+    payload['content'] = text
+    payload['parent_id'] = parent_id
+    payload['window_index'] = window_index
+    payload['window_count'] = window_count
+    return payload
+
+
+def collapse_windows(hits, limit):
+    """Keep the best-scoring hit per ticket (hits best first); tickets may be stored as several windows or chunks."""
+    collapsed, seen = [], set()
+    for hit in hits:
+        ticket = ticket_key(hit)
+        if ticket in seen:
+            continue
+        seen.add(ticket)
+        collapsed.append(hit)
+        if len(collapsed) >= limit:
+            break
+    return collapsed
+
+
+def search_distinct_tickets(search, limit, max_fetch=1000):
+    """
+    Call `search(n)` (n hits, best first) with a growing over-fetch until the hits hold `limit` tickets.
+
+    A ticket with many token windows can fill a fixed `limit * 2` over-fetch on its own, so the fetch
+    doubles until there are `limit` distinct tickets, the collection runs out of hits, or `max_fetch`.
+    """
+    fetch = limit * 2
+    while True:
+        hits = search(fetch)
+        collapsed = collapse_windows(hits, limit)
+        if len(collapsed) >= limit or len(hits) < fetch or fetch >= max_fetch:
+            return collapsed
+        fetch = min(fetch * 2, max_fetch)
@@ -9,8 +9,20 @@ from qdrant_client import QdrantClient
 import openai
 import argparse
 import os
-from tqdm import tqdm
+from functools import partial
+from itertools import chain
 from dotenv import load_dotenv
+from embedding_pipeline import BatchEmbedder
+from embedding_cache import EmbeddingCache
+from csv_stream import iter_csv_frames
+from delta_sync import SyncState, DeltaTracker, delete_tickets, delete_windows, normalize_id
+from ingest_pipeline import IngestPipeline
+from payload_builder import build_batch
+from payload_schema import create_payload_indexes
+from collection_profiles import PROFILES, COLLECTION_PROFILE, open_collection, ensure_vector_size, mark_indexed
+from token_windows import TokenWindowSplitter, window_point_id, window_payload
+from sparse_vectors import SPARSE_VECTORS, SPARSE_VECTORS_CONFIG, has_sparse_vector, with_sparse_vector
+from upload_journal import UploadJournal
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,97 +32,238 @@ QDRANT_API_KEY = os.environ.get('QDRANT_API_KEY')
 COLLECTION_NAME = os.environ.get('QDRANT_COLLECTION', 'cuttlefish3')
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 OPENAI_EMBED_MODEL = os.environ.get('OPENAI_EMBED_MODEL', 'text-embedding-3-small')
+# Shortened text-embedding-3 output (e.g. 256/512/1024); unset = native 1536
+OPENAI_EMBED_DIMENSIONS = int(os.environ.get('OPENAI_EMBED_DIMENSIONS', 0)) or None
 BATCH_SIZE = int(os.environ.get('BATCH_SIZE', 128))
+CSV_CHUNK_ROWS = int(os.environ.get('CSV_CHUNK_ROWS', 1000))
 MAX_CHARS = 16000  # or lower if you want extra safety
 
 openai.api_key = OPENAI_API_KEY
 
 # --- EMBEDDING FUNCTION ---
-def get_embedding(text, model=OPENAI_EMBED_MODEL):
-    response = openai.embeddings.create(
-        input=text,
-        model=model
-    )
+def get_embedding(text, model=OPENAI_EMBED_MODEL, dimensions=OPENAI_EMBED_DIMENSIONS):
+    if dimensions:
+        response = openai.embeddings.create(input=text, model=model, dimensions=dimensions)
+    else:
+        response = openai.embeddings.create(
+            input=text,
+            model=model
+        )
     return response.data[0].embedding
 
-def safe_text(text):
-    return text[:MAX_CHARS]
+def prepare_rows(frames, splitter=None):
+    """
+    Yield ((point_id, payload, row), text) pairs for the embedder, built a whole frame at a time.
+    
+    `row` is the CSV row the point came from (for the upload journal).
+    With a TokenWindowSplitter, oversized tickets are kept whole and yield one
+    pair per overlapping token window; without one, content is cut at MAX_CHARS.
+    """
+    for frame in frames:
+        point_ids, contents, payloads = build_batch(frame, None if splitter else MAX_CHARS)
+        for row, point_id, content, payload in zip(frame.index.tolist(), point_ids, contents, payloads):
+            windows = splitter.split(content) if splitter else [content]
+            if len(windows) == 1:
+                yield (point_id, payload, row), content
+                continue
+            for i, text in enumerate(windows):
+                yield (window_point_id(point_id, i), window_payload(payload, point_id, i, len(windows), text), row), text
+
+def build_point(record, vector, lexical=False):
+    point_id, payload, _ = record
+    # Payload holds the CSV metadata plus the formatted content for LangChain
+    point = {
+        "id": point_id,
+        "vector": vector,
+        "payload": payload
+    }
+    # Keyword side of hybrid search (see sparse_vectors.py)
+    return with_sparse_vector(point, payload['content']) if lexical else point
+
+def journal_entry(record):
+    """Dead-letter entry for one record; the payload's `content` is the embedded text."""
+    point_id, payload, row = record
+    return {"id": point_id, "position": row, "payload": payload, "text": payload['content']}
+
+def from_journal_entry(entry):
+    return (entry['id'], entry['payload'], entry['position']), entry['text']
+
+def replay_dead_letters(client, journal, csv_path, use_cache=True, dimensions=OPENAI_EMBED_DIMENSIONS):
+    """Re-embed and upsert only the dead-lettered records; the CSV is not read again."""
+    records = journal.replay_records()
+    if not records:
+        print("No dead-lettered rows to replay.")
+        return
+    if not client.collection_exists(COLLECTION_NAME):
+        print(f"Collection '{COLLECTION_NAME}' does not exist; run a full upload first.")
+        return
+    try:
+        ensure_vector_size(client, COLLECTION_NAME, len(get_embedding(records[0][1], dimensions=dimensions)))
+    except ValueError as e:
+        print(e)
+        return
+    print(f"Replaying {len(records)} dead-lettered points from {journal.dead_letter_path} ...")
+    
+    cache = EmbeddingCache(OPENAI_EMBED_MODEL, dimensions) if use_cache else None
+    embedder = BatchEmbedder(OPENAI_EMBED_MODEL, cache=cache, dimensions=dimensions)
+    journal.start(csv_path, replay=True)
+    pipeline = IngestPipeline(client, COLLECTION_NAME, BATCH_SIZE)
+    lexical = has_sparse_vector(client, COLLECTION_NAME)
+    uploaded, failures = pipeline.run(records, embedder.embed_stream, partial(build_point, lexical=lexical),
+                                      journal=journal)
+    journal.finish(uploaded, failures)
+    if uploaded:
+        mark_indexed(client, COLLECTION_NAME)
+    # Whatever failed again was dead-lettered by this run; everything else is done
+    remaining = journal.clear_dead_letters(keep_run=journal.run_id)
+    print(f"Replay complete: {uploaded} points upserted, {remaining} still dead-lettered.")
+    if cache:
+        cache.close()
 
 # --- MAIN SCRIPT ---
-def main(csv_path, start_line=0):
+def main(csv_path, start_line=0, use_cache=True, incremental=False, profile=COLLECTION_PROFILE,
+         dimensions=OPENAI_EMBED_DIMENSIONS, resume=False, replay_failures=False, sparse=SPARSE_VECTORS):
     print(f"Connecting to Qdrant at {QDRANT_URL} ...")
     client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    journal = UploadJournal(COLLECTION_NAME, journal_entry, from_journal_entry)
+    
+    if replay_failures:
+        replay_dead_letters(client, journal, csv_path, use_cache, dimensions)
+        return
+    
+    if resume and incremental:
+        # The high-water mark only advances after a clean run, so a re-run already retries everything
+        print("Ignoring --resume: just re-run --incremental.")
+    elif resume:
+        checkpoint = journal.resume_point(csv_path)
+        if checkpoint is None:
+            print(f"Nothing to resume: no interrupted run over {csv_path} in {journal.path}.")
+            return
+        start_line = checkpoint[1]
+        print(f"Resuming from row {start_line} (last committed batch in {journal.path})")
+    
     print(f"Ensuring collection '{COLLECTION_NAME}' exists ...")
     
+    if incremental:
+        if not client.collection_exists(COLLECTION_NAME):
+            print(f"Collection '{COLLECTION_NAME}' does not exist; run a full upload first.")
+            return
+        if start_line:
+            print("Ignoring start_line: incremental mode needs the whole export to detect deletions.")
+            start_line = 0
+        create_payload_indexes(client, COLLECTION_NAME)
+        state = SyncState.load(COLLECTION_NAME) or SyncState.bootstrap(client, COLLECTION_NAME)
+        print(f"Incremental sync from high-water mark {state.high_water_mark} ({len(state.ids)} tickets indexed)")
+    else:
+        state = SyncState(COLLECTION_NAME)
+    tracker = DeltaTracker(state, incremental=incremental)
+    
+    # Stream the CSV in fixed-size frames so memory does not grow with the corpus
+    print(f"Streaming CSV: {csv_path} (from row {start_line}, {CSV_CHUNK_ROWS} rows per read)")
+    frames = iter_csv_frames(csv_path, CSV_CHUNK_ROWS, start_line)
+    first_frame = next(frames, None)
+    if first_frame is None:
+        print("No rows to process.")
+        return
+    frames = chain([first_frame], frames)
+    
     # Get embedding dimension from OpenAI model metadata (first call)
-    print(f"Reading CSV: {csv_path}")
-    df = pd.read_csv(csv_path, low_memory=False)
-    print(f"Loaded {len(df)} rows.")
-    df['title'] = df['title'].fillna("")
-    df['description'] = df['description'].fillna("")
-    
-    # Get embedding dimension
-    sample_text = df.iloc[0]['title'] + ' ' + df.iloc[0]['description']
-    emb_dim = len(get_embedding(sample_text))
-    client.recreate_collection(
-        collection_name=COLLECTION_NAME,
-        vectors_config={"size": emb_dim, "distance": "Cosine"}
-    )
+    first_row = first_frame.iloc[0]
+    sample_text = f"{first_row['title'] if pd.notna(first_row['title']) else ''} {first_row['description'] if pd.notna(first_row['description']) else ''}"
+    emb_dim = len(get_embedding(sample_text, dimensions=dimensions))
     
-    points = []
-    for idx, row in tqdm(df.iloc[start_line:].iterrows(), total=len(df)-start_line):
-        # Create the content field that LangChain expects
-        title = row['title'].strip()
-        description = row['description'].strip()
-        
-        # Format content as "Title: X\n\nDescription: Y" for better RAG performance
-        if title and description:
-            content = f"Title: {title}\n\nDescription: {description}"
-        elif title:
-            content = f"Title: {title}"
-        elif description:
-            content = f"Description: {description}"
-        else:
-            content = "No content available"
-        
-        # Limit content length for embedding
-        content = safe_text(content)
-        
+    if incremental:
+        # Never mix vector sizes in one collection
         try:
-            vector = get_embedding(content)
-        except Exception as e:
-            print(f"Skipping row {row.get('id', idx+start_line)} due to embedding error: {e}")
-            continue
-        
-        # Create payload with content field and metadata
-        payload = row.drop(['title', 'description']).to_dict()
-        payload['content'] = content  # Add the formatted content for LangChain
-        payload['title'] = title      # Keep original title for metadata
-        payload['description'] = description  # Keep original description for metadata
-        
-        points.append({
-            "id": int(row['id']) if not pd.isnull(row['id']) else idx+start_line,
-            "vector": vector,
-            "payload": payload
-        })
-        
-        if len(points) >= BATCH_SIZE:
-            try:
-                client.upsert(collection_name=COLLECTION_NAME, points=points)
-            except Exception as e:
-                print(f"Upsert failed at batch starting with row {idx+start_line}: {e}")
-            points = []
-    
-    if points:
+            ensure_vector_size(client, COLLECTION_NAME, emb_dim)
+        except ValueError as e:
+            print(e)
+            return
+    else:
+        # Point ids are ticket ids, so a resumed run (start_line > 0) upserts into the existing collection
         try:
-            client.upsert(collection_name=COLLECTION_NAME, points=points)
-        except Exception as e:
-            print(f"Final upsert failed: {e}")
-    print("Upload complete.")
+            open_collection(client, COLLECTION_NAME, emb_dim, profile, recreate=start_line == 0,
+                            sparse_vectors=SPARSE_VECTORS_CONFIG if sparse else None)
+        except ValueError as e:
+            print(e)
+            return
+        # Index the filterable metadata up front so filtered search doesn't scan payloads
+        create_payload_indexes(client, COLLECTION_NAME)
+    
+    # Sparse vectors can only be written if the collection was created with them
+    lexical = sparse and has_sparse_vector(client, COLLECTION_NAME)
+    if sparse and not lexical:
+        print(f"Collection '{COLLECTION_NAME}' has no sparse lexical vector; rebuild it to enable hybrid search.")
+    
+    def changed_frames():
+        # Only new or modified tickets reach the embedder in incremental mode
+        for frame in frames:
+            frame = tracker.filter_frame(frame)
+            if incremental and len(frame):
+                # A modified ticket may now need fewer token windows; drop its old ones first
+                delete_windows(client, COLLECTION_NAME, [normalize_id(i) for i in frame['id']])
+            yield frame
+    
+    cache = EmbeddingCache(OPENAI_EMBED_MODEL, dimensions) if use_cache else None
+    splitter = TokenWindowSplitter(OPENAI_EMBED_MODEL)
+    embedder = BatchEmbedder(OPENAI_EMBED_MODEL, cache=cache, dimensions=dimensions, token_counter=splitter.count)
+    print(f"Embedding with batch size {embedder.batch_size} and {embedder.max_workers} concurrent requests")
+    
+    def skip_row(record, error):
+        print(f"Skipping row {record[0]} due to embedding error: {error}")
+    
+    # CSV parsing, embedding and upserts run as overlapping pipeline stages
+    journal.start(csv_path, start_row=start_line, incremental=incremental)
+    pipeline = IngestPipeline(client, COLLECTION_NAME, BATCH_SIZE)
+    uploaded, failures = pipeline.run(
+        prepare_rows(changed_frames(), splitter),
+        embedder.embed_stream,
+        partial(build_point, lexical=lexical),
+        on_error=skip_row,
+        journal=journal
+    )
+    journal.finish(uploaded, failures)
+    
+    removed = tracker.removed_ids() if incremental else set()
+    if removed:
+        print(f"Deleting {len(removed)} tickets no longer in the export ...")
+        delete_tickets(client, COLLECTION_NAME, removed)
+    if uploaded or removed:
+        # Invalidates answers cached against the previous contents
+        mark_indexed(client, COLLECTION_NAME)
+    
+    if failures:
+        # Keep the old high-water mark so the next run retries these tickets
+        print(f"{failures} tickets failed; sync state not advanced.")
+    elif start_line == 0:
+        tracker.commit()
+        print(f"Sync state saved: high-water mark {tracker.max_updated}, {len(tracker.seen_ids)} tickets")
+    
+    print(f"Upload complete: {uploaded} points upserted.")
+    print(journal.summary())
+    if failures:
+        print("Re-run with --replay-failures to retry only the dead-lettered rows.")
+    if incremental:
+        print(f"Incremental sync: {len(tracker.changed_ids)} new/modified, {len(removed)} deleted, "
+              f"{len(tracker.seen_ids) - len(tracker.changed_ids)} unchanged")
+    print(embedder.summary())
+    print(splitter.summary())
+    if cache:
+        print(cache.summary())
+        cache.close()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Upload Jira CSV to Qdrant using OpenAI embeddings.")
     parser.add_argument('csv_path', help='Path to JIRA_OPEN_DATA_ALL.csv')
     parser.add_argument('start_line', nargs='?', type=int, default=0, help='Row index to start from (default: 0)')
+    parser.add_argument('--no-embedding-cache', action='store_true', help='Re-embed everything instead of using the on-disk embedding cache')
+    parser.add_argument('--incremental', action='store_true', help='Only upsert tickets updated since the last run and delete removed ones')
+    parser.add_argument('--profile', choices=list(PROFILES), default=COLLECTION_PROFILE, help=f'Quantization/HNSW profile for a new collection (default: {COLLECTION_PROFILE})')
+    parser.add_argument('--dimensions', type=int, default=OPENAI_EMBED_DIMENSIONS, help='Shortened embedding size, e.g. 256/512/1024 (default: OPENAI_EMBED_DIMENSIONS or native)')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted run from its last committed batch (see upload_journal.py)')
+    parser.add_argument('--replay-failures', action='store_true', help='Only re-process the rows in the dead-letter file')
+    parser.add_argument('--no-sparse', action='store_true', help='Create the collection without sparse lexical vectors (no hybrid search)')
     args = parser.parse_args()
-    main(args.csv_path, args.start_line) 
+    main(args.csv_path, args.start_line, use_cache=not args.no_embedding_cache, incremental=args.incremental,
+         profile=args.profile, dimensions=args.dimensions, resume=args.resume, replay_failures=args.replay_failures,
+         sparse=SPARSE_VECTORS and not args.no_sparse)
@@ -7,17 +7,28 @@ This script processes JIRA CSV data, applies semantic chunking to create
 more coherent document chunks, and uploads them to Qdrant with embeddings.
 """
 
-import pandas as pd
 from qdrant_client import QdrantClient
 import openai
 import argparse
 import os
+from functools import partial
+from itertools import chain
 from tqdm import tqdm
 from dotenv import load_dotenv
-import csv
 from langchain_core.documents import Document
-from langchain_experimental.text_splitter import SemanticChunker
 from langchain_openai import OpenAIEmbeddings
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from semantic_chunking import (VectorSemanticChunker, ShardedChunker, TokenMeter, CHUNK_VECTORS,
+                               CHUNK_VECTOR_MODES, CHUNK_WORKERS, chunk_point_id)
+from csv_stream import iter_csv_rows, batched
+from delta_sync import SyncState, DeltaTracker, delete_tickets, delete_stale_chunks, normalize_id
+from ingest_pipeline import IngestPipeline, map_embed_stream, batch_embed_stream
+from payload_builder import clean_payload
+from payload_schema import create_payload_indexes, normalize_dates
+from collection_profiles import PROFILES, COLLECTION_PROFILE, open_collection, ensure_vector_size, mark_indexed
+from upload_journal import UploadJournal
+from combined_collection import COMBINED_VECTORS, ticket_point_id, combined_point
+from sparse_vectors import SPARSE_VECTORS, SPARSE_VECTORS_CONFIG, has_sparse_vector, with_sparse_vector
 
 # Load environment variables from .env file
 load_dotenv()
@@ -28,8 +39,13 @@ QDRANT_API_KEY = os.environ.get('QDRANT_API_KEY')
 COLLECTION_NAME = os.environ.get('QDRANT_COLLECTION', 'cuttlefish3')
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 OPENAI_EMBED_MODEL = os.environ.get('OPENAI_EMBED_MODEL', 'text-embedding-3-small')
+OPENAI_EMBED_DIMENSIONS = int(os.environ.get('OPENAI_EMBED_DIMENSIONS', 0)) or None  # None = native size
 BATCH_SIZE = int(os.environ.get('BATCH_SIZE', 128))
+STREAM_DOCS = int(os.environ.get('STREAM_DOCS', 500))  # Documents chunked and uploaded per window
 MAX_CHARS = 16000  # Maximum characters per chunk for safety
+# chunks: one point per semantic chunk; combined: one point per ticket with ticket + chunk vectors
+COLLECTION_LAYOUT = os.environ.get('COLLECTION_LAYOUT', 'chunks')
+COLLECTION_LAYOUTS = ('chunks', 'combined')
 
 # Set OpenAI API key
 openai.api_key = OPENAI_API_KEY
@@ -38,6 +54,80 @@ def safe_text(text):
     """Truncate text to safe length for embedding."""
     return text[:MAX_CHARS] if text else ""
 
+def iter_jira_documents(csv_path, max_docs=None, start_line=0, start_row=0):
+    """
+    Stream JIRA documents from a CSV file without holding the whole corpus in memory.
+    
+    Args:
+        csv_path (str): Path to JIRA CSV file
+        max_docs (int, optional): Stop after this many documents (counted from the first document)
+        start_line (int): Number of leading documents to skip without building them
+        start_row (int): Also skip CSV rows before this index (where --resume picks up)
+    
+    Yields:
+        Document: LangChain Document objects with JIRA metadata
+    """
+    doc_index = 0
+    missing_ids = 0
+    
+    for i, row in iter_csv_rows(csv_path):
+        if max_docs and doc_index >= max_docs:
+            break
+        
+        title = (row.get('title') or '').strip()
+        description = (row.get('description') or '').strip()
+        
+        # Skip empty entries
+        if not title and not description:
+            continue
+        
+        # Point ids are derived from the ticket id; id-less rows would all
+        # land on the same points and overwrite each other
+        ticket_id = normalize_id(row.get('id'))
+        if ticket_id is None:
+            missing_ids += 1
+            continue
+        
+        doc_index += 1
+        if doc_index <= start_line or i < start_row:
+            # Already uploaded by a previous run; don't materialize it
+            continue
+            
+        # Create combined content for better chunking
+        if title and description:
+            content = f"Title: {title}\n\nDescription: {description}"
+        elif title:
+            content = f"Title: {title}"
+        else:
+            content = f"Description: {description}"
+        
+        # Create document with JIRA metadata
+        yield Document(
+            page_content=content,
+            metadata={
+                "id": ticket_id,
+                "key": row.get('key', ''),
+                "project": row.get('project', ''),
+                "project_name": row.get('project_name', ''),
+                "priority": row.get('priority', ''),
+                "type": row.get('type', ''),
+                "status": row.get('status', ''),
+                "created": row.get('created', ''),
+                "resolved": row.get('resolved', ''),
+                "updated": row.get('updated', ''),
+                "component": row.get('component', ''),
+                "version": row.get('version', ''),
+                "reporter": row.get('reporter', ''),
+                "assignee": row.get('assignee', ''),
+                "title": title,
+                "description_length": len(description),
+                "original_row_index": i
+            }
+        )
+    
+    if missing_ids:
+        print(f"⚠️  Skipped {missing_ids} rows without a ticket id")
+
 def load_jira_documents(csv_path, max_docs=None):
     """
     Load JIRA documents from CSV file.
@@ -50,249 +140,532 @@ def load_jira_documents(csv_path, max_docs=None):
         list: List of LangChain Document objects
     """
     print(f"Loading JIRA documents from: {csv_path}")
-    
-    # Set CSV field size limit for large JIRA descriptions
-    csv.field_size_limit(10000000)
-    
-    documents = []
-    
-    with open(csv_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        
-        for i, row in enumerate(reader):
-            title = row.get('title', '').strip()
-            description = row.get('description', '').strip()
-            
-            # Skip empty entries
-            if not title and not description:
-                continue
-                
-            # Create combined content for better chunking
-            if title and description:
-                content = f"Title: {title}\n\nDescription: {description}"
-            elif title:
-                content = f"Title: {title}"
-            else:
-                content = f"Description: {description}"
-            
-            # Create document with JIRA metadata
-            doc = Document(
-                page_content=content,
-                metadata={
-                    "id": row.get('id', i),
-                    "key": row.get('key', ''),
-                    "project": row.get('project', ''),
-                    "project_name": row.get('project_name', ''),
-                    "priority": row.get('priority', ''),
-                    "type": row.get('type', ''),
-                    "status": row.get('status', ''),
-                    "created": row.get('created', ''),
-                    "resolved": row.get('resolved', ''),
-                    "updated": row.get('updated', ''),
-                    "component": row.get('component', ''),
-                    "version": row.get('version', ''),
-                    "reporter": row.get('reporter', ''),
-                    "assignee": row.get('assignee', ''),
-                    "title": title,
-                    "description_length": len(description),
-                    "original_row_index": i
-                }
-            )
-            
-            documents.append(doc)
-            
-            # Limit documents if specified
-            if max_docs and len(documents) >= max_docs:
-                break
-    
+    documents = list(iter_jira_documents(csv_path, max_docs))
     print(f"✅ Loaded {len(documents)} JIRA documents")
     return documents
 
-def create_semantic_chunks(documents, embeddings_model):
+# Same chunker config as the notebook
+CHUNKER_CONFIG = {'breakpoint_threshold_type': 'percentile'}
+
+def build_embeddings(model=OPENAI_EMBED_MODEL, dimensions=OPENAI_EMBED_DIMENSIONS, use_cache=True):
+    """
+    Embeddings used for chunking: (embeddings, TokenMeter, EmbeddingCache or None).
+    
+    Module-level so chunking worker processes can build their own copy.
+    """
+    # Count the tokens that actually reach the API (cache misses only)
+    meter = TokenMeter(OpenAIEmbeddings(model=model, dimensions=dimensions), model)
+    embeddings = meter
+    cache = None
+    if use_cache:
+        # Shared with upload_jira_csv_to_qdrant.py; covers chunker sentence embeddings too
+        cache = EmbeddingCache(model, dimensions)
+        embeddings = CachedEmbeddings(embeddings, cache)
+    return embeddings, meter, cache
+
+def label_chunks(doc_chunks):
+    """Add chunk metadata to the (chunk, vector) pairs of one ticket."""
+    for j, (chunk, _) in enumerate(doc_chunks):
+        chunk.metadata["chunk_id"] = f"{chunk.metadata.get('id')}_{j}"
+        chunk.metadata["chunk_index"] = j
+        chunk.metadata["total_chunks"] = len(doc_chunks)
+        chunk.metadata["chunking_method"] = "semantic"
+    return doc_chunks
+
+def create_semantic_chunks(documents, embeddings_model, chunk_vectors=CHUNK_VECTORS, pool=None, grouped=False,
+                           per_document=None):
     """
     Apply semantic chunking to JIRA documents.
     
     Args:
         documents (list): List of LangChain Document objects
         embeddings_model: OpenAI embeddings model
+        chunk_vectors (str): 'pooled' (reuse sentence embeddings) or 'embedded' (batch-embed chunks)
+        pool (ShardedChunker, optional): Chunk in worker processes instead of in this one
+        grouped (bool): Return one list of pairs per document instead of a flat list
+        per_document (list, optional): Chunks already computed for `documents` (ShardedChunker.map_windows);
+            only labelled here
     
     Returns:
-        list: List of semantically chunked documents
+        list: (chunk Document, vector) pairs; vector is None for documents that failed to chunk.
+        chunk_index / total_chunks are counted per ticket.
     """
     print("Creating semantic chunks...")
     
-    # Initialize semantic chunker with same config as notebook
-    semantic_chunker = SemanticChunker(
-        embeddings_model,
-        breakpoint_threshold_type="percentile"
-    )
-    
     # Apply semantic chunking
     print(f"Processing {len(documents)} documents for semantic chunking...")
     chunked_documents = []
     
     # Process in smaller batches to manage memory and API calls
     batch_size = 50
-    for i in tqdm(range(0, len(documents), batch_size), desc="Chunking batches"):
-        batch = documents[i:i + batch_size]
-        try:
-            batch_chunks = semantic_chunker.split_documents(batch)
-            
-            # Add chunk metadata
-            for j, chunk in enumerate(batch_chunks):
-                chunk.metadata["chunk_id"] = f"{chunk.metadata.get('id', i)}_{j}"
-                chunk.metadata["chunk_index"] = j
-                chunk.metadata["total_chunks"] = len(batch_chunks)
-                chunk.metadata["chunking_method"] = "semantic"
-            
-            chunked_documents.extend(batch_chunks)
-            
-        except Exception as e:
-            print(f"⚠️  Error chunking batch {i//batch_size + 1}: {e}")
-            # Fall back to original documents for this batch
-            chunked_documents.extend(batch)
+    if per_document is None and pool is not None:
+        # Shards are chunked in parallel and merged back in document order
+        per_document = pool.split_documents_grouped(documents)
+    elif per_document is None:
+        semantic_chunker = VectorSemanticChunker(embeddings_model, chunk_vectors=chunk_vectors, **CHUNKER_CONFIG)
+        per_document = []
+        for i in tqdm(range(0, len(documents), batch_size), desc="Chunking batches"):
+            batch = documents[i:i + batch_size]
+            try:
+                per_document.extend(semantic_chunker.split_documents_grouped(batch))
+            except Exception as e:
+                print(f"⚠️  Error chunking batch {i//batch_size + 1}: {e}")
+                # Fall back to original documents for this batch; they are embedded at upload time
+                per_document.extend([(doc, None)] for doc in batch)
+    
+    for doc_chunks in per_document:
+        chunked_documents.extend(label_chunks(doc_chunks))
     
     print(f"✅ Created {len(chunked_documents)} semantic chunks from {len(documents)} documents")
     print(f"   Average chunks per document: {len(chunked_documents)/len(documents):.2f}")
     
-    return chunked_documents
+    return per_document if grouped else chunked_documents
 
-def upload_to_qdrant(chunks, client, collection_name, embeddings_model):
+def chunk_to_point(record, vector, lexical=False):
+    """Build a Qdrant point for one (point_id, chunk) record, with a sparse lexical vector if `lexical`."""
+    point_id, chunk = record
+    
+    # Prepare payload with metadata
+    # NaN -> None, non-serializable values -> str, dates -> epoch seconds
+    payload = normalize_dates(clean_payload(chunk.metadata))
+    payload['content'] = chunk.page_content
+    payload['content_length'] = len(chunk.page_content)
+    
+    point = {
+        "id": point_id,  # UUID from (ticket id, chunk index, method); see chunk_point_id
+        "vector": vector,
+        "payload": payload
+    }
+    return with_sparse_vector(point, chunk.page_content) if lexical else point
+
+def upload_to_qdrant(chunks, client, collection_name, embeddings_model, recreate=True, profile=COLLECTION_PROFILE,
+                     journal=None, sparse=SPARSE_VECTORS):
     """
     Upload semantic chunks to Qdrant with embeddings.
     
+    Chunk production (the `chunks` iterable), embedding and upserts run as
+    overlapping stages of an IngestPipeline, so `chunks` may be a lazy stream.
+    Chunks that already carry a vector from the chunker are not re-embedded.
+    Point ids are derived from each chunk's ticket id and chunk index, so
+    uploading the same tickets again (a re-run, an overlapping slice or a
+    concurrent shard) overwrites the same points.
+    
     Args:
-        chunks (list): List of chunked documents
+        chunks (iterable): (chunk Document, vector or None) pairs (list or generator)
         client: Qdrant client
         collection_name (str): Name of the collection
         embeddings_model: OpenAI embeddings model
+        recreate (bool): Recreate the collection before uploading; otherwise upsert into it (created if missing)
+        profile (str): Collection profile used when recreating (see collection_profiles)
+        journal (UploadJournal, optional): Checkpoint committed batches and dead-letter failures
+        sparse (bool): Create the collection with, and write, sparse lexical vectors (see sparse_vectors)
+    
+    Returns:
+        tuple: (uploaded_count, failed_count)
     """
-    print(f"Uploading {len(chunks)} chunks to Qdrant collection '{collection_name}'...")
+    chunks = iter(chunks)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return 0, 0
+    chunks = chain([first_chunk], chunks)
+    
+    print(f"Uploading chunks to Qdrant collection '{collection_name}'...")
     
     # Get embedding dimension from first chunk
-    sample_text = safe_text(chunks[0].page_content)
-    sample_embedding = embeddings_model.embed_query(sample_text)
+    sample_chunk, sample_embedding = first_chunk
+    if sample_embedding is None:
+        sample_embedding = embeddings_model.embed_query(safe_text(sample_chunk.page_content))
     emb_dim = len(sample_embedding)
     
-    # Recreate collection with proper vector configuration
-    print(f"Creating collection with vector dimension: {emb_dim}")
-    client.recreate_collection(
-        collection_name=collection_name,
-        vectors_config={"size": emb_dim, "distance": "Cosine"}
+    # Recreate the collection, or reuse it after checking its vector size
+    open_collection(client, collection_name, emb_dim, profile, recreate=recreate,
+                    sparse_vectors=SPARSE_VECTORS_CONFIG if sparse else None)
+    # Index the filterable metadata up front so filtered search doesn't scan payloads
+    create_payload_indexes(client, collection_name)
+    lexical = sparse_vectors_enabled(client, collection_name, sparse)
+    
+    def records():
+        for chunk, vector in chunks:
+            metadata = chunk.metadata
+            point_id = chunk_point_id(normalize_id(metadata.get('id')), metadata['chunk_index'],
+                                      metadata['chunking_method'])
+            yield (point_id, chunk), (safe_text(chunk.page_content), vector)
+    
+    embed_one = map_embed_stream(embeddings_model.embed_query)
+    
+    def embed_stream(records):
+        # Use the chunker's vector when there is one; embed the chunk text otherwise
+        for record, (text, vector) in records:
+            if vector is not None:
+                yield record, vector, None
+            else:
+                yield from embed_one([(record, text)])
+    
+    def report_failure(record, error):
+        print(f"⚠️  Error processing chunk {record[0]}: {error}")
+    
+    pipeline = IngestPipeline(client, collection_name, BATCH_SIZE)
+    total_uploaded, failed_chunks = pipeline.run(
+        records(),
+        embed_stream,
+        partial(chunk_to_point, lexical=lexical),
+        on_error=report_failure,
+        journal=journal
     )
     
-    # Process chunks in batches
-    points = []
-    failed_chunks = 0
-    
-    for i, chunk in enumerate(tqdm(chunks, desc="Processing chunks")):
-        try:
-            # Generate embedding for chunk content
-            text = safe_text(chunk.page_content)
-            vector = embeddings_model.embed_query(text)
-            
-            # Prepare payload with metadata
-            payload = chunk.metadata.copy()
-            payload['content'] = chunk.page_content
-            payload['content_length'] = len(chunk.page_content)
-            
-            # Convert any non-serializable values to strings
-            for key, value in payload.items():
-                if pd.isna(value):
-                    payload[key] = None
-                elif not isinstance(value, (str, int, float, bool, type(None))):
-                    payload[key] = str(value)
-            
-            points.append({
-                "id": i,  # Use sequential ID for chunks
-                "vector": vector,
-                "payload": payload
-            })
-            
-            # Upload batch when reaching batch size
-            if len(points) >= BATCH_SIZE:
-                try:
-                    client.upsert(collection_name=collection_name, points=points)
-                    print(f"   Uploaded batch of {len(points)} chunks")
-                    points = []
-                except Exception as e:
-                    print(f"❌ Batch upload failed at chunk {i}: {e}")
-                    failed_chunks += len(points)
-                    points = []
-            
-        except Exception as e:
-            print(f"⚠️  Error processing chunk {i}: {e}")
-            failed_chunks += 1
-            continue
-    
-    # Upload remaining points
-    if points:
-        try:
-            client.upsert(collection_name=collection_name, points=points)
-            print(f"   Uploaded final batch of {len(points)} chunks")
-        except Exception as e:
-            print(f"❌ Final batch upload failed: {e}")
-            failed_chunks += len(points)
-    
-    total_uploaded = len(chunks) - failed_chunks
-    print(f"✅ Upload complete: {total_uploaded}/{len(chunks)} chunks uploaded successfully")
+    print(f"✅ Upload complete: {total_uploaded}/{total_uploaded + failed_chunks} chunks uploaded successfully")
     if failed_chunks > 0:
         print(f"⚠️  {failed_chunks} chunks failed to upload")
+    
+    return total_uploaded, failed_chunks
+
+# Per-chunk fields that don't belong on a whole-ticket payload
+CHUNK_FIELDS = ('chunk_id', 'chunk_index', 'total_chunks', 'chunking_method')
+TICKET_FIELDS = ('content', 'content_length', 'chunk_count', 'chunking_method')
+
+def ticket_record(doc, doc_chunks):
+    """Combined-layout record for one ticket: ((point_id, payload, chunk_vectors), ticket text)."""
+    metadata = {k: v for k, v in doc.metadata.items() if k not in CHUNK_FIELDS}
+    payload = normalize_dates(clean_payload(metadata))
+    payload['content'] = doc.page_content
+    payload['content_length'] = len(doc.page_content)
+    payload['chunk_count'] = len(doc_chunks)
+    payload['chunking_method'] = "semantic"
+    vectors = [vector for _, vector in doc_chunks]
+    # Unchunked tickets fall back to their ticket vector (see combined_point)
+    chunk_vectors = vectors if all(vector is not None for vector in vectors) else None
+    point_id = ticket_point_id(normalize_id(doc.metadata.get('id')))
+    return (point_id, payload, chunk_vectors), safe_text(doc.page_content)
 
-def main(csv_path, max_docs=None, start_line=0):
+def ticket_to_point(record, vector, lexical=False):
+    point_id, payload, chunk_vectors = record
+    point = combined_point(point_id, payload, vector, chunk_vectors)
+    return with_sparse_vector(point, payload['content']) if lexical else point
+
+def sparse_vectors_enabled(client, collection_name, sparse):
+    """Whether to write sparse vectors: only if wanted and the collection was created with them."""
+    lexical = sparse and has_sparse_vector(client, collection_name)
+    if sparse and not lexical:
+        print(f"⚠️  Collection '{collection_name}' has no sparse lexical vector; rebuild it to enable hybrid search")
+    return lexical
+
+def upload_combined(tickets, client, collection_name, embeddings_model, recreate=True, profile=COLLECTION_PROFILE,
+                    journal=None, sparse=SPARSE_VECTORS):
+    """
+    Upload tickets to a combined-layout collection (see combined_collection).
+    
+    Each ticket's whole text is embedded for the `ticket` vector (in batches;
+    the embedding cache is shared with upload_jira_csv_to_qdrant.py) and its
+    chunk vectors become the `chunks` multivector. Point ids are ticket ids,
+    so re-uploading a ticket replaces both representations at once.
+    
+    Args:
+        tickets (iterable): (Document, [(chunk Document, vector), ...]) per ticket
+        Other arguments as for upload_to_qdrant
+    
+    Returns:
+        tuple: (uploaded_tickets, failed_tickets)
+    """
+    records = (ticket_record(doc, doc_chunks) for doc, doc_chunks in tickets)
+    first_record = next(records, None)
+    if first_record is None:
+        return 0, 0
+    
+    print(f"Uploading tickets to combined Qdrant collection '{collection_name}'...")
+    (_, _, sample_vectors), sample_text = first_record
+    sample_vector = sample_vectors[0] if sample_vectors else embeddings_model.embed_query(sample_text)
+    open_collection(client, collection_name, len(sample_vector), profile, recreate=recreate,
+                    named_vectors=COMBINED_VECTORS, sparse_vectors=SPARSE_VECTORS_CONFIG if sparse else None)
+    create_payload_indexes(client, collection_name)
+    lexical = sparse_vectors_enabled(client, collection_name, sparse)
+    
+    def report_failure(record, error):
+        print(f"⚠️  Error processing ticket {record[0]}: {error}")
+    
+    pipeline = IngestPipeline(client, collection_name, BATCH_SIZE)
+    uploaded, failed = pipeline.run(
+        chain([first_record], records),
+        batch_embed_stream(embeddings_model.embed_documents),
+        partial(ticket_to_point, lexical=lexical),
+        on_error=report_failure,
+        journal=journal
+    )
+    
+    print(f"✅ Upload complete: {uploaded}/{uploaded + failed} tickets uploaded successfully")
+    return uploaded, failed
+
+def journal_entry(record):
+    """Dead-letter entry for one (point_id, chunk) record."""
+    point_id, chunk = record
+    return {
+        "id": point_id,
+        "position": chunk.metadata.get('original_row_index'),
+        "metadata": chunk.metadata,
+        "content": chunk.page_content,
+        "text": safe_text(chunk.page_content)
+    }
+
+def from_journal_entry(entry):
+    """Rebuild the (chunk, vector) pair; replayed chunks are embedded again at upload time."""
+    return Document(page_content=entry['content'], metadata=entry['metadata']), None
+
+def ticket_journal_entry(record):
+    """Dead-letter entry for one combined-layout ticket; chunk vectors are recomputed on replay."""
+    point_id, payload, _ = record
+    return {
+        "id": point_id,
+        "position": payload.get('original_row_index'),
+        "payload": payload,
+        "text": safe_text(payload['content'])
+    }
+
+def from_ticket_journal_entry(entry):
+    """Rebuild the ticket Document so a replay can chunk it again."""
+    payload = entry['payload']
+    metadata = {k: v for k, v in payload.items() if k not in TICKET_FIELDS}
+    return Document(page_content=payload['content'], metadata=metadata)
+
+def replay_dead_letters(client, journal, csv_path, embeddings, layout=COLLECTION_LAYOUT, chunk_vectors=CHUNK_VECTORS):
+    """Re-embed and upsert only the dead-lettered records; the CSV is not read again."""
+    items = journal.replay_records()
+    if not items:
+        print("✅ No dead-lettered records to replay")
+        return
+    if not client.collection_exists(COLLECTION_NAME):
+        print(f"❌ Collection '{COLLECTION_NAME}' does not exist; run a full upload first")
+        return
+    print(f"🔁 Replaying {len(items)} dead-lettered records from {journal.dead_letter_path}")
+    journal.start(csv_path, replay=True)
+    try:
+        if layout == 'combined':
+            # Tickets are chunked again: chunk vectors are not kept in the dead-letter file
+            grouped = create_semantic_chunks(items, embeddings, chunk_vectors, grouped=True)
+            uploaded, failed = upload_combined(zip(items, grouped), client, COLLECTION_NAME, embeddings,
+                                               recreate=False, journal=journal)
+        else:
+            uploaded, failed = upload_to_qdrant(items, client, COLLECTION_NAME, embeddings, recreate=False,
+                                                journal=journal)
+    except ValueError as e:
+        # Vector size mismatch with the existing collection
+        print(f"❌ {e}")
+        return
+    journal.finish(uploaded, failed)
+    if uploaded:
+        mark_indexed(client, COLLECTION_NAME)
+    # Whatever failed again was dead-lettered by this run; everything else is done
+    remaining = journal.clear_dead_letters(keep_run=journal.run_id)
+    print(f"🔁 Replay complete: {uploaded} points upserted, {remaining} still dead-lettered")
+
+def main(csv_path, max_docs=None, start_line=0, use_cache=True, incremental=False, profile=COLLECTION_PROFILE,
+         dimensions=OPENAI_EMBED_DIMENSIONS, chunk_vectors=CHUNK_VECTORS, chunk_workers=CHUNK_WORKERS,
+         resume=False, replay_failures=False, layout=COLLECTION_LAYOUT, sparse=SPARSE_VECTORS):
     """
     Main function to process JIRA CSV and upload semantic chunks to Qdrant.
     
     Args:
         csv_path (str): Path to JIRA CSV file
         max_docs (int, optional): Maximum number of documents to process
-        start_line (int): Row index to start from (for resuming)
+        start_line (int): Row index to start from (for resuming or sharding)
+        use_cache (bool): Serve unchanged text from the on-disk embedding cache
+        incremental (bool): Only index tickets updated since the last sync and delete removed ones
+        profile (str): Collection profile for a full rebuild (see collection_profiles)
+        dimensions (int, optional): Shortened embedding size for text-embedding-3 models
+        chunk_vectors (str): 'pooled' or 'embedded' chunk vectors (see semantic_chunking)
+        chunk_workers (int): Processes to shard semantic chunking across (1 = chunk in this process)
+        resume (bool): Continue the last interrupted run over `csv_path` from its journal
+        replay_failures (bool): Only re-upload the chunks in the dead-letter file
+        layout (str): 'chunks' (one point per chunk) or 'combined' (one point per ticket, see combined_collection)
+        sparse (bool): Also write sparse lexical vectors for hybrid search (see sparse_vectors)
     """
     print("🚀 Starting JIRA CSV to Qdrant upload with Semantic Chunking")
     print(f"   CSV Path: {csv_path}")
     print(f"   Max Docs: {max_docs or 'All'}")
     print(f"   Start Line: {start_line}")
+    print(f"   Mode: {'Incremental' if incremental else 'Full rebuild'}")
     print(f"   Qdrant URL: {QDRANT_URL}")
     print(f"   Collection: {COLLECTION_NAME}")
-    print(f"   Embedding Model: {OPENAI_EMBED_MODEL}")
+    print(f"   Embedding Model: {OPENAI_EMBED_MODEL} ({dimensions or 'native'} dimensions)")
     print(f"   Batch Size: {BATCH_SIZE}")
+    print(f"   Chunk Workers: {chunk_workers}")
+    print(f"   Layout: {layout}")
     
     # Initialize OpenAI embeddings
     print("Initializing OpenAI embeddings...")
-    embeddings = OpenAIEmbeddings(model=OPENAI_EMBED_MODEL)
+    embeddings, meter, cache = build_embeddings(OPENAI_EMBED_MODEL, dimensions, use_cache)
     
     # Connect to Qdrant
     print(f"Connecting to Qdrant...")
     client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+    if layout == 'combined':
+        journal = UploadJournal(COLLECTION_NAME, ticket_journal_entry, from_ticket_journal_entry)
+    else:
+        journal = UploadJournal(COLLECTION_NAME, journal_entry, from_journal_entry)
+    
+    if replay_failures:
+        replay_dead_letters(client, journal, csv_path, embeddings, layout, chunk_vectors)
+        if cache:
+            cache.close()
+        return
     
-    # Load JIRA documents
-    documents = load_jira_documents(csv_path, max_docs)
-    
-    # Apply start_line filtering if specified
+    start_row = 0
+    if resume and incremental:
+        # The high-water mark only advances after a clean run, so a re-run already retries everything
+        print("⚠️  Ignoring --resume: just re-run --incremental")
+    elif resume:
+        checkpoint = journal.resume_point(csv_path)
+        if checkpoint is None:
+            print(f"✅ Nothing to resume: no interrupted run over {csv_path} in {journal.path}")
+            return
+        start, start_row = checkpoint
+        # Keep the interrupted run's slice
+        start_line, max_docs = start['arguments'].get('start_line', 0), start['arguments'].get('max_docs')
+        print(f"⏩ Resuming from CSV row {start_row} (last committed batch in {journal.path})")
+    
+    if incremental:
+        if not client.collection_exists(COLLECTION_NAME):
+            print(f"❌ Collection '{COLLECTION_NAME}' does not exist; run a full upload first")
+            return
+        if start_line or max_docs:
+            print("⚠️  Ignoring --start-line/--max-docs: incremental mode needs the whole export to detect deletions")
+            start_line, max_docs = 0, None
+        try:
+            # Never mix vector sizes in one collection
+            ensure_vector_size(client, COLLECTION_NAME, len(embeddings.embed_query("dimension check")))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        create_payload_indexes(client, COLLECTION_NAME)
+        state = SyncState.load(COLLECTION_NAME) or SyncState.bootstrap(client, COLLECTION_NAME)
+        print(f"🔄 Incremental sync from high-water mark {state.high_water_mark} ({len(state.ids)} tickets indexed)")
+    else:
+        state = SyncState(COLLECTION_NAME)
+    tracker = DeltaTracker(state, incremental=incremental)
+    
+    # Stream documents in windows so memory stays flat regardless of corpus size
+    print(f"Streaming JIRA documents from: {csv_path} ({STREAM_DOCS} documents per window)")
     if start_line > 0:
-        documents = documents[start_line:]
-        print(f"Starting from document {start_line}, processing {len(documents)} documents")
+        print(f"Starting from document {start_line}")
+    
+    # Only new or modified tickets are chunked in incremental mode
+    documents = (
+        doc for doc in iter_jira_documents(csv_path, max_docs, start_line, start_row)
+        if tracker.is_changed(doc.metadata.get('id'), doc.metadata.get('updated'))
+    )
     
-    if not documents:
+    pool = None
+    if chunk_workers > 1:
+        # Each worker process builds its own embeddings client and cache connection
+        pool = ShardedChunker(chunk_workers, build_embeddings, (OPENAI_EMBED_MODEL, dimensions, use_cache),
+                              chunk_vectors=chunk_vectors, **CHUNKER_CONFIG)
+    
+    # Only a full, unsliced run rebuilds the collection; slices and syncs upsert into it
+    recreate = not incremental and not start_line and not max_docs and not start_row
+    replace_existing = not recreate and client.collection_exists(COLLECTION_NAME)
+    
+    total_documents = 0
+    chunk_count = 0
+    chunk_tokens = 0
+    
+    def stream_chunks():
+        """Parse + chunk stage: runs on the pipeline's producer thread."""
+        nonlocal total_documents, chunk_count, chunk_tokens
+        windows = ((window, None) for window in batched(documents, STREAM_DOCS))
+        if pool is not None:
+            # The next window's shards start while the current one finishes
+            windows = pool.map_windows(batched(documents, STREAM_DOCS))
+        for window, per_document in windows:
+            # Create semantic chunks
+            grouped = create_semantic_chunks(window, embeddings, chunk_vectors, pool, grouped=True,
+                                             per_document=per_document)
+            chunks = [pair for doc_chunks in grouped for pair in doc_chunks]
+            total_documents += len(window)
+            chunk_count += len(chunks)
+            chunk_tokens += meter.count(safe_text(chunk.page_content) for chunk, _ in chunks)
+            
+            if layout == 'combined':
+                # One point per ticket; re-uploading it replaces all of its chunk vectors
+                yield from zip(window, grouped)
+                continue
+            
+            if replace_existing and chunks:
+                # A re-uploaded ticket may now split into fewer chunks than before
+                delete_stale_chunks(client, COLLECTION_NAME,
+                                    {chunk.metadata.get('id'): chunk.metadata['total_chunks'] for chunk, _ in chunks})
+            
+            yield from chunks
+    
+    # Upload to Qdrant; a full run recreates the collection first
+    journal.start(csv_path, start_row=start_row, start_line=start_line, max_docs=max_docs, incremental=incremental)
+    upload = upload_combined if layout == 'combined' else upload_to_qdrant
+    try:
+        uploaded, total_failed = upload(
+            stream_chunks(), client, COLLECTION_NAME, embeddings, recreate=recreate, profile=profile, journal=journal,
+            sparse=sparse
+        )
+    except ValueError as e:
+        # Existing collection has another vector size or layout
+        print(f"❌ {e}")
+        if pool is not None:
+            pool.close()
+        return
+    journal.finish(uploaded, total_failed)
+    total_chunks = uploaded + total_failed if layout == 'chunks' else chunk_count
+    tokens_sent = meter.tokens
+    if pool is not None:
+        tokens_sent += pool.tokens
+        pool.close()
+    
+    removed = tracker.removed_ids() if incremental else set()
+    if removed:
+        print(f"🗑️  Deleting {len(removed)} tickets no longer in the export...")
+        delete_tickets(client, COLLECTION_NAME, removed, by_payload=True)
+    if uploaded or removed:
+        # Invalidates answers cached against the previous contents
+        mark_indexed(client, COLLECTION_NAME)
+    
+    if total_failed:
+        # Keep the old high-water mark so the next run retries these tickets
+        print(f"⚠️  {total_failed} points failed; sync state not advanced")
+    elif start_line == 0 and not max_docs and not start_row:
+        tracker.commit()
+        print(f"💾 Sync state saved: high-water mark {tracker.max_updated}, {len(tracker.seen_ids)} tickets")
+    
+    if incremental:
+        print(f"🔄 Incremental sync: {len(tracker.changed_ids)} new/modified, {len(removed)} deleted, "
+              f"{len(tracker.seen_ids) - len(tracker.changed_ids)} unchanged")
+        if not total_documents:
+            if cache:
+                cache.close()
+            return
+    
+    if not total_documents:
         print("❌ No documents to process")
         return
     
-    # Create semantic chunks
-    chunks = create_semantic_chunks(documents, embeddings)
-    
-    if not chunks:
+    if not total_chunks:
         print("❌ No chunks created")
         return
     
-    # Upload to Qdrant
-    upload_to_qdrant(chunks, client, COLLECTION_NAME, embeddings)
-    
     print("🎉 Process completed successfully!")
     print(f"📊 Summary:")
-    print(f"   • Original documents: {len(documents)}")
-    print(f"   • Semantic chunks: {len(chunks)}")
-    print(f"   • Chunk ratio: {len(chunks)/len(documents):.2f}")
+    print(f"   • Original documents: {total_documents}")
+    print(f"   • Semantic chunks: {total_chunks}")
+    print(f"   • Chunk ratio: {total_chunks/total_documents:.2f}")
+    if layout == 'combined':
+        print(f"   • Ticket points: {uploaded} (ticket + chunk vectors, one payload each)")
+    print(f"   • Failed points: {total_failed}")
+    print(f"   • Embedding tokens sent: {tokens_sent:,} ({chunk_vectors} chunk vectors)")
+    if chunk_vectors == 'pooled':
+        # Previously every chunk was embedded again after chunking
+        print(f"   • Per-chunk re-embedding would have added: {chunk_tokens:,} tokens "
+              f"(before: ~{tokens_sent + chunk_tokens:,})")
     print(f"   • Collection: {COLLECTION_NAME}")
+    print(f"   • {journal.summary()}")
+    if total_failed:
+        print("   • Re-run with --replay-failures to retry only the dead-lettered points")
+    if cache:
+        print(f"   • {cache.summary()}")
+        cache.close()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
@@ -306,8 +679,30 @@ Examples:
   # Process first 1000 documents
   python upload_jira_csv_to_qdrant_semantic.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --max-docs 1000
   
-  # Resume from document 500
+  # Resume from document 500 (upserts into the existing collection)
   python upload_jira_csv_to_qdrant_semantic.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --start-line 500
+  
+  # Two slices uploading concurrently; point ids come from ticket ids, so slices never collide
+  python upload_jira_csv_to_qdrant_semantic.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --max-docs 5000 &
+  python upload_jira_csv_to_qdrant_semantic.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --start-line 5000 --max-docs 10000 &
+  
+  # Nightly delta: only new/modified tickets, delete removed ones
+  python upload_jira_csv_to_qdrant_semantic.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --incremental
+  
+  # Shard semantic chunking across 4 processes
+  python upload_jira_csv_to_qdrant_semantic.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --chunk-workers 4
+  
+  # Continue an interrupted run from its last committed batch
+  python upload_jira_csv_to_qdrant_semantic.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --resume
+  
+  # Retry only the chunks that failed to embed or upload
+  python upload_jira_csv_to_qdrant_semantic.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --replay-failures
+  
+  # One collection, one point per ticket: whole-ticket vector + semantic-chunk multivector
+  python upload_jira_csv_to_qdrant_semantic.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --layout combined
+  
+  # int8-quantized vectors in RAM, float32 originals on disk
+  python upload_jira_csv_to_qdrant_semantic.py JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --profile balanced
 
 Environment Variables Required:
   QDRANT_URL - Qdrant server URL
@@ -315,14 +710,52 @@ Environment Variables Required:
   OPENAI_API_KEY - OpenAI API key
   QDRANT_COLLECTION - Collection name (default: jira_issues_semantic)
   OPENAI_EMBED_MODEL - Embedding model (default: text-embedding-3-small)
+  OPENAI_EMBED_DIMENSIONS - Shortened embedding size, e.g. 256/512/1024 (default: native)
+  CHUNK_VECTORS - Default for --chunk-vectors: pooled or embedded (default: pooled)
+  CHUNK_WORKERS - Default for --chunk-workers: processes used for semantic chunking (default: 1)
+  CHUNK_WINDOWS_AHEAD - Windows queued to the chunking workers ahead of the one being uploaded (default: 1)
+  COLLECTION_LAYOUT - Default for --layout: chunks or combined (default: chunks)
+  SPARSE_VECTORS - Set to 0 to create collections without sparse lexical vectors (default: 1)
+  SPARSE_AVG_TOKENS - Reference document length for the sparse BM25 weights (default: 150)
   BATCH_SIZE - Upload batch size (default: 128)
+  COLLECTION_PROFILE - Default for --profile: default, fast, balanced or low-memory (default: default)
+  STREAM_DOCS - Documents read, chunked and uploaded per window (default: 500)
+  UPSERT_WORKERS - Concurrent non-blocking upsert requests (default: 2)
+  PIPELINE_QUEUE_BATCHES - Batches buffered between pipeline stages (default: 8)
+  PIPELINE_REPORT_SECONDS - Interval for per-stage throughput / queue depth logs (default: 30)
+  SYNC_STATE_DIR - Where --incremental keeps its high-water mark state (default: qdrant/)
+  UPLOAD_JOURNAL_DIR - Where the checkpoint journal and dead-letter file are written (default: qdrant/)
+  EMBED_CACHE_PATH - On-disk embedding cache (default: qdrant/.embedding_cache.sqlite)
+  EMBED_CACHE_DTYPE - Cache storage precision, float16 or float32 (default: float16)
+  EMBED_CACHE_MAX_MB - Cache size limit before LRU eviction (default: 2048)
         """
     )
     
     parser.add_argument('csv_path', help='Path to JIRA CSV file')
-    parser.add_argument('--max-docs', type=int, help='Maximum number of documents to process')
+    parser.add_argument('--max-docs', type=int,
+                       help='Stop after this many documents, counted from the start of the file (slice end with --start-line)')
     parser.add_argument('--start-line', type=int, default=0, 
                        help='Document index to start from (default: 0)')
+    parser.add_argument('--no-embedding-cache', action='store_true',
+                       help='Re-embed everything instead of using the on-disk embedding cache')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Only upsert tickets updated since the last run and delete removed ones')
+    parser.add_argument('--profile', choices=list(PROFILES), default=COLLECTION_PROFILE,
+                       help='Quantization/HNSW profile for a new collection (see collection_profiles.py)')
+    parser.add_argument('--dimensions', type=int, default=OPENAI_EMBED_DIMENSIONS,
+                       help='Shortened embedding size, e.g. 256/512/1024 (default: native)')
+    parser.add_argument('--chunk-vectors', choices=CHUNK_VECTOR_MODES, default=CHUNK_VECTORS,
+                       help='pooled: reuse the chunker\'s sentence embeddings; embedded: batch-embed final chunks')
+    parser.add_argument('--chunk-workers', type=int, default=CHUNK_WORKERS,
+                       help='Processes to shard semantic chunking across (default: 1)')
+    parser.add_argument('--layout', choices=COLLECTION_LAYOUTS, default=COLLECTION_LAYOUT,
+                       help='chunks: a point per chunk; combined: a point per ticket with ticket + chunk vectors')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue an interrupted run from its last committed batch (see upload_journal.py)')
+    parser.add_argument('--replay-failures', action='store_true',
+                       help='Only re-upload the chunks in the dead-letter file')
+    parser.add_argument('--no-sparse', action='store_true',
+                       help='Create the collection without sparse lexical vectors (no hybrid search)')
     
     args = parser.parse_args()
     
@@ -335,4 +768,8 @@ Environment Variables Required:
         print("Please set these in your .env file or environment")
         exit(1)
     
-    main(args.csv_path, args.max_docs, args.start_line)
+    main(args.csv_path, args.max_docs, args.start_line,
+         use_cache=not args.no_embedding_cache, incremental=args.incremental, profile=args.profile,
+         dimensions=args.dimensions, chunk_vectors=args.chunk_vectors, chunk_workers=args.chunk_workers,
+         resume=args.resume, replay_failures=args.replay_failures, layout=args.layout,
+         sparse=SPARSE_VECTORS and not args.no_sparse)
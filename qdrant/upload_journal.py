@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal and dead-letter file for the Qdrant upload scripts.
+
+Every run appends JSON lines to `.<collection>.journal.jsonl`: a `start`
+event with the source CSV and arguments, one `batch` event per upsert batch
+(its sequence number, the range of CSV rows it covers, and whether it was
+committed or dead-lettered), and a `finish` event. Batches are numbered in
+stream order, so once batches 0..n have all been handled every row up to the
+last row of batch n is done, even though upsert workers finish out of order;
+`--resume` restarts from that row.
+
+Records that fail to embed, and every record of a batch that fails to
+upsert, go to `.<collection>.deadletter.jsonl` together with their prepared
+text. `--replay-failures` re-processes only those records.
+
+"Committed" means Qdrant acknowledged the (wait=False) upsert; point ids
+are deterministic, so re-doing the row a resumed run starts from is harmless.
+"""
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+UPLOAD_JOURNAL_DIR = os.environ.get('UPLOAD_JOURNAL_DIR', os.path.dirname(os.path.abspath(__file__)))
+
+
+class UploadJournal:
+    """
+    Journal + dead-letter file for one collection.
+
+    `to_entry(record)` turns a pipeline record into a JSON-serializable dict
+    with at least `id` (point id), `position` (CSV row index) and `text`;
+    `from_entry(entry)` rebuilds whatever the uploader feeds back in on replay.
+    """
+
+    def __init__(self, collection_name, to_entry, from_entry, directory=UPLOAD_JOURNAL_DIR):
+        self.collection_name = collection_name
+        self.to_entry = to_entry
+        self.from_entry = from_entry
+        self.path = os.path.join(directory, f".{collection_name}.journal.jsonl")
+        self.dead_letter_path = os.path.join(directory, f".{collection_name}.deadletter.jsonl")
+        self.run_id = None
+        self.committed = 0
+        self.dead_lettered = 0
+        self._lock = threading.Lock()
+
+    # --- writing ---
+    def _append(self, path, entries):
+        with self._lock:
+            # After a crash the file may end in a torn line: start on a fresh one so the entry isn't lost with it
+            torn = False
+            if os.path.exists(path) and os.path.getsize(path):
+                with open(path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    torn = f.read(1) != b"\n"
+            with open(path, 'a', encoding='utf-8') as f:
+                if torn:
+                    f.write("\n")
+                for entry in entries:
+                    f.write(json.dumps(entry, default=str) + "\n")
+                f.flush()
+
+    def start(self, source, **arguments):
+        """Record the start of a run over `source` (CSV path) with its `arguments`."""
+        self.run_id = uuid.uuid4().hex[:12]
+        self._append(self.path, [{
+            'event': 'start', 'run': self.run_id, 'source': os.path.abspath(source),
+            'arguments': arguments, 'at': datetime.now().isoformat()
+        }])
+
+    def finish(self, uploaded, failed):
+        self._append(self.path, [{
+            'event': 'finish', 'run': self.run_id, 'uploaded': uploaded, 'failed': failed,
+            'at': datetime.now().isoformat()
+        }])
+
+    def _batch(self, seq, records, status):
+        positions = [self.to_entry(record)['position'] for record in records]
+        self._append(self.path, [{
+            'event': 'batch', 'run': self.run_id, 'seq': seq, 'status': status,
+            'first': min(positions), 'last': max(positions), 'points': len(records)
+        }])
+
+    def commit(self, seq, records):
+        """Batch `seq` was upserted."""
+        self._batch(seq, records, 'committed')
+        self.committed += len(records)
+
+    def fail_batch(self, seq, records, error):
+        """Batch `seq` could not be upserted; dead-letter all of its records."""
+        self.dead_letter(records, error)
+        self._batch(seq, records, 'dead-lettered')
+
+    def dead_letter(self, records, error):
+        entries = []
+        for record in records:
+            entry = self.to_entry(record)
+            entry.update(run=self.run_id, error=str(error), at=datetime.now().isoformat())
+            entries.append(entry)
+        self._append(self.dead_letter_path, entries)
+        self.dead_lettered += len(entries)
+
+    # --- reading ---
+    def _events(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            # A crash can leave a torn last line
+            events = []
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass
+            return events
+
+    def last_run(self, source):
+        """(start event, batch events, finished) of the most recent run over `source`, or None."""
+        source = os.path.abspath(source)
+        runs = {}
+        last = None
+        for event in self._events():
+            if event['event'] == 'start':
+                runs[event['run']] = (event, [], False)
+                # Dead-letter replays don't walk the CSV, so they are never resumed
+                if event['source'] == source and not event['arguments'].get('replay'):
+                    last = event['run']
+            elif event.get('run') in runs:
+                start, batches, finished = runs[event['run']]
+                if event['event'] == 'batch':
+                    batches.append(event)
+                else:
+                    runs[event['run']] = (start, batches, True)
+        return runs[last] if last else None
+
+    def resume_point(self, source):
+        """
+        Where to resume an interrupted run over `source`.
+
+        Returns:
+            tuple: (start event, CSV row to restart from) or None if there is
+            nothing to resume (no run, or the last one finished)
+        """
+        run = self.last_run(source)
+        if run is None or run[2]:
+            return None
+        start, batches, _ = run
+        handled = {batch['seq']: batch for batch in batches}
+        seq = 0
+        # The last row of a batch may continue into the next one (token windows, chunks): redo it
+        position = start['arguments'].get('start_row', 0)
+        while seq in handled:
+            position = handled[seq]['last']
+            seq += 1
+        return start, position
+
+    def dead_letters(self):
+        """All dead-lettered entries, oldest first."""
+        if not os.path.exists(self.dead_letter_path):
+            return []
+        with open(self.dead_letter_path, 'r', encoding='utf-8') as f:
+            entries = []
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn by a crash mid-write
+                    pass
+            return entries
+
+    def replay_records(self):
+        """`from_entry` of every dead-lettered record, de-duplicated by point id."""
+        entries = {}
+        for entry in self.dead_letters():
+            entries[str(entry['id'])] = entry
+        return [self.from_entry(entry) for entry in entries.values()]
+
+    def clear_dead_letters(self, keep_run=None):
+        """Drop replayed entries, keeping only those written by run `keep_run` (the replay itself)."""
+        remaining = [entry for entry in self.dead_letters() if keep_run and entry.get('run') == keep_run]
+        tmp_path = self.dead_letter_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in remaining:
+                f.write(json.dumps(entry, default=str) + "\n")
+        os.replace(tmp_path, self.dead_letter_path)
+        return len(remaining)
+
+    def summary(self):
+        text = f"Journal: {self.committed} points committed"
+        if self.dead_lettered:
+            text += f", {self.dead_lettered} dead-lettered to {self.dead_letter_path}"
+        return text
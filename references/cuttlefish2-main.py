@@ -4,10 +4,14 @@ from pydantic import BaseModel
 from typing import List, Any
 import openai
 import os
+import sys
 from qdrant_client import QdrantClient
 from dotenv import load_dotenv
 from mangum import Mangum
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+from query_embedding_cache import QueryEmbeddingCache, key_namespace
+
 load_dotenv()
 
 QDRANT_URL = os.environ.get('QDRANT_URL')
@@ -28,6 +32,9 @@ app.add_middleware(
 )
 
 client = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+# Repeated queries (and /similar followed by /rag for the same question) reuse the query vector;
+# entries are scoped to the request's OpenAI key so one caller's key never pays for another's
+query_embedding_cache = QueryEmbeddingCache()
 
 class QueryRequest(BaseModel):
     query: str
@@ -46,12 +53,14 @@ class RagResponse(BaseModel):
     context: List[SimilarResult]
 
 def get_embedding(query: str, openai_api_key: str) -> list:
-    openai.api_key = openai_api_key
-    response = openai.embeddings.create(
-        input=query,
-        model=OPENAI_EMBED_MODEL
-    )
-    return response.data[0].embedding
+    def embed(text):
+        openai.api_key = openai_api_key
+        response = openai.embeddings.create(
+            input=text,
+            model=OPENAI_EMBED_MODEL
+        )
+        return response.data[0].embedding
+    return query_embedding_cache.get_or_embed(query, embed, key_namespace(OPENAI_EMBED_MODEL, openai_api_key))
 
 @app.post("/similar", response_model=SimilarResponse)
 def similar(request: QueryRequest):
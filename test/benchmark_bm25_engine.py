@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark BM25Engine (qdrant/bm25_engine.py) against rank_bm25.BM25Okapi.
+
+Builds synthetic corpora with a Zipf-distributed vocabulary at each size,
+then reports build time and per-query latency (mean / p95) for the CSR
+engine, and for rank_bm25 up to --reference-max documents (it needs one
+Python pass over every document per query term, so larger sizes take
+minutes per query).
+
+    python test/benchmark_bm25_engine.py --sizes 10000,100000,1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from bm25_engine import BM25Engine
+
+
+def synthetic_matrix(docs, vocabulary_size, mean_length, seed=11):
+    """documents x terms count matrix with Zipf term frequencies and Poisson document lengths."""
+    rng = np.random.default_rng(seed)
+    lengths = np.maximum(1, rng.poisson(mean_length, docs))
+    terms = np.minimum(rng.zipf(1.3, lengths.sum()) - 1, vocabulary_size - 1)
+    rows = np.repeat(np.arange(docs), lengths)
+    matrix = sparse.csr_matrix((np.ones(len(terms), dtype=np.int64), (rows, terms)), shape=(docs, vocabulary_size))
+    matrix.sum_duplicates()
+    return matrix
+
+
+def tokenized(matrix, words):
+    """The same corpus as token lists, for rank_bm25."""
+    return [[words[term] for term, count in zip(matrix.indices[start:end], matrix.data[start:end])
+             for _ in range(count)]
+            for start, end in zip(matrix.indptr[:-1], matrix.indptr[1:])]
+
+
+def sample_queries(count, vocabulary_size, seed=5):
+    """2-5 term queries mixing frequent and rare terms."""
+    rng = np.random.default_rng(seed)
+    return [[f"t{term}" for term in rng.integers(0, min(vocabulary_size, 5000), rng.integers(2, 6))]
+            for _ in range(count)]
+
+
+def time_queries(score, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        score(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.mean(latencies), np.percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CSR BM25 engine against rank_bm25.")
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated corpus sizes')
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--vocabulary', type=int, default=200000)
+    parser.add_argument('--mean-length', type=int, default=60, help='Mean tokens per document')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--reference-max', type=int, default=100000,
+                        help='Largest corpus to also time rank_bm25 on (default: 100000)')
+    args = parser.parse_args()
+
+    words = [f"t{i}" for i in range(args.vocabulary)]
+    vocabulary = {word: i for i, word in enumerate(words)}
+    queries = sample_queries(args.queries, args.vocabulary)
+    print(f"🚀 BM25 benchmark: {args.queries} queries, k={args.k}, ~{args.mean_length} tokens/doc")
+
+    for size in [int(s) for s in args.sizes.split(',')]:
+        matrix = synthetic_matrix(size, args.vocabulary, args.mean_length)
+        start = time.time()
+        engine = BM25Engine(matrix, vocabulary)
+        build = time.time() - start
+        mean, p95 = time_queries(lambda query: engine.top_k(query, args.k), queries)
+        print(f"   {size:>9,} docs  CSR engine: build {build:6.2f}s, query {mean:8.2f} ms mean / {p95:8.2f} ms p95")
+
+        if size <= args.reference_max:
+            from rank_bm25 import BM25Okapi
+
+            start = time.time()
+            reference = BM25Okapi(tokenized(matrix, words))
+            build = time.time() - start
+            # get_top_n is a full argsort over get_scores
+            reference_mean, reference_p95 = time_queries(
+                lambda query: np.argsort(reference.get_scores(query))[::-1][:args.k], queries[:10])
+            print(f"   {'':>9}       rank_bm25:  build {build:6.2f}s, query {reference_mean:8.2f} ms mean / "
+                  f"{reference_p95:8.2f} ms p95 ({reference_mean / mean:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Recall / latency benchmark for the Qdrant collection profiles.
+
+For every profile in qdrant/collection_profiles.py, builds a scratch
+collection on a local Qdrant, waits for indexing to finish, then runs the
+same queries twice: with the profile's search params (HNSW + quantization +
+rescoring) and with `exact=True` as ground truth. Reports recall@k and
+p50/p99 query latency.
+
+Vectors are copied from an existing collection (--source-collection) or,
+by default, generated as clustered synthetic 1536-d vectors.
+
+    docker run -p 6333:6333 qdrant/qdrant
+    python test/benchmark_collection_profiles.py --points 50000 --queries 200
+    python test/benchmark_collection_profiles.py --source-collection cuttlefish3
+    python test/benchmark_collection_profiles.py --source-collection cuttlefish3 --source-vector ticket
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from collection_profiles import PROFILES, create_collection, search_params
+
+
+def synthetic_vectors(count, dim, clusters=200, seed=42):
+    """Unit vectors scattered around random cluster centres (closer to real embeddings than pure noise)."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)] + 0.6 * rng.normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def dense_vector(vector, name=None):
+    """
+    The dense vector in a scrolled record's `vector`.
+
+    Unnamed collections return a plain list; named-vector collections return
+    a dict that may also hold sparse vectors and multivectors (combined and
+    hybrid collections), so take `name`, or else the first plain dense vector;
+    None if there is no dense vector.
+    """
+    if not isinstance(vector, dict):
+        return vector
+    for value in [vector.get(name)] if name is not None else vector.values():
+        if isinstance(value, list) and value and not isinstance(value[0], list):
+            return value
+    return None
+
+
+def source_vectors(client, collection_name, limit, vector_name=None):
+    """Copy up to `limit` dense vectors (the `vector_name` one, if given) from an existing collection."""
+    vectors, offset = [], None
+    while len(vectors) < limit:
+        records, offset = client.scroll(collection_name, limit=min(1000, limit - len(vectors)), offset=offset,
+                                        with_payload=False, with_vectors=[vector_name] if vector_name else True)
+        vectors.extend(v for v in (dense_vector(record.vector, vector_name) for record in records) if v is not None)
+        if offset is None:
+            break
+    if not vectors:
+        raise ValueError(f"No dense vectors found in '{collection_name}'"
+                         + (f" under the name '{vector_name}'" if vector_name else ""))
+    return np.asarray(vectors[:limit], dtype=np.float32)
+
+
+def wait_for_indexing(client, collection_name, timeout=600):
+    start = time.time()
+    while time.time() - start < timeout:
+        info = client.get_collection(collection_name)
+        if info.status == models.CollectionStatus.GREEN:
+            return info
+        time.sleep(1)
+    raise TimeoutError(f"Collection '{collection_name}' still indexing after {timeout}s")
+
+
+def benchmark_profile(client, profile, vectors, queries, k):
+    collection_name = f"bench_profile_{profile.replace('-', '_')}"
+    create_collection(client, collection_name, vectors.shape[1], profile)
+    for start in range(0, len(vectors), 512):
+        batch = vectors[start:start + 512]
+        client.upsert(collection_name, points=models.Batch(
+            ids=list(range(start, start + len(batch))), vectors=batch.tolist()), wait=True)
+    wait_for_indexing(client, collection_name)
+
+    params, exact = search_params(profile), search_params(profile, exact=True)
+    recalls, latencies = [], []
+    for query in queries:
+        query = query.tolist()
+        truth = client.query_points(collection_name, query=query, limit=k, search_params=exact).points
+        start = time.perf_counter()
+        found = client.query_points(collection_name, query=query, limit=k, search_params=params).points
+        latencies.append((time.perf_counter() - start) * 1000)
+        truth_ids = {point.id for point in truth}
+        recalls.append(len(truth_ids & {point.id for point in found}) / max(1, len(truth_ids)))
+    return collection_name, float(np.mean(recalls)), np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure recall@k and latency for each collection profile.")
+    parser.add_argument('--url', default=os.environ.get('BENCH_QDRANT_URL', 'http://localhost:6333'),
+                        help='Local Qdrant URL, or :memory: for a smoke run (default: http://localhost:6333)')
+    parser.add_argument('--source-collection', help='Copy vectors from this collection instead of generating them')
+    parser.add_argument('--source-vector', help='Named vector to copy from --source-collection (default: the '
+                        'first dense vector, e.g. "ticket" on combined collections)')
+    parser.add_argument('--points', type=int, default=20000, help='Vectors per collection (default: 20000)')
+    parser.add_argument('--dim', type=int, default=1536, help='Synthetic vector dimension (default: 1536)')
+    parser.add_argument('--queries', type=int, default=100, help='Number of queries (default: 100)')
+    parser.add_argument('--k', type=int, default=10, help='Recall cut-off (default: 10)')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma-separated profiles to test')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch collections afterwards')
+    args = parser.parse_args()
+
+    client = QdrantClient(location=args.url) if args.url == ':memory:' else QdrantClient(url=args.url)
+    if args.source_collection:
+        vectors = source_vectors(client, args.source_collection, args.points + args.queries, args.source_vector)
+    else:
+        vectors = synthetic_vectors(args.points + args.queries, args.dim)
+    # Held-out vectors are the queries, so no query is an exact match of an indexed point
+    vectors, queries = vectors[:-args.queries], vectors[-args.queries:]
+
+    print(f"🚀 Collection profile benchmark: {len(vectors)} x {vectors.shape[1]}-d vectors, "
+          f"{len(queries)} queries, recall@{args.k}")
+    print(f"{'profile':<12}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for profile in args.profiles.split(','):
+        collection_name, recall, p50, p99 = benchmark_profile(client, profile, vectors, queries, args.k)
+        print(f"{profile:<12}{recall:>10.3f}{p50:>10.2f}{p99:>10.2f}")
+        if not args.keep:
+            client.delete_collection(collection_name)
+
+
+if __name__ == "__main__":
+    main()
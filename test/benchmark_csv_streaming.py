@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Memory / throughput benchmark for CSV ingestion in the Qdrant uploaders.
+
+Generates a synthetic JIRA export of the requested size, then runs the old
+(load everything, then iterate) and new (streamed batches) read paths of both
+uploaders in separate processes and reports peak RSS and rows/sec. No
+embedding or Qdrant calls are made - only CSV parsing and content building.
+
+    python test/benchmark_csv_streaming.py --size-mb 2048
+"""
+
+import argparse
+import csv
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+QDRANT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant')
+sys.path.insert(0, QDRANT_DIR)
+
+HEADER = ['id', 'created', 'description', 'key', 'priority', 'project', 'project_name',
+          'repositoryname', 'resolution', 'resolved', 'status', 'title', 'type',
+          'updated', 'votes', 'watchers', 'assignee_id', 'reporter_id']
+
+WORDS = ("region server memstore flush timeout exception stack trace hbase spring bean "
+         "container null pointer parser xml thread deadlock zookeeper quota session").split()
+
+
+def generate_csv(path, size_mb, seed=42):
+    """Write a synthetic JIRA CSV of roughly `size_mb` megabytes."""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    with open(path, 'w', encoding='utf-8', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(HEADER)
+        i = 0
+        while csvfile.tell() < target:
+            lines = [' '.join(rng.choices(WORDS, k=12)) for _ in range(rng.randint(2, 40))]
+            created = f"2019-{1 + i % 12:02d}-{1 + i % 28:02d} 10:00:00.000"
+            writer.writerow([
+                i, created, '\n'.join(lines), f"HBASE-{i}", 'Major', 'HBASE', 'HBase', 'ASF',
+                'Fixed', created, 'Closed', ' '.join(rng.choices(WORDS, k=8)), 'Bug', created,
+                i % 10, i % 20, i % 500, i % 700
+            ])
+            i += 1
+    return i
+
+
+def run_mode(mode, csv_path):
+    """Run one read path in this process and return the number of rows processed."""
+    rows = 0
+    if mode == 'plain-old':
+        import pandas as pd
+        from upload_jira_csv_to_qdrant import build_content
+        df = pd.read_csv(csv_path, low_memory=False)
+        df['title'] = df['title'].fillna("")
+        df['description'] = df['description'].fillna("")
+        for _, row in df.iterrows():
+            build_content(row['title'].strip(), row['description'].strip())
+            rows += 1
+    elif mode == 'plain-new':
+        from csv_stream import iter_csv_frames
+        from upload_jira_csv_to_qdrant import prepare_rows
+        for _ in prepare_rows(iter_csv_frames(csv_path, 1000)):
+            rows += 1
+    elif mode == 'semantic-old':
+        from upload_jira_csv_to_qdrant_semantic import iter_jira_documents
+        documents = list(iter_jira_documents(csv_path))
+        rows = len(documents)
+    elif mode == 'semantic-new':
+        from upload_jira_csv_to_qdrant_semantic import iter_jira_documents
+        for _ in iter_jira_documents(csv_path):
+            rows += 1
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+    return rows
+
+
+def measure(mode, csv_path):
+    """Run `mode` in a child process; return (rows, seconds, peak_rss_mb)."""
+    start = time.time()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-mode', mode, csv_path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    elapsed = time.time() - start
+    rows, peak_kb = output.strip().splitlines()[-1].split()
+    return int(rows), elapsed, int(peak_kb) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming vs full-load CSV ingestion.")
+    parser.add_argument('csv_path', nargs='?', help='Existing CSV to use (default: generate one)')
+    parser.add_argument('--size-mb', type=int, default=2048, help='Size of generated CSV (default: 2048)')
+    parser.add_argument('--modes', default='plain-old,plain-new,semantic-old,semantic-new')
+    parser.add_argument('--run-mode', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        rows = run_mode(args.run_mode, args.csv_path)
+        print(rows, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+        return
+
+    csv_path = args.csv_path
+    if not csv_path:
+        csv_path = os.path.join(os.environ.get('TMPDIR', '/tmp'), f'cuttlefish_synthetic_{args.size_mb}mb.csv')
+        if not os.path.exists(csv_path):
+            print(f"📝 Generating {args.size_mb} MB synthetic CSV at {csv_path} ...")
+            print(f"   {generate_csv(csv_path, args.size_mb)} rows written")
+
+    print(f"🚀 CSV ingestion benchmark: {csv_path} ({os.path.getsize(csv_path) / 1024 / 1024:.0f} MB)")
+    print(f"{'mode':<14}{'rows':>10}{'seconds':>10}{'rows/sec':>12}{'peak RSS MB':>14}")
+    for mode in args.modes.split(','):
+        try:
+            rows, elapsed, peak_mb = measure(mode, csv_path)
+            print(f"{mode:<14}{rows:>10}{elapsed:>10.1f}{rows / elapsed:>12.0f}{peak_mb:>14.0f}")
+        except subprocess.CalledProcessError as e:
+            print(f"{mode:<14} failed: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark the batched, concurrent embedding stage against a local stand-in
+embedding endpoint with configurable latency.
+
+Compares the old one-request-per-ticket path with BatchEmbedder and reports
+sustained tickets/sec for each.
+
+    python test/benchmark_embedding_throughput.py --tickets 2000 --latency 0.2
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import openai
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from embedding_pipeline import BatchEmbedder
+from fake_embedding_server import start_server
+
+
+def synthetic_tickets(count):
+    return [f"Title: Ticket {i}\n\nDescription: NullPointerException in module {i % 37} after upgrade"
+            for i in range(count)]
+
+
+def run_sequential(client, texts):
+    """The original path: one embeddings.create call per ticket."""
+    start = time.time()
+    for text in texts:
+        client.embeddings.create(input=text, model="text-embedding-3-small")
+    return len(texts) / (time.time() - start)
+
+
+def run_batched(client, texts, batch_size, workers):
+    embedder = BatchEmbedder("text-embedding-3-small", batch_size=batch_size, max_workers=workers, client=client)
+    vectors = embedder.embed(texts)
+    assert len(vectors) == len(texts) and all(v is not None for v in vectors)
+    print(f"   {embedder.summary()}")
+    return embedder.throughput()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched embedding throughput.")
+    parser.add_argument('--tickets', type=int, default=1000)
+    parser.add_argument('--sequential-tickets', type=int, default=50,
+                        help='Tickets for the (slow) one-per-request baseline')
+    parser.add_argument('--latency', type=float, default=0.1, help='Stand-in latency per request in seconds')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    server, base_url = start_server(latency=args.latency, dim=256)
+    client = openai.OpenAI(base_url=base_url, api_key="test")
+    print(f"🚀 Embedding throughput benchmark (stand-in at {base_url}, latency={args.latency}s)")
+
+    try:
+        sequential = run_sequential(client, synthetic_tickets(args.sequential_tickets))
+        print(f"   Sequential (1 text/request): {sequential:.1f} tickets/sec")
+
+        batched = run_batched(client, synthetic_tickets(args.tickets), args.batch_size, args.workers)
+        print(f"   Batched + concurrent:        {batched:.1f} tickets/sec")
+        print(f"📊 Speedup: {batched / sequential:.1f}x")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
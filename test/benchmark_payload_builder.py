@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for content / payload construction in the Qdrant uploaders.
+
+Generates the synthetic PCR release-ticket CSV (data/generate_pcr_tickets.py),
+then compares rows/sec of the old per-row `iterrows` payload building against
+the columnar builder in qdrant/payload_builder.py, plus the semantic
+uploader's per-value `pd.isna` payload cleaning against `clean_payload`.
+No embedding or Qdrant calls are made.
+
+    python test/benchmark_payload_builder.py --repeat 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pandas as pd
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'qdrant'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'data'))
+
+from payload_builder import build_batch, clean_payload
+from upload_jira_csv_to_qdrant import build_content
+
+
+def legacy_rows(frame):
+    """The old per-row loop: f-string content and `row.drop(...).to_dict()` payloads."""
+    frame = frame.assign(
+        title=frame['title'].fillna("").astype(str),
+        description=frame['description'].fillna("").astype(str)
+    )
+    out = []
+    for idx, row in frame.iterrows():
+        title = row['title'].strip()
+        description = row['description'].strip()
+        content = build_content(title, description)
+        payload = row.drop(['title', 'description']).to_dict()
+        payload['content'] = content
+        payload['title'] = title
+        payload['description'] = description
+        out.append((int(row['id']) if not pd.isnull(row['id']) else idx, payload, content))
+    return out
+
+
+def columnar_rows(frame):
+    point_ids, contents, payloads = build_batch(frame)
+    return list(zip(point_ids, payloads, contents))
+
+
+def legacy_clean(payload):
+    """The semantic uploader's old per-value cleaning."""
+    payload = payload.copy()
+    for key, value in payload.items():
+        if pd.isna(value):
+            payload[key] = None
+        elif not isinstance(value, (str, int, float, bool, type(None))):
+            payload[key] = str(value)
+    return payload
+
+
+def rows_per_sec(func, items, rows, repeat):
+    """Call `func` on every item `repeat` times; return rows handled per second."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            func(item)
+    return rows * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark iterrows vs columnar payload construction.")
+    parser.add_argument('csv_path', nargs='?', help='Existing CSV to use (default: generate the PCR CSV)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per DataFrame batch (default: 1000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Passes over the data per measurement (default: 5)')
+    args = parser.parse_args()
+
+    csv_path = args.csv_path
+    if not csv_path:
+        import generate_pcr_tickets
+        csv_path = os.path.join(os.environ.get('TMPDIR', '/tmp'), 'cuttlefish_pcr_synthetic.csv')
+        if not os.path.exists(csv_path):
+            random.seed(42)
+            with redirect_stdout(StringIO()):
+                generate_pcr_tickets.generate_pcr_tickets(csv_path)
+
+    df = pd.read_csv(csv_path)
+    frames = [df.iloc[i:i + args.batch_size] for i in range(0, len(df), args.batch_size)]
+    print(f"🚀 Payload construction benchmark: {csv_path} ({len(df)} rows, {args.repeat} passes)")
+
+    old_rate = rows_per_sec(legacy_rows, frames, len(df), args.repeat)
+    new_rate = rows_per_sec(columnar_rows, frames, len(df), args.repeat)
+    print(f"   iterrows payloads:  {old_rate:>10.0f} rows/sec")
+    print(f"   columnar payloads:  {new_rate:>10.0f} rows/sec  ({new_rate / old_rate:.1f}x)")
+
+    # Semantic chunk metadata: plain dicts with the odd NaN mixed in
+    metadata = [{**payload, 'votes': float('nan') if i % 7 == 0 else payload['votes']}
+                for i, (_, payload, _) in enumerate(columnar_rows(df))]
+    old_rate = rows_per_sec(legacy_clean, metadata, len(metadata), args.repeat)
+    new_rate = rows_per_sec(clean_payload, metadata, len(metadata), args.repeat)
+    print(f"   pd.isna cleaning:   {old_rate:>10.0f} payloads/sec")
+    print(f"   clean_payload:      {new_rate:>10.0f} payloads/sec  ({new_rate / old_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark process-sharded semantic chunking (semantic_chunking.ShardedChunker).
+
+Chunks the same synthetic multi-sentence tickets with 1..N worker processes
+using an in-process stand-in embedder (deterministic vectors, a fixed delay
+per embed call and a configurable amount of CPU work per sentence). It reports
+documents/sec for each worker count and checks that every run produces
+exactly the same chunks as the single-process chunker.
+
+    python test/benchmark_sharded_chunking.py --docs 2000 --workers 1,2,4 --cpu-ms 0.5
+
+The in-process chunker already embeds a whole window in one call, so
+sharding pays off for CPU work (sentence splitting, breakpoint thresholds, a
+local embedding model), and no gain on a single core. Windows are pipelined
+(ShardedChunker.map_windows), so workers don't idle at window boundaries,
+but scaling stays below linear: shards are split by ticket id, and a
+window's results wait for its slowest shard.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from langchain_core.documents import Document
+
+from fake_embedding_server import fake_embedding
+from semantic_chunking import ShardedChunker, VectorSemanticChunker
+
+WORDS = ("cache upgrade regression timeout replica scheduler parser heap leak index shard "
+         "compaction lock session token config build deploy rollback query planner").split()
+
+
+class StandInEmbeddings:
+    """LangChain-style embeddings with fixed call latency and per-text CPU cost; counts like TokenMeter."""
+
+    def __init__(self, dim, latency, cpu_ms):
+        self.dim = dim
+        self.latency = latency
+        self.cpu_ms = cpu_ms
+        self.tokens = 0
+        self.texts = 0
+
+    def _embed(self, text):
+        deadline = time.perf_counter() + self.cpu_ms / 1000
+        while time.perf_counter() < deadline:
+            pass
+        return fake_embedding(text, self.dim)
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        self.tokens += sum(len(text.split()) for text in texts)
+        self.texts += len(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def build_stand_in(dim, latency, cpu_ms):
+    """Embeddings factory for the worker processes: (embeddings, meter)."""
+    embeddings = StandInEmbeddings(dim, latency, cpu_ms)
+    return embeddings, embeddings
+
+
+def synthetic_documents(count, seed=7):
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize() + "."
+                     for _ in range(rng.randint(3, 12))]
+        documents.append(Document(page_content=" ".join(sentences), metadata={'id': 100000 + i}))
+    return documents
+
+
+def fingerprint(grouped):
+    return [[(chunk.page_content, round(sum(vector), 5)) for chunk, vector in doc_chunks] for doc_chunks in grouped]
+
+
+def chunk_windows(chunker, documents, window):
+    windows = [documents[i:i + window] for i in range(0, len(documents), window)]
+    if isinstance(chunker, ShardedChunker):
+        return [doc_chunks for _, grouped in chunker.map_windows(windows) for doc_chunks in grouped]
+    grouped = []
+    for batch in windows:
+        grouped.extend(chunker.split_documents_grouped(batch))
+    return grouped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark process-sharded semantic chunking.")
+    parser.add_argument('--docs', type=int, default=1000)
+    parser.add_argument('--window', type=int, default=500, help='Documents per window (like STREAM_DOCS)')
+    parser.add_argument('--workers', default='1,2,4', help='Comma-separated worker counts (default: 1,2,4)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Stand-in latency per embed call in seconds')
+    parser.add_argument('--cpu-ms', type=float, default=0.2, help='Stand-in CPU time per embedded text in ms')
+    parser.add_argument('--dim', type=int, default=256)
+    args = parser.parse_args()
+
+    documents = synthetic_documents(args.docs)
+    factory_args = (args.dim, args.latency, args.cpu_ms)
+    print(f"🚀 Sharded chunking benchmark: {len(documents)} documents, {os.cpu_count()} CPUs, "
+          f"latency={args.latency}s, cpu={args.cpu_ms}ms/text")
+
+    start = time.time()
+    chunker = VectorSemanticChunker(build_stand_in(*factory_args)[0], breakpoint_threshold_type="percentile")
+    expected = fingerprint(chunk_windows(chunker, documents, args.window))
+    baseline = len(documents) / (time.time() - start)
+    print(f"   In-process:  {baseline:8.1f} docs/sec ({sum(map(len, expected))} chunks)")
+
+    for workers in [int(w) for w in args.workers.split(',')]:
+        with ShardedChunker(workers, build_stand_in, factory_args, breakpoint_threshold_type="percentile") as pool:
+            # Exclude process start-up from the timing
+            pool.split_documents_grouped(documents[:workers * 4])
+            start = time.time()
+            grouped = chunk_windows(pool, documents, args.window)
+            rate = len(documents) / (time.time() - start)
+        identical = "identical" if fingerprint(grouped) == expected else "MISMATCH"
+        print(f"   {workers} worker(s): {rate:8.1f} docs/sec ({rate / baseline:.2f}x, output {identical})")
+
+
+if __name__ == "__main__":
+    main()
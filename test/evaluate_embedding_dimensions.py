@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Recall vs. embedding dimension on the golden dataset.
+
+Each golden question is searched against a corpus of the golden reference
+contexts, optionally padded with distractor tickets from a JIRA CSV. The
+search is repeated for several embedding sizes. text-embedding-3 models are
+Matryoshka-trained, so a shortened embedding is the full one truncated and
+re-normalized. Everything is embedded once at native size and truncated
+locally; pass --api-dimensions to request every size from the API instead.
+
+For each size it reports recall@k, hit@k, MRR, p50 brute-force search
+latency, and vector memory per 100k points. Those numbers are what to weigh
+when choosing OPENAI_EMBED_DIMENSIONS for the uploaders.
+
+    python test/evaluate_embedding_dimensions.py --corpus-csv JIRA_OPEN_DATA_LARGESET_DATESHIFTED.csv --distractors 5000
+"""
+
+import argparse
+import ast
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'qdrant'))
+
+from embedding_cache import EmbeddingCache
+from embedding_pipeline import BatchEmbedder
+from payload_builder import build_contents
+
+OPENAI_EMBED_MODEL = os.environ.get('OPENAI_EMBED_MODEL', 'text-embedding-3-small')
+
+
+def latest_golden_dataset():
+    paths = sorted(glob.glob(os.path.join(ROOT_DIR, 'data', 'cuttlefish_jira_golden_dataset_*.csv')))
+    if not paths:
+        raise FileNotFoundError("No data/cuttlefish_jira_golden_dataset_*.csv found")
+    return paths[-1]
+
+
+def load_golden(path):
+    """Return (questions, relevant) where relevant[i] is the set of corpus texts for question i."""
+    df = pd.read_csv(path)
+    questions = df['user_input'].tolist()
+    relevant = [set(ast.literal_eval(contexts)) for contexts in df['reference_contexts']]
+    return questions, relevant
+
+
+def load_distractors(csv_path, count):
+    frame = pd.read_csv(csv_path, nrows=count)
+    titles = frame['title'].fillna("").astype(str).str.strip()
+    descriptions = frame['description'].fillna("").astype(str).str.strip()
+    return build_contents(titles, descriptions).tolist()
+
+
+def truncate(vectors, dims):
+    """Matryoshka truncation: keep the first `dims` components and re-normalize."""
+    short = vectors[:, :dims]
+    return short / np.linalg.norm(short, axis=1, keepdims=True)
+
+
+def evaluate(query_vectors, corpus_vectors, relevant_idx, k):
+    recalls, hits, reciprocal_ranks, latencies = [], [], [], []
+    for query, relevant in zip(query_vectors, relevant_idx):
+        start = time.perf_counter()
+        scores = corpus_vectors @ query
+        top = np.argpartition(-scores, k)[:k]
+        top = top[np.argsort(-scores[top])]
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = [i for i in top if i in relevant]
+        recalls.append(len(found) / len(relevant))
+        hits.append(1.0 if found else 0.0)
+        ranks = [rank for rank, i in enumerate(top, start=1) if i in relevant]
+        reciprocal_ranks.append(1.0 / ranks[0] if ranks else 0.0)
+    return np.mean(recalls), np.mean(hits), np.mean(reciprocal_ranks), np.percentile(latencies, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality at reduced embedding dimensions.")
+    parser.add_argument('--golden', help='Golden dataset CSV (default: newest data/cuttlefish_jira_golden_dataset_*.csv)')
+    parser.add_argument('--corpus-csv', help='JIRA CSV to draw distractor tickets from')
+    parser.add_argument('--distractors', type=int, default=2000, help='Distractor tickets to add (default: 2000)')
+    parser.add_argument('--dims', default='256,512,1024,1536', help='Comma-separated sizes (default: 256,512,1024,1536)')
+    parser.add_argument('--k', type=int, default=5, help='Cut-off for recall/hit (default: 5)')
+    parser.add_argument('--api-dimensions', action='store_true',
+                        help='Request each size from the API instead of truncating the native embedding')
+    parser.add_argument('--no-embedding-cache', action='store_true', help='Do not use the on-disk embedding cache')
+    args = parser.parse_args()
+
+    golden_path = args.golden or latest_golden_dataset()
+    questions, relevant = load_golden(golden_path)
+    corpus = sorted(set().union(*relevant))
+    if args.corpus_csv:
+        golden_texts = set(corpus)
+        corpus += [text for text in dict.fromkeys(load_distractors(args.corpus_csv, args.distractors))
+                   if text not in golden_texts]
+    position = {text: i for i, text in enumerate(corpus)}
+    relevant_idx = [{position[text] for text in texts} for texts in relevant]
+    dims = [int(d) for d in args.dims.split(',')]
+
+    print(f"🚀 Embedding dimension eval: {os.path.basename(golden_path)} "
+          f"({len(questions)} questions, {len(corpus)} corpus texts, k={args.k})")
+
+    def embed_all(dimensions=None):
+        cache = None if args.no_embedding_cache else EmbeddingCache(OPENAI_EMBED_MODEL, dimensions)
+        embedder = BatchEmbedder(OPENAI_EMBED_MODEL, cache=cache, dimensions=dimensions)
+        vectors = np.asarray(embedder.embed(questions + corpus), dtype=np.float32)
+        if cache:
+            cache.close()
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors[:len(questions)], vectors[len(questions):]
+
+    if not args.api_dimensions:
+        native_queries, native_corpus = embed_all()
+
+    print(f"{'dims':>6}{'recall@' + str(args.k):>11}{'hit@' + str(args.k):>8}{'MRR':>8}{'p50 ms':>9}{'MB/100k':>10}")
+    for size in dims:
+        if args.api_dimensions:
+            query_vectors, corpus_vectors = embed_all(size)
+        else:
+            query_vectors, corpus_vectors = truncate(native_queries, size), truncate(native_corpus, size)
+        recall, hit, mrr, p50 = evaluate(query_vectors, corpus_vectors, relevant_idx, args.k)
+        memory_mb = size * 4 * 100000 / 1024 / 1024
+        print(f"{size:>6}{recall:>11.3f}{hit:>8.3f}{mrr:>8.3f}{p50:>9.3f}{memory_mb:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
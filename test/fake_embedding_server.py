@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI embeddings endpoint.
+
+Serves POST /v1/embeddings with deterministic vectors (seeded from the text)
+after a configurable delay, so the upload scripts and benchmarks can be run
+without an API key or network access:
+
+    python test/fake_embedding_server.py --port 8089 --latency 0.25
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=test \
+        python qdrant/upload_jira_csv_to_qdrant.py data/sample.csv
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_embedding(text, dim):
+    """Deterministic unit vector for `text`."""
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+class EmbeddingHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /embeddings handler."""
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/embeddings'):
+            self.send_error(404)
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        inputs = body.get('input', [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        # LangChain's OpenAIEmbeddings sends pre-tokenized inputs (lists of token ids)
+        inputs = [' '.join(map(str, item)) if isinstance(item, list) else item for item in inputs]
+        dim = int(body.get('dimensions') or self.server.dim)
+
+        # Simulated network + model latency, per request plus per input
+        time.sleep(self.server.latency + self.server.per_input_latency * len(inputs))
+        with self.server.lock:
+            self.server.request_count += 1
+            self.server.input_count += len(inputs)
+
+        data = []
+        prompt_tokens = 0
+        for i, text in enumerate(inputs):
+            vector = fake_embedding(text, dim)
+            prompt_tokens += max(1, len(text) // 4)
+            if body.get('encoding_format') == 'base64':
+                vector = base64.b64encode(struct.pack(f'<{dim}f', *vector)).decode('ascii')
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+
+        payload = json.dumps({
+            "object": "list",
+            "data": data,
+            "model": body.get('model', 'fake-embedding'),
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}
+        }).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(latency=0.1, per_input_latency=0.0, dim=1536, host='127.0.0.1', port=0):
+    """
+    Start the stand-in server on a background thread.
+
+    Returns:
+        tuple: (server, base_url) - call server.shutdown() when done
+    """
+    server = ThreadingHTTPServer((host, port), EmbeddingHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.per_input_latency = per_input_latency
+    server.dim = dim
+    server.lock = threading.Lock()
+    server.request_count = 0
+    server.input_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stand-in OpenAI embeddings endpoint.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.1, help='Seconds of delay per request (default: 0.1)')
+    parser.add_argument('--per-input-latency', type=float, default=0.0, help='Extra seconds per input text (default: 0)')
+    parser.add_argument('--dim', type=int, default=1536, help='Default vector dimension (default: 1536)')
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.latency, args.per_input_latency, args.dim, args.host, args.port)
+    print(f"🧪 Fake embedding server listening on {base_url} (latency={args.latency}s, dim={args.dim})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
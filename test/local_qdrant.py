@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+In-process stand-ins for the tests that drive the uploaders end to end.
+
+QdrantClient(':memory:') runs the same filters, deletes and queries as a
+server, but unlike the HTTP client it does not coerce point dicts (what the
+uploaders build) into PointStruct; LocalQdrantClient does that one step.
+FakeEmbeddings gives deterministic vectors without an API key, and
+split_chunks builds labelled semantic chunks without running the chunker.
+"""
+
+import csv
+
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient, models
+
+from fake_embedding_server import fake_embedding
+
+
+class LocalQdrantClient(QdrantClient):
+    """QdrantClient(':memory:') that accepts point dicts like the HTTP client does."""
+
+    def __init__(self, location=':memory:', **kwargs):
+        super().__init__(location=location, **kwargs)
+
+    def upsert(self, collection_name, points, **kwargs):
+        if isinstance(points, list):
+            points = [models.PointStruct(**point) if isinstance(point, dict) else point for point in points]
+        return super().upsert(collection_name, points, **kwargs)
+
+
+class FakeEmbeddings:
+    """LangChain-style embeddings backed by fake_embedding_server.fake_embedding."""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return fake_embedding(text, self.dim)
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def write_csv(path, rows):
+    """Write dict rows as a CSV export (columns from the first row)."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def split_chunks(document, pieces, embeddings=None):
+    """`pieces` (chunk, vector) pairs for one ticket Document, labelled as the semantic uploader does."""
+    from upload_jira_csv_to_qdrant_semantic import label_chunks
+
+    embeddings = embeddings or FakeEmbeddings()
+    pairs = []
+    for j in range(pieces):
+        text = f"{document.page_content} (part {j})"
+        pairs.append((Document(page_content=text, metadata=dict(document.metadata)), embeddings.embed_query(text)))
+    return label_chunks(pairs)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Check SemanticAnswerCache (qdrant/answer_cache.py): similarity threshold,
+request flags, TTL and invalidation on re-index.
+
+    python -m pytest test/test_answer_cache.py
+    python test/test_answer_cache.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from answer_cache import SemanticAnswerCache
+
+INCIDENT = (False, True)
+NORMAL = (False, False)
+
+
+def vector(angle):
+    """Unit vector at `angle` radians from the x axis: cosine similarity is cos(angle difference)."""
+    return [np.cos(angle), np.sin(angle), 0.0]
+
+
+def test_threshold_and_flags():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store("prod down ClassCastException", vector(0.0), INCIDENT, {'answer': 'A', 'metadata': {}})
+    hit = cache.lookup(vector(0.2), INCIDENT)  # cos 0.2 = 0.98
+    assert hit is not None and hit.response['answer'] == 'A' and hit.similarity > 0.95
+    assert cache.lookup(vector(0.4), INCIDENT) is None  # cos 0.4 = 0.92
+    assert cache.lookup(vector(0.0), NORMAL) is None
+    # Callers get a copy they can annotate
+    hit.response['metadata']['cached'] = True
+    assert cache.lookup(vector(0.0), INCIDENT).response['metadata'] == {}
+    assert cache.hits == 2 and cache.misses == 2
+
+
+def test_ttl_and_lru():
+    now = [0.0]
+    cache = SemanticAnswerCache(threshold=0.99, maxsize=2, ttl=60, clock=lambda: now[0])
+    cache.store("a", vector(0.0), NORMAL, {'answer': 'a'})
+    cache.store("b", vector(1.0), NORMAL, {'answer': 'b'})
+    assert cache.lookup(vector(0.0), NORMAL) is not None  # "b" is now least recently used
+    cache.store("c", vector(2.0), NORMAL, {'answer': 'c'})
+    assert cache.lookup(vector(1.0), NORMAL) is None and len(cache) == 2
+    now[0] = 61
+    assert cache.lookup(vector(0.0), NORMAL) is None and len(cache) == 1
+
+
+def test_reindex_invalidates():
+    now = [0.0]
+    version = ["v1"]
+    cache = SemanticAnswerCache(version=lambda: version[0], version_interval=30, clock=lambda: now[0])
+    cache.store("q", vector(0.0), NORMAL, {'answer': 'old'})
+    version[0] = "v2"
+    assert cache.lookup(vector(0.0), NORMAL) is not None  # version re-read at most every 30s
+    now[0] = 31
+    assert cache.lookup(vector(0.0), NORMAL) is None
+    assert cache.invalidations == 1 and len(cache) == 0
+
+
+if __name__ == "__main__":
+    for test in (test_threshold_and_flags, test_ttl_and_lru, test_reindex_invalidates):
+        test()
+        print(f"✅ {test.__name__}")
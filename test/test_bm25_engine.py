@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Check that BM25Engine (qdrant/bm25_engine.py) ranks exactly like rank_bm25.
+
+    python -m pytest test/test_bm25_engine.py
+    python test/test_bm25_engine.py
+"""
+
+import os
+import random
+import sys
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from bm25_engine import BM25Engine
+
+# A few very common words get negative Okapi IDF, exercising rank_bm25's epsilon floor
+COMMON = ["the", "error", "in"]
+WORDS = [f"w{i}" for i in range(400)]
+QUERIES = [
+    ["w1", "w2"],
+    ["w3"],
+    ["the", "error"],
+    ["w10", "w10", "w250", "the"],
+    ["w399", "unknown", "w7", "in", "w42"],
+]
+
+
+def synthetic_corpus(count=1500, seed=3):
+    rng = random.Random(seed)
+    # Zipf-like word choice so document frequencies span several orders of magnitude
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    corpus = []
+    for _ in range(count):
+        tokens = rng.choices(WORDS, weights=weights, k=rng.randint(3, 60))
+        tokens += [word for word in COMMON if rng.random() < 0.8]
+        rng.shuffle(tokens)
+        corpus.append(tokens)
+    return corpus
+
+
+def expected_top_k(reference, query, k):
+    """rank_bm25's top k among matching documents, ties broken by document index like BM25Engine.top_k."""
+    scores = reference.get_scores(query)
+    matched = [i for i, doc in enumerate(reference.doc_freqs) if any(term in doc for term in query)]
+    matched.sort(key=lambda i: (-scores[i], i))
+    return matched[:k], scores
+
+
+def test_scores_match_rank_bm25():
+    corpus = synthetic_corpus()
+    reference = BM25Okapi(corpus)
+    engine = BM25Engine.from_corpus(corpus)
+    assert engine.avgdl == reference.avgdl
+    for query in QUERIES:
+        np.testing.assert_allclose(engine.get_scores(query), reference.get_scores(query), rtol=1e-5, atol=1e-5)
+
+
+def test_top_k_matches_rank_bm25():
+    corpus = synthetic_corpus()
+    reference = BM25Okapi(corpus)
+    engine = BM25Engine.from_corpus(corpus)
+    for query in QUERIES:
+        for k in (1, 5, 10, 50):
+            indices, scores = engine.top_k(query, k)
+            expected, reference_scores = expected_top_k(reference, query, k)
+            np.testing.assert_allclose(scores, reference_scores[expected], rtol=1e-5, atol=1e-5)
+            assert len(indices) == len(expected)
+            # Same documents; only ties at the cut-off score may be swapped for each other
+            cutoff = reference_scores[expected[-1]]
+            clear = {i for i in expected if not np.isclose(reference_scores[i], cutoff, rtol=1e-5)}
+            assert clear <= set(indices.tolist())
+
+
+def test_get_top_n_and_unknown_terms():
+    corpus = synthetic_corpus(200)
+    reference = BM25Okapi(corpus)
+    engine = BM25Engine.from_corpus(corpus)
+    documents = [" ".join(tokens) for tokens in corpus]
+    query = ["w5", "w6"]
+    expected, _ = expected_top_k(reference, query, 4)
+    assert engine.get_top_n(query, documents, n=4) == [documents[i] for i in expected]
+    indices, scores = engine.top_k(["zzz", "unknown"], 5)
+    assert len(indices) == 0 and len(scores) == 0
+
+
+if __name__ == "__main__":
+    for test in (test_scores_match_rank_bm25, test_top_k_matches_rank_bm25, test_get_top_n_and_unknown_terms):
+        test()
+        print(f"✅ {test.__name__}")
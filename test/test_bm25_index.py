@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Check the persistent BM25 index (qdrant/bm25_index.py): IDF values, ranking
+like BM25Engine over the same tickets, incremental update / delete / compact,
+and that an update interrupted before its manifest commit changes nothing.
+
+    python -m pytest test/test_bm25_index.py
+    python test/test_bm25_index.py
+"""
+
+import math
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from bm25_engine import BM25Engine
+import bm25_index
+from bm25_index import BM25Index, index_text, tokenize
+
+WORDS = [f"w{i}" for i in range(300)]
+QUERIES = ["w1 w2", "w3", "the error", "w10 w10 w250 the", "HBASE-7 w42", "nothing matches zzz"]
+
+
+def synthetic_docs(count=400, seed=7, first_id=1):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    docs = []
+    for ticket_id in range(first_id, first_id + count):
+        words = rng.choices(WORDS, weights=weights, k=rng.randint(3, 40))
+        # Very common words get negative Okapi IDF, exercising the epsilon floor
+        words += [word for word in ("the", "error") if rng.random() < 0.8]
+        docs.append({'id': ticket_id, 'key': f"HBASE-{ticket_id}", 'title': " ".join(words[:4]),
+                     'description': " ".join(words[4:]), 'updated': 1_600_000_000 + ticket_id})
+    return docs
+
+
+def engine_ranking(docs, query, k):
+    engine = BM25Engine.from_corpus([tokenize(index_text(doc)) for doc in docs])
+    indices, scores = engine.top_k(tokenize(query), k)
+    return [docs[i]['id'] for i in indices], scores
+
+
+def assert_same_ranking(index, docs, k=10):
+    for query in QUERIES:
+        hits = index.search(query, k)
+        expected_ids, expected_scores = engine_ranking(docs, query, k)
+        assert [hit['id'] for hit in hits] == expected_ids, query
+        np.testing.assert_allclose([hit['score'] for hit in hits], expected_scores, rtol=1e-6)
+
+
+def test_index_ranks_like_engine():
+    docs = synthetic_docs()
+    with tempfile.TemporaryDirectory() as root:
+        index = BM25Index.build(os.path.join(root, 'index'), docs)
+        assert_same_ranking(index, docs)
+        assert index.search("w1 w2", 3)[0]['doc']['key'].startswith("HBASE-")
+
+
+def test_updated_index_ranks_like_fresh_engine():
+    docs = synthetic_docs()
+    changed = synthetic_docs(60, seed=8, first_id=1)  # new versions of tickets 1-60
+    added = synthetic_docs(30, seed=9, first_id=1000)
+    with tempfile.TemporaryDirectory() as root:
+        index = BM25Index.build(os.path.join(root, 'index'), docs)
+        index.update(changed + added, removed_ids=[100, 101])
+        live = [doc for doc in docs if doc['id'] > 60 and doc['id'] not in (100, 101)] + changed + added
+        assert len(index.segments) == 2 and len(index) == len(live)
+        # Ties break by position, so compare against the engine in the index's own document order
+        assert_same_ranking(index, live)
+
+
+def test_idf_values():
+    docs = [{'id': 1, 'key': 'A-1', 'title': 'kafka lag', 'description': 'consumer lag'},
+            {'id': 2, 'key': 'A-2', 'title': 'broker down', 'description': 'kafka broker'},
+            {'id': 3, 'key': 'A-3', 'title': 'disk full', 'description': 'broker disk'},
+            {'id': 4, 'key': 'A-4', 'title': 'slow query', 'description': 'index'}]
+    with tempfile.TemporaryDirectory() as root:
+        index = BM25Index.build(os.path.join(root, 'index'), docs)
+        engine = index.engine
+        idf = dict(zip(engine.vocabulary, engine.idf[list(engine.vocabulary.values())]))
+        # Okapi IDF log((N - df + 0.5) / (df + 0.5)) with N = 4
+        assert math.isclose(idf['consumer'], math.log(3.5 / 1.5))
+        assert math.isclose(idf['kafka'], math.log(2.5 / 2.5))
+        # 'a' (from the keys) is in every document: negative IDF, floored at epsilon x mean IDF
+        doc_freqs = Counter(term for doc in docs for term in set(tokenize(index_text(doc))))
+        mean_idf = np.mean([math.log((4 - df + 0.5) / (df + 0.5)) for df in doc_freqs.values()])
+        assert math.isclose(idf['a'], 0.25 * mean_idf)
+        # Single-term score: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+        hit = index.search("consumer", 1)[0]
+        dl, avgdl = 6, index.avgdl
+        expected = idf['consumer'] * 2.5 / (1 + 1.5 * (0.25 + 0.75 * dl / avgdl))
+        assert hit['id'] == 1 and math.isclose(hit['score'], expected, rel_tol=1e-5)
+
+
+def test_update_delete_and_compact():
+    docs = synthetic_docs(50)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'index')
+        index = BM25Index.build(path, docs)
+        replacement = dict(docs[0], title="zebra crossing", description="", updated=1_700_000_000)
+        assert index.update([replacement], removed_ids=[2]) == (1, 2)
+        assert len(index) == 49 and 2 not in index.ticket_ids()
+        assert index.high_water_mark == 1_700_000_000
+        assert [hit['id'] for hit in index.search("zebra")] == [1]
+
+        # Survives a reload: the manifest points at the new deleted flags
+        reloaded = BM25Index.load(path)
+        assert reloaded.ticket_ids() == index.ticket_ids()
+        assert [hit['id'] for hit in reloaded.search("zebra")] == [1]
+
+        reloaded.compact()
+        assert len(reloaded.segments) == 1 and len(reloaded) == 49
+        assert sorted(os.listdir(path)) == ['manifest.json', reloaded.segments[0].name]
+        assert_same_ranking(reloaded, [doc for doc in docs[1:] if doc['id'] != 2] + [replacement])
+
+
+def test_update_compacts_past_max_segments():
+    docs = synthetic_docs(20)
+    original = bm25_index.BM25_MAX_SEGMENTS
+    bm25_index.BM25_MAX_SEGMENTS = 2
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            index = BM25Index.build(os.path.join(root, 'index'), docs)
+            index.update([dict(docs[0], title="first change")])
+            assert len(index.segments) == 2
+            index.update([dict(docs[1], title="second change")])
+            assert len(index.segments) == 1 and len(index) == 20
+    finally:
+        bm25_index.BM25_MAX_SEGMENTS = original
+
+
+def test_crash_before_manifest_commit_keeps_previous_index():
+    docs = synthetic_docs(50)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'index')
+        index = BM25Index.build(path, docs)
+        before = index.search("w1 w2", 10)
+
+        def crash(manifest):
+            raise OSError("simulated crash before the manifest is replaced")
+
+        index._write_manifest = crash
+        try:
+            index.update([dict(docs[0], title="zebra")], removed_ids=[2, 3])
+        except OSError:
+            pass
+        else:
+            raise AssertionError("update should have failed")
+
+        # On disk the old documents are still live and the orphaned segment is not referenced
+        recovered = BM25Index.load(path)
+        assert len(recovered) == 50 and {2, 3} <= recovered.ticket_ids()
+        assert recovered.search("w1 w2", 10) == before and not recovered.search("zebra")
+
+        # The next update reuses the orphaned names and commits normally
+        assert recovered.update([dict(docs[0], title="zebra")], removed_ids=[2, 3]) == (1, 3)
+        assert [hit['id'] for hit in BM25Index.load(path).search("zebra")] == [1]
+
+
+if __name__ == "__main__":
+    for test in (test_index_ranks_like_engine, test_updated_index_ranks_like_fresh_engine, test_idf_values,
+                 test_update_delete_and_compact, test_update_compacts_past_max_segments,
+                 test_crash_before_manifest_commit_keeps_previous_index):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Check the collection profiles (qdrant/collection_profiles.py) against an
+in-memory Qdrant: a collection records the profile it was built with, the
+notebook's direct searches query it with that profile's search params, and
+the profile benchmark can copy dense vectors out of named-vector and
+sparse-vector (combined / hybrid) collections.
+
+    python -m pytest test/test_collection_profiles.py
+    python test/test_collection_profiles.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+import pytest
+from qdrant_client import models
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+NOTEBOOK = os.path.join(TEST_DIR, '..', 'Cuttlefish3_Complete.ipynb')
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'qdrant'))
+
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+from benchmark_collection_profiles import dense_vector, source_vectors
+from collection_profiles import (collection_profile, collection_search_params, create_collection, mark_indexed,
+                                 search_params)
+from combined_collection import CHUNKS_VECTOR, COMBINED_VECTORS, TICKET_VECTOR
+from local_qdrant import FakeEmbeddings, LocalQdrantClient, split_chunks, write_csv
+from sparse_vectors import SPARSE_VECTOR, SPARSE_VECTORS_CONFIG
+from upload_jira_csv_to_qdrant_semantic import iter_jira_documents, upload_combined
+
+ROWS = [
+    {'id': str(i), 'key': f'HBASE-{i}', 'project': 'HBASE', 'title': f'Ticket {i}', 'description': f'problem {i}'}
+    for i in range(1, 6)
+]
+
+
+def combined_collection(profile):
+    """A combined collection with sparse vectors (named dense, multivector and sparse vectors per point)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jira.csv')
+        write_csv(path, ROWS)
+        documents = list(iter_jira_documents(path))
+    embeddings = FakeEmbeddings()
+    tickets = [(doc, split_chunks(doc, 2, embeddings)) for doc in documents]
+    client = LocalQdrantClient()
+    upload_combined(tickets, client, 'combined', embeddings, profile=profile, sparse=True)
+    return client
+
+
+def test_collection_records_its_profile():
+    client = combined_collection('balanced')
+    assert collection_profile(client, 'combined') == 'balanced'
+    params = collection_search_params(client, 'combined')
+    assert params == search_params('balanced')
+    assert params.hnsw_ef == 96 and params.quantization.rescore and params.quantization.oversampling == 2.0
+
+    # Stamping an index version keeps the profile
+    assert mark_indexed(client, 'combined')
+    assert collection_profile(client, 'combined') == 'balanced'
+
+    # Collections from before the profile was recorded fall back to their settings
+    client.create_collection('plain', vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE))
+    assert collection_profile(client, 'plain') == 'default'
+
+
+class RecordingClient(LocalQdrantClient):
+    """Keeps the search params of every dense query it is sent."""
+
+    def __init__(self):
+        super().__init__()
+        self.params = []
+
+    def query_points(self, collection_name, prefetch=None, **kwargs):
+        self.params.extend(p.params for p in prefetch or () if p.using != SPARSE_VECTOR)
+        return super().query_points(collection_name, prefetch=prefetch, **kwargs)
+
+    def search(self, collection_name, query_vector, search_params=None, limit=10, **kwargs):
+        self.params.append(search_params)
+        return super().query_points(collection_name, query=query_vector, search_params=search_params,
+                                    limit=limit, with_payload=True).points
+
+
+def notebook_search(client, **settings):
+    """Execute the notebook's utility cell against `client` and return its direct_qdrant_search."""
+    with open(NOTEBOOK, 'r', encoding='utf-8') as f:
+        cell = next(''.join(cell['source']) for cell in json.load(f)['cells']
+                    if ''.join(cell['source']).startswith('# Shared utility functions for direct Qdrant client'))
+    namespace = {'__name__': 'notebook'}
+    exec("import os\nfrom datetime import datetime\nfrom typing import Any, Dict, List", namespace)
+    namespace.update(qdrant_client=client, QDRANT_COLLECTION='combined', embeddings=FakeEmbeddings(), **settings)
+    exec(cell, namespace)
+    return namespace['direct_qdrant_search']
+
+
+@pytest.mark.parametrize('layout', ['combined', 'hybrid', 'dense'])
+def test_notebook_searches_use_profile_params(layout):
+    client = RecordingClient()
+    create_collection(client, 'combined', 8, 'fast', named_vectors=COMBINED_VECTORS if layout == 'combined' else None,
+                      sparse_vectors=SPARSE_VECTORS_CONFIG)
+    # As the notebook's Qdrant setup cell does
+    params = collection_search_params(client, 'combined')
+    assert params == search_params('fast')
+    search = notebook_search(client, SEARCH_PARAMS=params, COMBINED_COLLECTION=layout == 'combined',
+                             HYBRID_COLLECTION=layout != 'dense')
+    search("region server crash", limit=3)
+    assert client.params and all(p == params for p in client.params)
+
+
+def test_source_vectors_from_named_and_sparse_collections():
+    client = combined_collection('default')
+    tickets, _ = client.scroll('combined', limit=10, with_vectors=[TICKET_VECTOR])
+    expected = {point.id: point.vector[TICKET_VECTOR] for point in tickets}
+
+    # Default: the first dense vector, skipping the chunk multivector and the sparse vector
+    vectors = source_vectors(client, 'combined', 10)
+    assert vectors.shape == (5, 8)
+    assert np.allclose(sorted(map(tuple, vectors)), sorted(map(tuple, expected.values())))
+    assert np.allclose(source_vectors(client, 'combined', 3, TICKET_VECTOR), vectors[:3])
+    with pytest.raises(ValueError):
+        source_vectors(client, 'combined', 10, CHUNKS_VECTOR)
+
+    assert dense_vector([0.1, 0.2]) == [0.1, 0.2]
+    assert dense_vector({SPARSE_VECTOR: models.SparseVector(indices=[1], values=[1.0]), 'ticket': [0.5]}) == [0.5]
+    assert dense_vector({'chunks': [[0.1], [0.2]]}) is None
+
+
+if __name__ == "__main__":
+    test_collection_records_its_profile()
+    print("✅ test_collection_records_its_profile")
+    for layout in ('combined', 'hybrid', 'dense'):
+        test_notebook_searches_use_profile_params(layout)
+        print(f"✅ test_notebook_searches_use_profile_params[{layout}]")
+    test_source_vectors_from_named_and_sparse_collections()
+    print("✅ test_source_vectors_from_named_and_sparse_collections")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Check the combined (ticket + chunks) collection layout
+(qdrant/combined_collection.py) against an in-memory Qdrant: the semantic
+uploader creates it with named vectors, every ticket is one point carrying
+both representations, and search_combined (what the notebook calls) honours
+payload filters and the lexical prefetch.
+
+    python -m pytest test/test_combined_collection.py
+    python test/test_combined_collection.py
+"""
+
+import os
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+from qdrant_client import models
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+from combined_collection import CHUNKS_VECTOR, TICKET_VECTOR, is_combined, search_combined
+from local_qdrant import FakeEmbeddings, LocalQdrantClient, split_chunks, write_csv
+from upload_jira_csv_to_qdrant_semantic import iter_jira_documents, upload_combined
+
+ROWS = [
+    {'id': '201', 'key': 'HBASE-201', 'project': 'HBASE', 'title': 'Region server crash',
+     'description': 'OutOfMemoryError during compaction'},
+    {'id': '202', 'key': 'HBASE-202', 'project': 'HBASE', 'title': 'Slow scan', 'description': 'full table scan'},
+    {'id': '203', 'key': 'SPR-203', 'project': 'SPR', 'title': 'Bean wiring fails',
+     'description': 'OutOfMemoryError in the context loader'},
+    {'id': '204', 'key': 'SPR-204', 'project': 'SPR', 'title': 'Docs typo', 'description': ''},
+]
+
+
+def build_collection(sparse=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jira.csv')
+        write_csv(path, ROWS)
+        documents = list(iter_jira_documents(path))
+    embeddings = FakeEmbeddings()
+    # Ticket 204 failed to chunk: no chunk vectors
+    tickets = [(doc, split_chunks(doc, 0 if doc.metadata['id'] == 204 else 3, embeddings)) for doc in documents]
+    client = LocalQdrantClient()
+    assert upload_combined(tickets, client, 'combined', embeddings, sparse=sparse) == (4, 0)
+    return client, tickets
+
+
+def test_upload_creates_named_vectors():
+    client, tickets = build_collection()
+    assert is_combined(client, 'combined')
+    assert client.count('combined').count == 4
+
+    points = client.retrieve('combined', ids=[201, 204], with_vectors=True)
+    by_id = {point.id: point for point in points}
+    assert set(by_id[201].vector) == {TICKET_VECTOR, CHUNKS_VECTOR}
+    # Cosine collections store normalized vectors; the fake embeddings are unit length already
+    assert np.allclose(by_id[201].vector[CHUNKS_VECTOR], [vector for _, vector in tickets[0][1]])
+    assert by_id[201].payload['chunk_count'] == 3 and 'chunk_index' not in by_id[201].payload
+    # The unchunked ticket is its own single chunk
+    assert np.allclose(by_id[204].vector[CHUNKS_VECTOR], [by_id[204].vector[TICKET_VECTOR]])
+
+    plain = LocalQdrantClient()
+    plain.create_collection('plain', vectors_config=models.VectorParams(size=8, distance=models.Distance.COSINE))
+    assert not is_combined(plain, 'plain')
+
+
+def test_search_matches_best_chunk_and_filters():
+    client, tickets = build_collection()
+    # The second chunk of ticket 203 as the query: MAX_SIM puts the ticket first
+    query_vector = tickets[2][1][1][1]
+    hits = search_combined(client, 'combined', query_vector, limit=3)
+    assert hits[0].id == 203
+    assert len({hit.id for hit in hits}) == len(hits) == 3
+
+    hbase = models.Filter(must=[models.FieldCondition(key='project', match=models.MatchValue(value='HBASE'))])
+    hits = search_combined(client, 'combined', query_vector, limit=3, query_filter=hbase)
+    assert {hit.id for hit in hits} == {201, 202}
+    assert all(hit.payload['project'] == 'HBASE' for hit in hits)
+
+
+def test_search_with_lexical_prefetch():
+    client, _ = build_collection(sparse=True)
+    query_vector = FakeEmbeddings().embed_query("unrelated query")
+    hits = search_combined(client, 'combined', query_vector, limit=4, query_text="OutOfMemoryError")
+    # Both tickets mentioning the exact term outrank the rest after fusion
+    assert {hit.id for hit in hits[:2]} == {201, 203}
+
+
+if __name__ == "__main__":
+    for test in (test_upload_creates_named_vectors, test_search_matches_best_chunk_and_filters,
+                 test_search_with_lexical_prefetch):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Check the streamed CSV readers (qdrant/csv_stream.py) against a single
+`pd.read_csv` of the same export: a small CSV read in several chunks, from
+the first row and from a resume offset, gives the same rows, row numbers,
+point ids and payloads, including the row-number ids of tickets without a
+JIRA id.
+
+    python -m pytest test/test_csv_stream.py
+    python test/test_csv_stream.py
+"""
+
+import os
+import sys
+import tempfile
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from csv_stream import batched, iter_csv_frames, iter_csv_rows
+from local_qdrant import write_csv
+from payload_builder import build_batch
+from upload_jira_csv_to_qdrant import prepare_rows
+
+# Rows 3 and 8 have no JIRA id, so their point ids are their row numbers
+ROWS = [
+    {'id': '' if i in (3, 8) else str(1000 + i), 'key': f'HBASE-{1000 + i}', 'project': 'HBASE',
+     'title': f' Ticket {i} ', 'description': f'line one, "quoted"\nline two of {i}' if i % 2 else '',
+     'created': f'2019-0{1 + i % 9}-1{i % 10} 10:00:00.000', 'votes': str(i)}
+    for i in range(11)
+]
+
+
+def write_export(directory):
+    path = os.path.join(directory, 'jira.csv')
+    write_csv(path, ROWS)
+    return path
+
+
+@pytest.mark.parametrize('start_line', [0, 4])
+def test_chunked_frames_match_single_read(start_line):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_export(tmp)
+        expected = pd.read_csv(path).iloc[start_line:]
+        frames = list(iter_csv_frames(path, 3, start_line))
+
+        assert len(frames) == -(-len(expected) // 3) > 1
+        streamed = pd.concat(frames)
+        assert streamed.index.tolist() == expected.index.tolist() == list(range(start_line, len(ROWS)))
+        # Per-chunk dtypes differ (a chunk without a missing id parses it as int), values do not
+        pd.testing.assert_frame_equal(streamed, expected, check_dtype=False)
+
+        ids, contents, payloads = build_batch(expected)
+        streamed_batches = [build_batch(frame) for frame in frames]
+        assert [i for batch in streamed_batches for i in batch[0]] == ids
+        assert [c for batch in streamed_batches for c in batch[1]] == contents
+        assert [p for batch in streamed_batches for p in batch[2]] == payloads
+        assert [i for i in ids if i < 1000] == [row for row in (3, 8) if row >= start_line]
+
+
+def test_prepared_rows_keep_absolute_row_numbers():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_export(tmp)
+        prepared = [record for record, _ in prepare_rows(iter_csv_frames(path, 4, 2))]
+    assert [row for _, _, row in prepared] == list(range(2, len(ROWS)))
+    assert [point_id for point_id, _, _ in prepared] == [row if row in (3, 8) else 1000 + row
+                                                         for row in range(2, len(ROWS))]
+
+
+@pytest.mark.parametrize('start_line', [0, 4])
+def test_rows_match_single_read(start_line):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_export(tmp)
+        expected = pd.read_csv(path, dtype=str, keep_default_na=False).iloc[start_line:]
+        rows = list(iter_csv_rows(path, start_line))
+    assert [i for i, _ in rows] == expected.index.tolist()
+    assert [row for _, row in rows] == expected.to_dict('records')
+
+    batches = list(batched(rows, 3))
+    assert [len(batch) for batch in batches][:-1] == [3] * (len(batches) - 1)
+    assert [row for batch in batches for row in batch] == rows
+
+
+if __name__ == "__main__":
+    for start_line in (0, 4):
+        test_chunked_frames_match_single_read(start_line)
+        print(f"✅ test_chunked_frames_match_single_read[{start_line}]")
+    test_prepared_rows_keep_absolute_row_numbers()
+    print("✅ test_prepared_rows_keep_absolute_row_numbers")
+    for start_line in (0, 4):
+        test_rows_match_single_read(start_line)
+        print(f"✅ test_rows_match_single_read[{start_line}]")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Check incremental delta sync (qdrant/delta_sync.py): high-water-mark
+filtering (row by row and per DataFrame), removed tickets, that only a
+committed run advances the saved state, and that the semantic uploader's
+chunks of removed or re-chunked tickets are deleted by payload.
+
+    python -m pytest test/test_delta_sync.py
+    python test/test_delta_sync.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+from qdrant_client import QdrantClient, models
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+import delta_sync
+from delta_sync import DeltaTracker, SyncState, delete_stale_chunks, delete_tickets
+from local_qdrant import FakeEmbeddings, LocalQdrantClient, split_chunks, write_csv
+from upload_jira_csv_to_qdrant_semantic import iter_jira_documents, upload_to_qdrant
+
+MARK = datetime(2024, 1, 2)
+# id, updated, expected to be (re-)indexed against MARK with tickets 1-3 and 9 indexed
+EXPORT = [
+    (1, '2024-01-01 12:00:00.000', False),   # unchanged since the last run
+    (2, '2024-01-02 00:00:00.000', True),    # same timestamp as the mark: may have arrived after the last run
+    (3, '2024-01-03 08:30:00.000', True),    # modified
+    ('4', '2023-06-01 00:00:00.000', True),  # new ticket with an old timestamp (string id from the csv module)
+    (5.0, None, True),                       # new ticket without a timestamp (float id from pandas)
+]
+
+
+def previous_state():
+    return SyncState('tickets', high_water_mark=MARK, ids={1, 2, 3, 9})
+
+
+def test_high_water_mark_rows():
+    tracker = DeltaTracker(previous_state())
+    assert [tracker.is_changed(ticket_id, updated) for ticket_id, updated, _ in EXPORT] == \
+        [expected for _, _, expected in EXPORT]
+    assert tracker.changed_ids == {2, 3, 4, 5}
+    assert tracker.removed_ids() == {9}
+    assert tracker.max_updated == datetime(2024, 1, 3, 8, 30)
+    # A known ticket without a timestamp is left alone
+    assert not DeltaTracker(previous_state()).is_changed(1, '')
+
+
+def test_high_water_mark_frames_match_rows():
+    frame = pd.DataFrame([(ticket_id, updated) for ticket_id, updated, _ in EXPORT], columns=['id', 'updated'])
+    tracker = DeltaTracker(previous_state())
+    # Two batches, as the uploaders stream the CSV
+    changed = pd.concat([tracker.filter_frame(frame.iloc[:2]), tracker.filter_frame(frame.iloc[2:])])
+    assert changed.index.tolist() == [i for i, (_, _, expected) in enumerate(EXPORT) if expected]
+    assert tracker.changed_ids == {2, 3, 4, 5} and tracker.removed_ids() == {9}
+    assert tracker.max_updated == datetime(2024, 1, 3, 8, 30)
+
+    full = DeltaTracker(previous_state(), incremental=False)
+    assert len(full.filter_frame(frame)) == len(frame)
+
+
+def test_only_committed_runs_advance_the_state():
+    original = delta_sync.SYNC_STATE_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        delta_sync.SYNC_STATE_DIR = directory
+        try:
+            assert SyncState.load('tickets') is None
+            first = DeltaTracker(previous_state())
+            for ticket_id, updated, _ in EXPORT:
+                first.is_changed(ticket_id, updated)
+            first.commit()
+            with open(SyncState.path_for('tickets'), 'r', encoding='utf-8') as f:
+                assert set(json.load(f)) == {'collection', 'high_water_mark', 'ids', 'synced_at'}
+            state = SyncState.load('tickets')
+            assert state.high_water_mark == datetime(2024, 1, 3, 8, 30) and state.ids == {1, 2, 3, 4, 5}
+
+            # A failed run observes a newer ticket but is never committed
+            failed = DeltaTracker(SyncState.load('tickets'))
+            assert failed.is_changed(6, '2024-02-01 00:00:00.000')
+            state = SyncState.load('tickets')
+            assert state.high_water_mark == datetime(2024, 1, 3, 8, 30) and 6 not in state.ids
+            # ... so the next run picks the same tickets up again
+            retry = DeltaTracker(state)
+            assert retry.is_changed(6, '2024-02-01 00:00:00.000')
+            assert retry.is_changed(3, '2024-01-03 08:30:00.000')  # at the mark
+            assert not retry.is_changed(2, '2024-01-02 00:00:00.000')
+        finally:
+            delta_sync.SYNC_STATE_DIR = original
+
+
+def test_bootstrap_from_collection():
+    client = QdrantClient(":memory:")
+    client.create_collection('tickets', vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE))
+    client.upsert('tickets', points=[
+        models.PointStruct(id=i, vector=[1.0, 0.0], payload={'id': str(i), 'updated': updated})
+        for i, updated in ((1, '2024-01-01 00:00:00.000'), (2, '2024-03-05 10:00:00.000'), (3, None))
+    ])
+    state = SyncState.bootstrap(client, 'tickets', page_size=2)
+    assert state.ids == {1, 2, 3} and state.high_water_mark == datetime(2024, 3, 5, 10)
+
+
+def export_documents(rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jira.csv')
+        write_csv(path, rows)
+        return list(iter_jira_documents(path))
+
+
+def upload_chunks(client, documents, pieces, recreate=True):
+    chunks = [pair for document in documents for pair in split_chunks(document, pieces.get(document.metadata['id'], 2))]
+    uploaded, failed = upload_to_qdrant(chunks, client, 'jira', FakeEmbeddings(), recreate=recreate, sparse=False)
+    assert failed == 0
+    return uploaded
+
+
+def indexed_chunks(client):
+    records, _ = client.scroll('jira', limit=100, with_payload=['id', 'chunk_index'])
+    return sorted((record.payload['id'], record.payload['chunk_index']) for record in records)
+
+
+SEMANTIC_EXPORT = [
+    {'id': '11', 'key': 'HBASE-11', 'title': 'Region server crash', 'description': 'OOM on startup',
+     'updated': '2024-01-01 00:00:00.000'},
+    {'id': '12', 'key': 'HBASE-12', 'title': 'Slow scan', 'description': 'full table scan',
+     'updated': '2024-01-02 00:00:00.000'},
+    {'id': '13', 'key': 'HBASE-13', 'title': 'Flaky test', 'description': 'TestAdmin times out',
+     'updated': '2024-01-03 00:00:00.000'},
+]
+
+
+def test_removed_tickets_are_deleted_by_payload():
+    client = LocalQdrantClient()
+    full = DeltaTracker(SyncState('jira'), incremental=False)
+    documents = [doc for doc in export_documents(SEMANTIC_EXPORT)
+                 if full.is_changed(doc.metadata['id'], doc.metadata['updated'])]
+    assert upload_chunks(client, documents, {}) == 6
+    # A chunk from an older upload that stored the CSV string id
+    client.upsert('jira', points=[models.PointStruct(id=99, vector=[1.0] + [0.0] * 7,
+                                                     payload={'id': '12', 'chunk_index': 2})])
+    state = SyncState('jira', high_water_mark=full.max_updated, ids=full.seen_ids)
+
+    # Ticket 12 left the export; nothing else changed
+    sync = DeltaTracker(state)
+    changed = [doc for doc in export_documents([SEMANTIC_EXPORT[0], SEMANTIC_EXPORT[2]])
+               if sync.is_changed(doc.metadata['id'], doc.metadata['updated'])]
+    assert [doc.metadata['id'] for doc in changed] == [13]  # at the mark
+    assert sync.removed_ids() == {12}
+    delete_tickets(client, 'jira', sync.removed_ids(), by_payload=True)
+    assert indexed_chunks(client) == [(11, 0), (11, 1), (13, 0), (13, 1)]
+
+
+def test_rechunked_ticket_drops_stale_chunks():
+    client = LocalQdrantClient()
+    documents = export_documents(SEMANTIC_EXPORT[:2])
+    assert upload_chunks(client, documents, {11: 4, 12: 3}) == 7
+
+    # Ticket 11 now splits into two chunks: 0-1 are overwritten in place, 2-3 are stale
+    edited = [doc for doc in documents if doc.metadata['id'] == 11]
+    upload_chunks(client, edited, {11: 2}, recreate=False)
+    delete_stale_chunks(client, 'jira', {11: 2})
+    assert indexed_chunks(client) == [(11, 0), (11, 1), (12, 0), (12, 1), (12, 2)]
+
+
+if __name__ == "__main__":
+    for test in (test_high_water_mark_rows, test_high_water_mark_frames_match_rows,
+                 test_only_committed_runs_advance_the_state, test_bootstrap_from_collection,
+                 test_removed_tickets_are_deleted_by_payload, test_rechunked_ticket_drops_stale_chunks):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Check the persistent embedding cache (qdrant/embedding_cache.py) against a
+temporary SQLite file: hits, misses and saved vector bytes; LRU eviction;
+one size limit enforced across several connections to the same file (as the
+sharded chunking workers have); and CachedEmbeddings only embedding misses.
+
+    python -m pytest test/test_embedding_cache.py
+    python test/test_embedding_cache.py
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from embedding_cache import CachedEmbeddings, EmbeddingCache
+
+DIM = 1024  # float32: 4 KiB per vector, so 256 vectors fill a 1 MB cache
+
+
+def vector(seed, dim=DIM):
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32).tolist()
+
+
+def texts(prefix, n):
+    return [f"{prefix} ticket {i}" for i in range(n)]
+
+
+def test_hits_misses_and_bytes_saved():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.sqlite')
+        cache = EmbeddingCache('text-embedding-3-small', 256, path=path)
+        stored = [vector(i, 256) for i in range(3)]
+        cache.put_many(["a", "b", "c"], stored[:2] + [None])
+
+        found = cache.get_many(["a", "x", "b", "c"])
+        assert found[1] is None and found[3] is None
+        # float16 storage: close, not exact
+        np.testing.assert_allclose(found[0], stored[0], atol=1e-2)
+        np.testing.assert_allclose(found[2], stored[1], atol=1e-2)
+        assert (cache.hits, cache.misses) == (2, 2)
+        assert cache.bytes_saved == 2 * 256 * 2
+        assert cache.total_bytes == 2 * 256 * 2
+
+        # Other models / output sizes never share entries
+        assert EmbeddingCache('text-embedding-3-small', 512, path=path).get_many(["a"]) == [None]
+        assert EmbeddingCache('text-embedding-3-large', 256, path=path).get_many(["a"]) == [None]
+
+        # Re-storing a key replaces it without counting it twice
+        cache.put_many(["a"], [stored[2]])
+        assert cache.total_bytes == 2 * 256 * 2
+        np.testing.assert_allclose(cache.get_many(["a"])[0], stored[2], atol=1e-2)
+        assert "0.0 MB of vectors served" in cache.summary()
+        cache.close()
+
+
+def test_least_recently_used_entries_are_evicted():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache('m', path=os.path.join(tmp, 'cache.sqlite'), dtype='float32', max_mb=1)
+        first, second, third = texts("first", 100), texts("second", 100), texts("third", 100)
+        cache.put_many(first, [vector(i) for i in range(100)])
+        time.sleep(0.01)
+        cache.put_many(second, [vector(i) for i in range(100, 200)])
+        time.sleep(0.01)
+        assert None not in cache.get_many(first)  # now more recent than `second`
+        time.sleep(0.01)
+        cache.put_many(third, [vector(i) for i in range(200, 300)])
+
+        # 300 vectors overflow the 1 MB limit; eviction goes down to 90% of it
+        assert cache.total_bytes <= int(cache.max_bytes * 0.9)
+        assert cache.evictions == 300 - cache.total_bytes // (DIM * 4)
+        assert None not in cache.get_many(first) and None not in cache.get_many(third)
+        assert sum(v is None for v in cache.get_many(second)) == cache.evictions
+        cache.close()
+
+
+def test_size_limit_is_shared_across_connections():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.sqlite')
+        # Two workers open the cache before either writes
+        workers = [EmbeddingCache('m', path=path, dtype='float32', max_mb=1) for _ in range(2)]
+        for n, cache in enumerate(workers):
+            cache.put_many(texts(f"worker {n}", 150), [vector(n * 1000 + i) for i in range(150)])
+
+        # Each wrote 600 KB; together they are over the limit, and the second one noticed
+        assert workers[0].total_bytes == workers[1].total_bytes <= int(workers[1].max_bytes * 0.9)
+        assert workers[0].evictions == 0 and workers[1].evictions > 0
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("SELECT SUM(size) FROM embeddings").fetchone()[0] == workers[0].total_bytes
+        conn.close()
+        for cache in workers:
+            cache.close()
+
+
+def test_cache_written_before_size_table_is_measured():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.sqlite')
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, dtype TEXT NOT NULL, vector BLOB NOT NULL, "
+                         "size INTEGER NOT NULL, last_used REAL NOT NULL)")
+            conn.executemany("INSERT INTO embeddings VALUES (?, 'float16', ?, ?, 0)",
+                             [(f"old{i}", b"\0" * 512, 512) for i in range(5)])
+        conn.close()
+        cache = EmbeddingCache('m', path=path)
+        assert cache.total_bytes == 5 * 512
+        cache.close()
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [vector(len(text), 8) for text in texts]
+
+
+def test_cached_embeddings_only_embed_misses():
+    with tempfile.TemporaryDirectory() as tmp:
+        model = CountingEmbeddings()
+        embeddings = CachedEmbeddings(model, EmbeddingCache('m', path=os.path.join(tmp, 'cache.sqlite')))
+        first = embeddings.embed_documents(["a", "bb"])
+        second = embeddings.embed_documents(["bb", "ccc", "a"])
+        assert model.calls == [["a", "bb"], ["ccc"]]
+        np.testing.assert_allclose(second[0], first[1], atol=1e-2)
+        np.testing.assert_allclose(embeddings.embed_query("a"), first[0], atol=1e-2)
+        assert len(model.calls) == 2
+        embeddings.cache.close()
+
+
+if __name__ == "__main__":
+    for test in (test_hits_misses_and_bytes_saved, test_least_recently_used_entries_are_evicted,
+                 test_size_limit_is_shared_across_connections, test_cache_written_before_size_table_is_measured,
+                 test_cached_embeddings_only_embed_misses):
+        test()
+        print(f"✅ {test.__name__}")
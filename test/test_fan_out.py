@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Check fan_out / RankFusion (qdrant/fan_out.py): concurrent start, per-retriever
+timeouts, failures and incremental fusion.
+
+    python -m pytest test/test_fan_out.py
+    python test/test_fan_out.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from fan_out import RankFusion, fan_out
+
+
+def sleeper(seconds, value):
+    def run():
+        time.sleep(seconds)
+        return value
+    return run
+
+
+def failing():
+    raise RuntimeError("rerank service unavailable")
+
+
+def test_latency_is_the_slowest_not_the_sum():
+    tasks = {f"r{i}": sleeper(0.2, [i]) for i in range(4)}
+    start = time.perf_counter()
+    outcome = fan_out(tasks, timeout=5)
+    elapsed = time.perf_counter() - start
+    assert sorted(outcome.results) == ["r0", "r1", "r2", "r3"]
+    assert elapsed < 0.6  # sequential would be 0.8s
+
+
+def test_slow_and_failing_retrievers_are_dropped():
+    arrivals = []
+    start = time.perf_counter()
+    outcome = fan_out(
+        {"fast": sleeper(0.05, ["a"]), "slow": sleeper(2.0, ["b"]), "broken": failing, "patient": sleeper(0.3, ["c"])},
+        timeout=0.2,
+        timeouts={"patient": 1.0},
+        on_result=lambda name, value: arrivals.append(name),
+    )
+    assert time.perf_counter() - start < 1.0
+    assert arrivals == ["fast", "patient"]
+    assert outcome.timed_out == ["slow"]
+    assert "rerank service unavailable" in outcome.failed["broken"]
+    assert set(outcome.as_metadata()['retriever_ms']) == {"fast", "patient"}
+
+
+def test_rank_fusion_merges_duplicates():
+    fusion = RankFusion(key=lambda item: item['id'], weights={"bm25": 0.5})
+    fusion.add("dense", [{'id': 1, 'from': 'dense'}, {'id': 2, 'from': 'dense'}])
+    fusion.add("bm25", [{'id': 2, 'from': 'bm25'}, {'id': 3, 'from': 'bm25'}])
+    ranked = fusion.ranked()
+    assert [item['id'] for item, _ in ranked] == [2, 1, 3]
+    assert ranked[0][0]['from'] == 'dense'
+    assert abs(ranked[0][1] - (1 / 62 + 0.5 / 61)) < 1e-12
+
+
+if __name__ == "__main__":
+    for test in (test_latency_is_the_slowest_not_the_sum, test_slow_and_failing_retrievers_are_dropped,
+                 test_rank_fusion_merges_duplicates):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Check the producer/consumer ingest pipeline (qdrant/ingest_pipeline.py):
+every record arrives once and in order, embedding failures are counted
+rather than uploaded, and an error raised by the embed stage reaches the
+caller instead of hanging on a full parse queue.
+
+    python -m pytest test/test_ingest_pipeline.py
+    python test/test_ingest_pipeline.py
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+from qdrant_client import models
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from ingest_pipeline import IngestPipeline, batch_embed_stream
+from local_qdrant import LocalQdrantClient
+
+
+def new_client():
+    client = LocalQdrantClient()
+    client.create_collection('tickets', vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE))
+    return client
+
+
+def to_point(record, vector):
+    return {"id": record, "vector": vector, "payload": {"ticket": record}}
+
+
+def run_in_thread(target, timeout=30):
+    """Run `target` and return (result, error); fails the test if it is still running after `timeout`."""
+    outcome = {}
+
+    def runner():
+        try:
+            outcome['result'] = target()
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "pipeline run hung"
+    return outcome.get('result'), outcome.get('error')
+
+
+def test_records_arrive_once_and_in_order():
+    client = new_client()
+    records = [(i, f"ticket {i}") for i in range(1, 251)]
+    embedded, failed = [], []
+
+    def embed_many(texts):
+        if "ticket 7" in texts:
+            raise RuntimeError("rate limited")
+        return [[1.0, float(len(text))] for text in texts]
+
+    def record_point(record, vector):
+        embedded.append(record)
+        return to_point(record, vector)
+
+    pipeline = IngestPipeline(client, 'tickets', batch_size=16, queue_batches=1, upsert_workers=3)
+    (uploaded, failures), error = run_in_thread(lambda: pipeline.run(
+        records, batch_embed_stream(embed_many, batch_size=5), record_point,
+        on_error=lambda record, e: failed.append(record)))
+    assert error is None
+
+    # The embed batch holding ticket 7 (tickets 6-10) fails as a whole
+    assert failed == [6, 7, 8, 9, 10]
+    assert embedded == [i for i, _ in records if i not in failed]
+    assert (uploaded, failures) == (245, 5)
+    assert client.count('tickets').count == 245
+    stored, _ = client.scroll('tickets', limit=300, with_payload=True)
+    assert sorted(point.payload['ticket'] for point in stored) == embedded
+
+
+def test_embed_stage_error_reaches_the_caller():
+    client = new_client()
+    # Far more records than the bounded parse queue holds, so the parse thread is blocked when embedding fails
+    records = ((i, f"ticket {i}") for i in range(1, 10001))
+
+    def embed_stream(stream):
+        for n, (record, _) in enumerate(stream):
+            if n == 3:
+                raise ConnectionError("embedding endpoint went away")
+            yield record, [1.0, 0.0], None
+
+    pipeline = IngestPipeline(client, 'tickets', batch_size=2, queue_batches=1, upsert_workers=1)
+    _, error = run_in_thread(lambda: pipeline.run(records, embed_stream, to_point))
+    assert isinstance(error, ConnectionError)
+
+    # A point conversion error propagates the same way
+    def bad_point(record, vector):
+        raise ValueError(f"bad record {record}")
+
+    pipeline = IngestPipeline(client, 'tickets', batch_size=2, queue_batches=1, upsert_workers=1)
+    _, error = run_in_thread(lambda: pipeline.run(
+        ((i, "text") for i in range(1, 10001)), batch_embed_stream(lambda texts: [[1.0, 0.0]] * len(texts)),
+        bad_point))
+    assert isinstance(error, ValueError)
+
+
+def test_parse_stage_error_reaches_the_caller():
+    client = new_client()
+
+    def records():
+        yield 1, "ticket 1"
+        raise OSError("CSV truncated")
+
+    pipeline = IngestPipeline(client, 'tickets', batch_size=2)
+    with pytest.raises(OSError):
+        pipeline.run(records(), batch_embed_stream(lambda texts: [[1.0, 0.0]] * len(texts)), to_point)
+
+
+if __name__ == "__main__":
+    for test in (test_records_arrive_once_and_in_order, test_embed_stage_error_reaches_the_caller,
+                 test_parse_stage_error_reaches_the_caller):
+        test()
+        print(f"✅ {test.__name__}")
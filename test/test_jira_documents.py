@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Check that iter_jira_documents (qdrant/upload_jira_csv_to_qdrant_semantic.py)
+skips rows without a ticket id, since chunk and ticket point ids are derived
+from it and id-less rows would overwrite each other on upsert; and that the
+uploaded chunks can be deleted again by their `id` payload.
+
+    python -m pytest test/test_jira_documents.py
+    python test/test_jira_documents.py
+"""
+
+import os
+import sys
+import tempfile
+import warnings
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+from combined_collection import ticket_point_id
+from delta_sync import delete_tickets
+from local_qdrant import FakeEmbeddings, LocalQdrantClient, split_chunks, write_csv
+from semantic_chunking import chunk_point_id
+from upload_jira_csv_to_qdrant_semantic import iter_jira_documents, upload_to_qdrant
+
+ROWS = [
+    {'id': '101', 'key': 'HBASE-1', 'title': 'Region server crash', 'description': 'OOM on startup'},
+    {'id': '', 'key': 'HBASE-2', 'title': 'Missing id', 'description': 'should be skipped'},
+    {'id': '102', 'key': 'HBASE-3', 'title': '', 'description': ''},
+    {'id': '  ', 'key': 'HBASE-4', 'title': 'Blank id', 'description': 'should be skipped'},
+    {'id': '103', 'key': 'HBASE-5', 'title': 'Slow scan', 'description': ''},
+]
+
+
+def test_rows_without_id_are_skipped():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jira.csv')
+        write_csv(path, ROWS)
+        documents = list(iter_jira_documents(path))
+
+    assert [doc.metadata['key'] for doc in documents] == ['HBASE-1', 'HBASE-5']
+    assert [doc.metadata['id'] for doc in documents] == [101, 103]
+    ids = {chunk_point_id(doc.metadata['id'], 0) for doc in documents}
+    assert len(ids) == len(documents)
+
+
+def test_skipped_rows_do_not_count_towards_max_docs():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jira.csv')
+        write_csv(path, ROWS)
+        documents = list(iter_jira_documents(path, max_docs=2))
+        resumed = list(iter_jira_documents(path, start_line=1))
+
+    assert [doc.metadata['key'] for doc in documents] == ['HBASE-1', 'HBASE-5']
+    assert [doc.metadata['key'] for doc in resumed] == ['HBASE-5']
+
+
+def test_point_ids_refuse_missing_ticket_id():
+    with pytest.raises(ValueError):
+        chunk_point_id(None, 0)
+    with pytest.raises(ValueError):
+        ticket_point_id(None)
+    assert ticket_point_id(101) == 101
+
+
+def test_uploaded_chunks_delete_by_payload():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jira.csv')
+        write_csv(path, ROWS)
+        documents = list(iter_jira_documents(path))
+
+    client = LocalQdrantClient()
+    chunks = [pair for document in documents for pair in split_chunks(document, 3)]
+    assert upload_to_qdrant(chunks, client, 'jira', FakeEmbeddings(), sparse=False) == (6, 0)
+    assert client.count('jira').count == 6
+
+    # Chunks of ticket 101 go whether the caller has the int or the CSV string
+    delete_tickets(client, 'jira', ['101'], by_payload=True)
+    assert client.count('jira').count == 3
+    delete_tickets(client, 'jira', [103], by_payload=True)
+    assert client.count('jira').count == 0
+
+
+if __name__ == "__main__":
+    for test in (test_rows_without_id_are_skipped, test_skipped_rows_do_not_count_towards_max_docs,
+                 test_point_ids_refuse_missing_ticket_id, test_uploaded_chunks_delete_by_payload):
+        test()
+        print(f"✅ {test.__name__}")
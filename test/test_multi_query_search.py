@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Check multi_query_search (qdrant/multi_query_search.py) against an in-memory
+Qdrant: one batch request for all rewrites, fused to one hit per ticket.
+
+    python -m pytest test/test_multi_query_search.py
+    python test/test_multi_query_search.py
+"""
+
+import os
+import sys
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from multi_query_search import multi_query_search
+
+DIMENSIONS = 16
+
+
+def chunk_collection(tickets=30, chunks_per_ticket=3, seed=7):
+    """Tickets stored as several chunk points each (payload `id` is the ticket id)."""
+    rng = np.random.default_rng(seed)
+    client = QdrantClient(":memory:")
+    client.create_collection("chunks", vectors_config=models.VectorParams(size=DIMENSIONS,
+                                                                           distance=models.Distance.COSINE))
+    centers = rng.normal(size=(tickets, DIMENSIONS))
+    points = [
+        models.PointStruct(id=ticket * chunks_per_ticket + chunk,
+                           vector=(centers[ticket] + 0.05 * rng.normal(size=DIMENSIONS)).tolist(),
+                           payload={'id': 1000 + ticket, 'chunk_index': chunk})
+        for ticket in range(tickets) for chunk in range(chunks_per_ticket)
+    ]
+    client.upsert("chunks", points)
+    return client, centers
+
+
+class CountingClient:
+    """Forwards to a client, counting Qdrant requests."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        self.calls.append(name)
+        return getattr(self.client, name)
+
+
+def test_one_batch_request_one_hit_per_ticket():
+    client, centers = chunk_collection()
+    counting = CountingClient(client)
+    # Three rewrites close to tickets 4, 4 and 9
+    rewrites = [centers[4], centers[4] + 0.1, centers[9]]
+    fused = multi_query_search(counting, "chunks", [vector.tolist() for vector in rewrites], limit=5)
+    assert counting.calls == ["query_batch_points"]
+    tickets = [hit.payload['id'] for hit, _ in fused]
+    assert len(tickets) == len(set(tickets)) == 5
+    # Ticket 4 is the best hit of two rewrites; ticket 9 of the third
+    assert tickets[0] == 1004 and 1009 in tickets
+    scores = [score for _, score in fused]
+    assert scores == sorted(scores, reverse=True)
+
+
+if __name__ == "__main__":
+    test_one_batch_request_one_hit_per_ticket()
+    print("✅ test_one_batch_request_one_hit_per_ticket")
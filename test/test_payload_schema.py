@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Check the epoch-seconds date conversion (qdrant/payload_schema.py): naive
+dates are UTC, tz-aware dates are converted to UTC, empty and malformed
+values become None, and the vectorized epoch_series agrees with to_epoch
+value by value.
+
+    python -m pytest test/test_payload_schema.py
+    python test/test_payload_schema.py
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from payload_schema import epoch_series, from_epoch, normalize_dates, to_epoch
+
+JAN_6 = 1388966400  # 2014-01-06 00:00:00 UTC
+
+# value, epoch seconds
+DATES = [
+    ('2014-01-06 00:00:00.000', JAN_6),             # the export's format, naive: taken as UTC
+    ('2014-01-06', JAN_6),
+    ('2014-01-06T02:00:00+02:00', JAN_6),           # tz-aware: converted to UTC
+    ('2014-01-05 19:00:00.000-05:00', JAN_6),
+    ('01/06/2014', JAN_6),                          # not ISO: parsed by pandas
+    ('', None),
+    ('   ', None),
+    ('not a date', None),
+    ('2014-13-45 00:00:00', None),
+    (None, None),
+    (float('nan'), None),
+]
+
+
+def test_to_epoch():
+    assert [to_epoch(value) for value, _ in DATES] == [expected for _, expected in DATES]
+    # Already epoch seconds
+    assert to_epoch(JAN_6) == JAN_6 and to_epoch(float(JAN_6)) == JAN_6
+    assert to_epoch(True) is None
+    assert from_epoch(to_epoch('2014-01-06T02:00:00+02:00')) == datetime(2014, 1, 6)
+
+
+def test_epoch_series_matches_to_epoch():
+    values = pd.Series([value for value, _ in DATES], index=range(10, 10 + len(DATES)))
+    converted = epoch_series(values)
+    assert converted.index.equals(values.index)
+    assert converted.tolist() == [expected for _, expected in DATES]
+    assert all(type(seconds) is int for seconds in converted if seconds is not None)
+
+    # The first value decides nothing: an all-tz-aware or all-malformed column works too
+    assert epoch_series(pd.Series(['2014-01-06T02:00:00+02:00', '2014-01-06 00:00:00.000'])).tolist() == [JAN_6] * 2
+    assert epoch_series(pd.Series(['', 'garbage'])).tolist() == [None, None]
+
+
+def test_normalize_dates():
+    payload = {'created': '2014-01-06T02:00:00+02:00', 'resolved': '', 'updated': JAN_6, 'title': '2014-01-06'}
+    assert normalize_dates(payload) == {'created': JAN_6, 'resolved': None, 'updated': JAN_6, 'title': '2014-01-06'}
+
+
+if __name__ == "__main__":
+    for test in (test_to_epoch, test_epoch_series_matches_to_epoch, test_normalize_dates):
+        test()
+        print(f"✅ {test.__name__}")
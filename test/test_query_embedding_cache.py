@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Check QueryEmbeddingCache (qdrant/query_embedding_cache.py): one embedding per
+distinct query, LRU + TTL eviction and per-request stats.
+
+    python -m pytest test/test_query_embedding_cache.py
+    python test/test_query_embedding_cache.py
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from query_embedding_cache import QueryEmbeddingCache, key_namespace
+
+
+class CountingEmbedder:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, text):
+        with self._lock:
+            self.calls.append(text)
+        time.sleep(self.delay)
+        return [float(len(text))]
+
+
+def test_concurrent_callers_embed_once():
+    cache = QueryEmbeddingCache()
+    embed = CountingEmbedder(delay=0.05)
+    queries = ["Memory leak in XML parser"] * 8 + ["  memory LEAK in xml   parser "]
+    with ThreadPoolExecutor(max_workers=9) as pool:
+        vectors = list(pool.map(lambda query: cache.get_or_embed(query, embed), queries))
+    assert len(embed.calls) == 1
+    assert all(vector == vectors[0] for vector in vectors)
+    assert cache.stats.hits == 8 and cache.stats.misses == 1
+    assert cache.stats.saved_seconds > 0
+
+
+def test_lru_and_ttl_eviction():
+    now = [0.0]
+    cache = QueryEmbeddingCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    embed = CountingEmbedder()
+    for query in ("a", "b", "a", "c"):  # "b" is least recently used when "c" arrives
+        cache.get_or_embed(query, embed)
+    assert embed.calls == ["a", "b", "c"] and cache.evictions == 1
+    cache.get_or_embed("b", embed)
+    assert embed.calls[-1] == "b"
+    now[0] = 11
+    cache.get_or_embed("b", embed)
+    assert embed.calls == ["a", "b", "c", "b", "b"]
+
+
+def test_request_stats_and_namespaces():
+    cache = QueryEmbeddingCache()
+    embed = CountingEmbedder()
+    cache.get_or_embed("warm", embed)
+    with cache.track() as stats:
+        cache.get_or_embed("warm", embed)
+        cache.get_or_embed("Warm", embed, namespace="other-model")
+        cache.get_or_embed("warm ", embed, namespace="other-model")
+    assert stats.as_dict()['hits'] == 2 and stats.as_dict()['misses'] == 1
+    assert stats.as_dict()['hit_rate'] == round(2 / 3, 3)
+    assert cache.stats.misses == 2
+
+
+def test_many_embeds_misses_in_one_call():
+    cache = QueryEmbeddingCache()
+    batches = []
+
+    def embed_many(texts):
+        batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    cache.get_or_embed("kafka lag", CountingEmbedder())
+    vectors = cache.get_or_embed_many(["kafka lag", "Consumer lag", "consumer  lag", "broker down"], embed_many)
+    assert batches == [["Consumer lag", "broker down"]]
+    assert vectors[1] == vectors[2] and vectors[0] == [9.0]
+    assert cache.get_or_embed_many(["broker down"], embed_many) == [[11.0]] and len(batches) == 1
+
+
+def test_api_keys_do_not_share_vectors():
+    cache = QueryEmbeddingCache()
+    embed = CountingEmbedder()
+    for api_key in ("sk-alice", "sk-bob", "sk-alice", "invalid"):
+        cache.get_or_embed("kafka lag", embed, key_namespace("text-embedding-3-small", api_key))
+    # Each key pays for (and is checked by) its own embedding call; only a repeat of the same key hits
+    assert len(embed.calls) == 3 and cache.stats.hits == 1
+    assert "sk-alice" not in key_namespace("model", "sk-alice")
+    assert key_namespace("model", None) == "model"
+
+
+if __name__ == "__main__":
+    for test in (test_concurrent_callers_embed_once, test_lru_and_ttl_eviction, test_request_stats_and_namespaces,
+                 test_many_embeds_misses_in_one_call, test_api_keys_do_not_share_vectors):
+        test()
+        print(f"✅ {test.__name__}")
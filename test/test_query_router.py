@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Check the supervisor's fast-path rules (qdrant/query_router.py).
+
+    python -m pytest test/test_query_router.py
+    python test/test_query_router.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from query_router import ROUTER_CONFIDENCE, rule_route
+
+
+def confident(decision):
+    return decision.confidence >= ROUTER_CONFIDENCE
+
+
+def test_prompt_rules_decide_without_llm():
+    cases = [
+        ("What is the status of HBASE-1234?", False, True, "BM25"),
+        ("prod down ClassCastException", False, True, "ContextualCompression"),
+        ("ClassCastException in production", True, True, "ContextualCompression"),
+        ("Show me all Hibernate lazy loading issues and their solutions", True, False, "Ensemble"),
+        ("application crashes after processing many files", False, False, "ContextualCompression"),
+        ("ClassCastException SAXParserFactory", False, False, "BM25"),
+    ]
+    for query, user_can_wait, production_incident, agent in cases:
+        decision = rule_route(query, user_can_wait, production_incident)
+        assert decision.agent == agent, query
+        assert confident(decision) and decision.tier == 'rules', query
+
+
+def test_ambiguous_queries_escalate():
+    decision = rule_route("Why does SAXParserFactory throw ClassCastException in multi-threaded code?")
+    assert not confident(decision)
+    assert decision.features['error_names'] == ['ClassCastException']
+
+
+def test_rules_are_fast():
+    start = time.perf_counter()
+    for _ in range(1000):
+        rule_route("How do I fix memory leaks in Xerces-C++ when scanning multiple XML documents?")
+    assert (time.perf_counter() - start) / 1000 < 0.001
+
+
+if __name__ == "__main__":
+    for test in (test_prompt_rules_decide_without_llm, test_ambiguous_queries_escalate, test_rules_are_fast):
+        test()
+        print(f"✅ {test.__name__}")
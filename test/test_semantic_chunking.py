@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Check VectorSemanticChunker (qdrant/semantic_chunking.py) against LangChain's
+SemanticChunker: same text, same embeddings, same chunks for every breakpoint
+threshold type and min_chunk_size; and that ShardedChunker's pipelined
+windows match the single-process chunker.
+
+    python -m pytest test/test_semantic_chunking.py
+    python test/test_semantic_chunking.py
+"""
+
+import os
+import random
+import re
+import sys
+import warnings
+import zlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+from langchain_core.documents import Document
+from langchain_experimental.text_splitter import SemanticChunker
+
+from semantic_chunking import ShardedChunker, VectorSemanticChunker
+
+TOPICS = [
+    "region server heap memory garbage collection pause",
+    "kafka consumer lag partition rebalance offset",
+    "login page password reset email token",
+    "build failure maven dependency version plugin",
+]
+
+
+class BagOfWordsEmbeddings:
+    """Deterministic embeddings where sentences sharing words are close (so breakpoints are meaningful)."""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(word.encode('utf-8')) % self.dim] += 1.0
+        # Deterministic jitter: integer counts give exactly tied distances, which real embeddings don't,
+        # and a tie at the threshold can flip on the last bit between two cosine implementations
+        vector += np.random.default_rng(zlib.crc32(text.encode('utf-8'))).normal(0.0, 1e-3, self.dim)
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def build_stand_in():
+    """Picklable factory for ShardedChunker workers: (embeddings, meter-like object)."""
+    embeddings = BagOfWordsEmbeddings()
+    embeddings.tokens = embeddings.texts = 0
+    return embeddings, embeddings
+
+
+def synthetic_texts(count=30, seed=4):
+    rng = random.Random(seed)
+    texts = ["Only one sentence here.", "Heap pause on the region server. Kafka consumer lag grows."]
+    for _ in range(count):
+        sentences = []
+        for topic in rng.sample(TOPICS, rng.randint(1, 4)):
+            words = topic.split()
+            for _ in range(rng.randint(1, 5)):
+                sentences.append(" ".join(rng.choices(words, k=rng.randint(3, 9))).capitalize() + ".")
+        texts.append(" ".join(sentences))
+    return texts
+
+
+CONFIGS = [
+    {'breakpoint_threshold_type': 'percentile'},
+    {'breakpoint_threshold_type': 'standard_deviation'},
+    {'breakpoint_threshold_type': 'interquartile'},
+    {'breakpoint_threshold_type': 'gradient'},
+    {'breakpoint_threshold_type': 'percentile', 'breakpoint_threshold_amount': 60, 'min_chunk_size': 80},
+    {'breakpoint_threshold_type': 'percentile', 'buffer_size': 2},
+    {'number_of_chunks': 3},
+]
+
+
+def test_chunks_match_semantic_chunker():
+    embeddings = BagOfWordsEmbeddings()
+    texts = synthetic_texts()
+    documents = [Document(page_content=text, metadata={'id': i}) for i, text in enumerate(texts)]
+    for config in CONFIGS:
+        reference = SemanticChunker(embeddings, **config)
+        chunker = VectorSemanticChunker(embeddings, **config)
+        grouped = chunker.split_documents_grouped(documents)
+        for text, doc_chunks in zip(texts, grouped):
+            assert [chunk.page_content for chunk, _ in doc_chunks] == reference.split_text(text), (config, text)
+        # At least some documents really are split, or the comparison proves little
+        assert any(len(doc_chunks) > 1 for doc_chunks in grouped), config
+
+
+def test_pooled_vectors_are_unit_means():
+    embeddings = BagOfWordsEmbeddings()
+    chunker = VectorSemanticChunker(embeddings, breakpoint_threshold_type='percentile', buffer_size=0)
+    text = synthetic_texts(1, seed=9)[-1]
+    for chunk, vector in chunker.split_documents_with_vectors([Document(page_content=text)]):
+        sentence_vectors = np.asarray(embeddings.embed_documents(chunker._get_single_sentences_list(
+            chunk.page_content)))
+        sentence_vectors /= np.linalg.norm(sentence_vectors, axis=1, keepdims=True)
+        expected = sentence_vectors.mean(axis=0)
+        np.testing.assert_allclose(vector, expected / np.linalg.norm(expected), rtol=1e-5, atol=1e-6)
+
+
+def test_sharded_windows_match_single_process():
+    documents = [Document(page_content=text, metadata={'id': i}) for i, text in enumerate(synthetic_texts(40))]
+    windows = [documents[i:i + 7] for i in range(0, len(documents), 7)]
+    chunker = VectorSemanticChunker(BagOfWordsEmbeddings(), breakpoint_threshold_type='percentile')
+    expected = [[chunk.page_content for chunk, _ in doc_chunks]
+                for window in windows for doc_chunks in chunker.split_documents_grouped(window)]
+    with ShardedChunker(3, build_stand_in, breakpoint_threshold_type='percentile') as pool:
+        results = list(pool.map_windows(iter(windows), ahead=2))
+    assert [window for window, _ in results] == windows
+    assert [[chunk.page_content for chunk, _ in doc_chunks]
+            for _, grouped in results for doc_chunks in grouped] == expected
+
+
+if __name__ == "__main__":
+    for test in (test_chunks_match_semantic_chunker, test_pooled_vectors_are_unit_means,
+                 test_sharded_windows_match_single_process):
+        test()
+        print(f"✅ {test.__name__}")
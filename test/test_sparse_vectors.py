@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Check the lexical sparse vectors (qdrant/sparse_vectors.py): term ids, BM25 tf
+weighting, points with an unnamed dense vector, and hybrid queries against an
+in-memory Qdrant collection, including one the semantic uploader wrote (the
+notebook's hybrid search path).
+
+    python -m pytest test/test_sparse_vectors.py
+    python test/test_sparse_vectors.py
+"""
+
+import os
+import sys
+import tempfile
+import warnings
+import zlib
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+warnings.filterwarnings('ignore', category=DeprecationWarning)
+
+from bm25_engine import term_weights
+from local_qdrant import FakeEmbeddings, LocalQdrantClient, split_chunks, write_csv
+from sparse_vectors import (SPARSE_AVG_TOKENS, SPARSE_VECTOR, SPARSE_VECTORS_CONFIG, document_sparse_vector,
+                            has_sparse_vector, hybrid_search, query_sparse_vector, term_index,
+                            with_sparse_vector)
+from upload_jira_csv_to_qdrant_semantic import iter_jira_documents, upload_to_qdrant
+
+
+def test_term_ids_and_tf_weighting():
+    assert term_index("xerces") == zlib.crc32(b"xerces")
+    vector = document_sparse_vector("Xerces leak: xerces LEAK xerces parser")
+    assert vector['indices'] == sorted(vector['indices'])
+    weights = dict(zip(vector['indices'], vector['values']))
+    # tf 3 / 2 / 1 in a 6-token document, saturated and length-normalized like BM25
+    expected = term_weights([3, 2, 1], 6, SPARSE_AVG_TOKENS)
+    np.testing.assert_allclose([weights[term_index(t)] for t in ("xerces", "leak", "parser")], expected, rtol=1e-6)
+    assert weights[term_index("xerces")] < 3 * weights[term_index("parser")]
+    assert document_sparse_vector("  ") == {'indices': [], 'values': []}
+
+    query = query_sparse_vector("leak leak parser")
+    assert dict(zip(query.indices, query.values)) == {term_index("leak"): 2.0, term_index("parser"): 1.0}
+
+
+def test_with_sparse_vector_names_dense_vectors():
+    point = with_sparse_vector({'id': 1, 'vector': [0.1, 0.2]}, "kafka lag")
+    assert set(point['vector']) == {"", SPARSE_VECTOR} and point['vector'][""] == [0.1, 0.2]
+    named = with_sparse_vector({'id': 2, 'vector': {'ticket': [0.3, 0.4]}}, "kafka lag")
+    assert set(named['vector']) == {'ticket', SPARSE_VECTOR}
+
+
+def test_hybrid_search_finds_exact_terms():
+    client = QdrantClient(":memory:")
+    client.create_collection('tickets', vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE),
+                             sparse_vectors_config=SPARSE_VECTORS_CONFIG)
+    assert has_sparse_vector(client, 'tickets')
+    texts = {1: "kafka consumer lag", 2: "NullPointerException in RegionServer", 3: "slow dashboard"}
+    # Dense vectors all point the same way, so only the lexical prefetch separates the tickets
+    points = [with_sparse_vector({'id': i, 'vector': [1.0, 0.0], 'payload': {'text': text}}, text)
+              for i, text in texts.items()]
+    client.upsert('tickets', points=[models.PointStruct(**point) for point in points])
+    hits = hybrid_search(client, 'tickets', [1.0, 0.0], "nullpointerexception", limit=3)
+    assert hits[0].id == 2
+
+
+def test_hybrid_search_on_uploaded_chunks():
+    rows = [
+        {'id': '1', 'key': 'HBASE-1', 'project': 'HBASE', 'title': 'Region server OutOfMemoryError', 'description': ''},
+        {'id': '2', 'key': 'HBASE-2', 'project': 'HBASE', 'title': 'Slow scan', 'description': 'full table scan'},
+        {'id': '3', 'key': 'SPR-3', 'project': 'SPR', 'title': 'Context loader OutOfMemoryError', 'description': ''},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jira.csv')
+        write_csv(path, rows)
+        documents = list(iter_jira_documents(path))
+    client = LocalQdrantClient()
+    chunks = [pair for doc in documents for pair in split_chunks(doc, 2)]
+    assert upload_to_qdrant(chunks, client, 'chunks', FakeEmbeddings(), sparse=True) == (6, 0)
+    assert has_sparse_vector(client, 'chunks')
+
+    query_vector = FakeEmbeddings().embed_query("unrelated query")
+    hits = hybrid_search(client, 'chunks', query_vector, "outofmemoryerror", limit=4)
+    assert {hit.payload['id'] for hit in hits[:2]} <= {1, 3}
+    hbase = models.Filter(must=[models.FieldCondition(key='project', match=models.MatchValue(value='HBASE'))])
+    hits = hybrid_search(client, 'chunks', query_vector, "outofmemoryerror", limit=4, query_filter=hbase)
+    assert hits[0].payload['id'] == 1 and all(hit.payload['project'] == 'HBASE' for hit in hits)
+
+
+if __name__ == "__main__":
+    for test in (test_term_ids_and_tf_weighting, test_with_sparse_vector_names_dense_vectors,
+                 test_hybrid_search_finds_exact_terms, test_hybrid_search_on_uploaded_chunks):
+        test()
+        print(f"✅ {test.__name__}")
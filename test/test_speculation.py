@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Check speculative retrieval (qdrant/speculation.py): reuse, key/limit
+matching, cancellation and saved-latency accounting.
+
+    python -m pytest test/test_speculation.py
+    python test/test_speculation.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from speculation import current_speculation, speculate, take_speculative
+
+
+def slow_search(calls, seconds=0.1, count=20):
+    def search():
+        calls.append(time.perf_counter())
+        # A consumer inside the speculative search itself must not wait on it
+        assert take_speculative("q", 5) is None
+        time.sleep(seconds)
+        return [{'rank': i} for i in range(count)]
+    return search
+
+
+def test_consumer_reuses_the_running_search():
+    calls = []
+    with speculate(slow_search(calls), "q", 20) as speculation:
+        time.sleep(0.15)  # routing
+        results = take_speculative("q", 10, consumer="ContextualCompression")
+        assert [r['rank'] for r in results] == list(range(10))
+        results[0]['source'] = 'changed'
+        again = take_speculative("q", 20, consumer="Ensemble")
+        assert 'source' not in again[0]
+    assert len(calls) == 1
+    metadata = speculation.as_metadata()
+    assert metadata['used_by'] == ["ContextualCompression", "Ensemble"] and not metadata['cancelled']
+    # The whole first search overlapped routing, and the second consumer skipped a full search
+    assert metadata['saved_ms'] >= 2 * metadata['search_ms'] - 1
+
+
+def test_mismatches_and_cancellation():
+    calls = []
+    with speculate(slow_search(calls, seconds=0.05), "q", 10) as speculation:
+        assert take_speculative("other query", 5) is None
+        assert take_speculative("q", 50) is None
+    assert speculation.as_metadata()['cancelled'] and speculation.saved_seconds == 0
+    assert current_speculation() is None and take_speculative("q", 5) is None
+    with speculate(slow_search(calls), "q", 10, enabled=False) as disabled:
+        assert disabled is None and take_speculative("q", 5) is None
+
+
+if __name__ == "__main__":
+    for test in (test_consumer_reuses_the_running_search, test_mismatches_and_cancellation):
+        test()
+        print(f"✅ {test.__name__}")
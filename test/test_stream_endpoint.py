@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Check the notebook's streaming endpoint (POST /multiagent-rag/stream in
+Cuttlefish3_Complete.ipynb) with Flask's test client: SSE and NDJSON framing,
+the routing -> retrieval -> token... -> done event order (error instead of
+done on failure), and time_to_first_byte / time_to_first_token in the final
+metadata, for a fresh answer and for an answer-cache hit.
+
+The notebook's own utility, query-interface and endpoint cells are executed;
+only the LangGraph workflow and the ResponseWriter are replaced by scripted
+stand-ins, so no API keys or Qdrant server are needed.
+
+    python -m pytest test/test_stream_endpoint.py
+    python test/test_stream_endpoint.py
+"""
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+flask = pytest.importorskip('flask')
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+NOTEBOOK = os.path.join(TEST_DIR, '..', 'Cuttlefish3_Complete.ipynb')
+sys.path.insert(0, os.path.join(TEST_DIR, '..', 'qdrant'))
+
+from local_qdrant import FakeEmbeddings
+from query_embedding_cache import QueryEmbeddingCache
+
+# First line of each notebook cell that is executed, in notebook order
+CELLS = (
+    '# Shared utility functions for direct Qdrant client access',
+    '# Multi-Agent System Interface',
+    '# API Endpoints',
+)
+
+CONTEXTS = [
+    {'content': 'Title: Region server crash\nDescription: OOM',
+     'metadata': {'key': 'HBASE-1', 'title': 'Region server crash'}},
+    {'content': 'Title: Slow scan\nDescription: full table scan',
+     'metadata': {'key': 'HBASE-2', 'title': 'Slow scan'}},
+]
+TOKENS = ["HBASE-1 ", "looks ", "related."]
+
+
+class ScriptedWorkflow:
+    """Stand-in for the retrieval graph: the supervisor's update, then the retriever's."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def stream(self, state, stream_mode):
+        assert stream_mode == "updates"
+        yield {'supervisor': {'routing_decision': 'BM25', 'routing_reasoning': 'exact ticket terms',
+                              'routing_metadata': {'tier': 'rules'}}}
+        if self.fail:
+            raise RuntimeError("retriever unavailable")
+        yield {'BM25': {'retrieved_contexts': CONTEXTS, 'retrieval_method': 'BM25',
+                        'retrieval_metadata': {'num_results': len(CONTEXTS)}}}
+
+
+class ScriptedWriter:
+    def stream_response(self, query, contexts, production_incident, retrieval_method):
+        yield from TOKENS
+
+
+def notebook_app(fail=False):
+    """Execute the notebook cells behind the endpoint and return (Flask app, namespace)."""
+    with open(NOTEBOOK, 'r', encoding='utf-8') as f:
+        cells = {''.join(cell['source']).split('\n', 1)[0]: ''.join(cell['source'])
+                 for cell in json.load(f)['cells'] if cell['cell_type'] == 'code'}
+    namespace = {'__name__': 'notebook'}
+    exec("""
+import json, os, time
+from datetime import datetime
+from typing import Any, Dict, List
+from flask import Flask, Response, jsonify, request, stream_with_context
+from langchain_core.messages import HumanMessage
+from qdrant_client import models
+""", namespace)
+    namespace.update({
+        'app': flask.Flask('cuttlefish3-test'),
+        'qdrant_client': None,
+        'QDRANT_COLLECTION': 'jira',
+        'embeddings': FakeEmbeddings(),
+        'query_embedding_cache': QueryEmbeddingCache(),
+        'ensemble_agent': SimpleNamespace(k=5),
+        'retrieval_rag': ScriptedWorkflow(fail),
+        'response_writer_agent': ScriptedWriter(),
+    })
+    for header in CELLS:
+        exec(cells[header], namespace)
+    return namespace['app'], namespace
+
+
+def sse_events(body):
+    events = []
+    for frame in body.split("\n\n"):
+        if not frame:
+            continue
+        lines = frame.split("\n")
+        assert lines[0].startswith("event: ") and lines[1].startswith("data: ") and len(lines) == 2
+        events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+    return events
+
+
+def assert_answer_events(events):
+    names = [name for name, _ in events]
+    assert names == ['routing', 'retrieval'] + ['token'] * (len(names) - 3) + ['done']
+    routing, retrieval, done = events[0][1], events[1][1], events[-1][1]
+    assert routing['routing_decision'] == 'BM25'
+    assert retrieval['tickets'] == [{'key': 'HBASE-1', 'title': 'Region server crash'},
+                                    {'key': 'HBASE-2', 'title': 'Slow scan'}]
+    assert ''.join(data['text'] for name, data in events if name == 'token').strip() == done['answer']
+    metadata = done['metadata']
+    assert metadata['streamed'] is True
+    assert metadata['time_to_first_byte'] is not None and metadata['time_to_first_token'] is not None
+    assert 0 <= metadata['time_to_first_byte'] <= metadata['time_to_first_token']
+    return done
+
+
+def test_sse_stream_order_and_latencies():
+    app, _ = notebook_app()
+    client = app.test_client()
+
+    response = client.post('/multiagent-rag/stream', json={'query': 'region server OOM'}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache' and response.headers['X-Accel-Buffering'] == 'no'
+    # Events are flushed one at a time: routing goes out before the answer exists
+    chunks = iter(response.response)
+    first = next(chunks)
+    first = first.decode('utf-8') if isinstance(first, bytes) else first
+    assert first.startswith("event: routing\n")
+    body = first + ''.join(c.decode('utf-8') if isinstance(c, bytes) else c for c in chunks)
+    events = sse_events(body)
+    done = assert_answer_events(events)
+    assert done['answer'] == ''.join(TOKENS).strip() and done['metadata']['cached'] is False
+    assert [data['text'] for name, data in events if name == 'token'] == TOKENS
+
+    # The same question again is answered from the answer cache, still as a full event sequence
+    cached = sse_events(client.post('/multiagent-rag/stream', json={'query': 'region server OOM'}).get_data(True))
+    done = assert_answer_events(cached)
+    assert done['metadata']['cached'] is True and done['answer'] == ''.join(TOKENS).strip()
+
+
+def test_ndjson_stream():
+    app, _ = notebook_app()
+    client = app.test_client()
+    for kwargs in ({'json': {'query': 'slow scan', 'format': 'jsonl', 'use_cache': False}},
+                   {'json': {'query': 'slow scan', 'use_cache': False}, 'headers': {'Accept': 'application/x-ndjson'}}):
+        response = client.post('/multiagent-rag/stream', **kwargs)
+        assert response.mimetype == 'application/x-ndjson'
+        body = response.get_data(as_text=True)
+        assert body.endswith("\n")
+        lines = [json.loads(line) for line in body.splitlines()]
+        assert all(set(line) == {'event', 'data'} for line in lines)
+        assert_answer_events([(line['event'], line['data']) for line in lines])
+
+
+def test_error_event_replaces_done():
+    app, _ = notebook_app(fail=True)
+    client = app.test_client()
+    events = sse_events(client.post('/multiagent-rag/stream', json={'query': 'kafka lag'}).get_data(as_text=True))
+    assert [name for name, _ in events] == ['routing', 'error']
+    error = events[-1][1]
+    assert 'retriever unavailable' in error['error'] and error['time_to_first_byte'] is not None
+
+
+def test_rejects_missing_query():
+    app, _ = notebook_app()
+    client = app.test_client()
+    assert client.post('/multiagent-rag/stream', json={'query': '  '}).status_code == 400
+    assert client.post('/multiagent-rag/stream', data='not json', content_type='text/plain').status_code == 400
+
+
+if __name__ == "__main__":
+    for test in (test_sse_stream_order_and_latencies, test_ndjson_stream, test_error_event_replaces_done,
+                 test_rejects_missing_query):
+        test()
+        print(f"✅ {test.__name__}")
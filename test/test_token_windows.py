@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Check token-aware splitting and batching (qdrant/token_windows.py,
+qdrant/embedding_pipeline.py): no window exceeds the token limit, consecutive
+windows share exactly the configured overlap, embedding requests stay under
+EMBED_BATCH_TOKENS, and collapsing windows / chunks still yields `limit`
+distinct tickets when one ticket's windows dominate the hits.
+
+The splitter is given a byte-level stand-in for the tiktoken encoding, so
+the checks run without downloading the model's BPE ranks.
+
+    python -m pytest test/test_token_windows.py
+    python test/test_token_windows.py
+"""
+
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+import pytest
+import tiktoken
+from qdrant_client import models
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+import token_windows
+from embedding_pipeline import BatchEmbedder
+from token_windows import (TokenWindowSplitter, collapse_windows, search_distinct_tickets, window_payload,
+                           window_point_id)
+
+MERGES = [b"th", b"he", b"in", b"er", b"an", b"re", b"on", b"the", b"ion"]
+OFFLINE_ENCODING = tiktoken.Encoding(
+    name='test_bytes',
+    pat_str=r"""\s?\w+|\s?[^\s\w]+|\s+""",
+    mergeable_ranks={**{bytes([i]): i for i in range(256)}, **{m: 256 + i for i, m in enumerate(MERGES)}},
+    special_tokens={}
+)
+
+WORDS = "the region server threw an exception on compaction; then the master reran the operation".split()
+
+
+def offline_splitter(**kwargs):
+    original = token_windows.tiktoken.encoding_for_model
+    token_windows.tiktoken.encoding_for_model = lambda model: OFFLINE_ENCODING
+    try:
+        return TokenWindowSplitter('text-embedding-3-small', **kwargs)
+    finally:
+        token_windows.tiktoken.encoding_for_model = original
+
+
+def ticket_text(words, seed=0):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def test_windows_respect_limit_and_overlap():
+    splitter = offline_splitter(max_tokens=50, overlap=10)
+    text = ticket_text(400)
+    tokens = splitter._encode(text)
+    windows = splitter.split(text)
+
+    assert len(windows) > 1
+    assert all(splitter.count(window) <= 50 for window in windows)
+    window_tokens = [splitter._encode(window) for window in windows]
+    for previous, current in zip(window_tokens, window_tokens[1:]):
+        assert previous[-10:] == current[:10]
+    # Dropping each window's overlap reassembles the ticket exactly
+    rebuilt = window_tokens[0] + [t for w in window_tokens[1:] for t in w[10:]]
+    assert rebuilt == tokens
+    assert splitter.split_tickets == 1 and splitter.windows == len(windows)
+
+    short = ticket_text(5)
+    assert splitter.split(short) == [short]
+    with pytest.raises(ValueError):
+        offline_splitter(max_tokens=10, overlap=10)
+
+
+def test_window_ids_and_payloads():
+    assert window_point_id(42, 0) == 42
+    assert window_point_id(42, 1) == window_point_id(42, 1) != window_point_id(42, 2)
+    payload = window_payload({'key': 'HBASE-42', 'content': 'whole ticket'}, 42, 1, 3, 'window text')
+    assert payload == {'key': 'HBASE-42', 'content': 'window text', 'parent_id': 42, 'window_index': 1,
+                       'window_count': 3}
+
+
+def test_batches_stay_under_request_token_cap():
+    splitter = offline_splitter(max_tokens=60, overlap=5)
+    texts = [window for seed in range(40) for window in splitter.split(ticket_text(5 + seed * 7, seed))]
+    requests = []
+
+    def create(input, model, **kwargs):
+        requests.append(list(input))
+        # Out of order on purpose: the embedder must sort by index
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=data[::-1])
+
+    client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    embedder = BatchEmbedder('text-embedding-3-small', batch_size=64, max_workers=3, client=client,
+                             token_counter=splitter.count, max_batch_tokens=200)
+    vectors = embedder.embed(texts)
+
+    assert vectors == [[float(len(text))] for text in texts]
+    assert len(requests) > 1
+    assert all(sum(splitter.count(text) for text in request) <= 200 for request in requests)
+    assert sorted(text for request in requests for text in request) == sorted(texts)
+
+
+def hit(point_id, score, **payload):
+    return models.ScoredPoint(id=point_id, version=0, score=score, payload=payload)
+
+
+def test_search_distinct_tickets_when_one_ticket_dominates():
+    # Ticket 1's 40 token windows outscore every other ticket; then chunks of tickets 2-7
+    hits = [hit(window_point_id(1, i), 1.0 - i * 0.001, parent_id=1, window_index=i) for i in range(40)]
+    hits += [hit(f"00000000-0000-0000-0000-0000000000{t}{c}", 0.5 - t * 0.01 - c * 0.001, id=t, chunk_index=c)
+             for t in range(2, 8) for c in range(3)]
+    fetches = []
+
+    def search(n):
+        fetches.append(n)
+        return hits[:n]
+
+    results = search_distinct_tickets(search, limit=5)
+    assert [token_windows.ticket_key(result) for result in results] == [1, 2, 3, 4, 5]
+    assert fetches == [10, 20, 40, 80]
+    # A fixed limit * 2 over-fetch would have returned ticket 1 alone
+    assert len(collapse_windows(hits[:10], 5)) == 1
+
+    # Fewer tickets than asked for: stops once the collection runs out of hits
+    fetches.clear()
+    assert len(search_distinct_tickets(search, limit=10)) == 7
+    assert fetches[-1] > len(hits)
+    fetches.clear()
+    assert len(search_distinct_tickets(search, limit=5, max_fetch=30)) == 1 and fetches[-1] == 30
+
+
+if __name__ == "__main__":
+    for test in (test_windows_respect_limit_and_overlap, test_window_ids_and_payloads,
+                 test_batches_stay_under_request_token_cap, test_search_distinct_tickets_when_one_ticket_dominates):
+        test()
+        print(f"✅ {test.__name__}")
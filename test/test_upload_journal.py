@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Check the upload checkpoint journal (qdrant/upload_journal.py): resume points
+when batches finish out of order or a run crashes, and dead-letter replays
+that fail again.
+
+    python -m pytest test/test_upload_journal.py
+    python test/test_upload_journal.py
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qdrant'))
+
+from upload_journal import UploadJournal
+
+SOURCE = 'export.csv'
+
+
+def journal(directory):
+    return UploadJournal('tickets', to_entry=dict, from_entry=dict, directory=directory)
+
+
+def batch(first, last):
+    """Records for CSV rows first..last (one point per row)."""
+    return [{'id': row, 'position': row, 'text': f"row {row}"} for row in range(first, last + 1)]
+
+
+def test_resume_after_out_of_order_batches():
+    with tempfile.TemporaryDirectory() as directory:
+        run = journal(directory)
+        run.start(SOURCE, start_row=0)
+        # Upsert workers finish batch 2 before 0; batch 1 is still in flight when the process dies
+        run.commit(2, batch(20, 29))
+        run.commit(0, batch(0, 9))
+        start, position = journal(directory).resume_point(SOURCE)
+        assert start['run'] == run.run_id and position == 9
+
+        run.fail_batch(1, batch(10, 19), "timeout")
+        # A dead-lettered batch is handled too: the prefix now runs through batch 2
+        assert journal(directory).resume_point(SOURCE)[1] == 29
+        run.finish(uploaded=20, failed=10)
+        assert journal(directory).resume_point(SOURCE) is None
+
+
+def test_crash_mid_run():
+    with tempfile.TemporaryDirectory() as directory:
+        first = journal(directory)
+        first.start(SOURCE, start_row=0)
+        first.commit(0, batch(0, 9))
+        # The crash tears the last journal line
+        with open(first.path, 'a', encoding='utf-8') as f:
+            f.write('{"event": "batch", "run": "' + first.run_id + '", "seq": 1, "sta')
+        assert journal(directory).resume_point(SOURCE)[1] == 9
+
+        # The resumed run crashes before committing anything: resume from its own start row again
+        resumed = journal(directory)
+        resumed.start(SOURCE, start_row=9)
+        start, position = journal(directory).resume_point(SOURCE)
+        assert start['run'] == resumed.run_id and position == 9
+        # Other sources are unaffected
+        assert journal(directory).resume_point('other.csv') is None
+
+
+def test_replay_that_fails_again():
+    with tempfile.TemporaryDirectory() as directory:
+        upload = journal(directory)
+        upload.start(SOURCE, start_row=0)
+        upload.fail_batch(0, batch(0, 2), "503 from Qdrant")
+        upload.dead_letter(batch(1, 1), "embedding failed")  # the same point twice
+        with open(upload.dead_letter_path, 'a', encoding='utf-8') as f:
+            f.write('{"id": 3, "posi')  # crashed mid-write
+
+        replay = journal(directory)
+        records = replay.replay_records()
+        assert sorted(record['id'] for record in records) == [0, 1, 2]
+        replay.start(SOURCE, replay=True)
+        # Replay runs are never resumed: the interrupted upload is still the one to resume
+        assert journal(directory).resume_point(SOURCE)[0]['run'] == upload.run_id
+        replay.dead_letter([record for record in records if record['id'] == 2], "still failing")
+        replay.finish(uploaded=2, failed=1)
+
+        assert replay.clear_dead_letters(keep_run=replay.run_id) == 1
+        remaining = journal(directory).dead_letters()
+        assert [(entry['id'], entry['run'], entry['error']) for entry in remaining] == \
+            [(2, replay.run_id, "still failing")]
+        assert journal(directory).clear_dead_letters() == 0 and not journal(directory).replay_records()
+
+
+if __name__ == "__main__":
+    for test in (test_resume_after_out_of_order_batches, test_crash_mid_run, test_replay_that_fails_again):
+        test()
+        print(f"✅ {test.__name__}")